@@ -1,10 +1,19 @@
 import streamlit as st
-from itertools import combinations
-from pages.utils.flame_util import get_tiers, count_groups_used, get_max_theorical_value, calcular_ps_ms_por_nivel
+import numpy as np
+from functools import partial
+from pages.utils.pool_util import PoolBusyError, queue_depth, run_job
+from pages.utils.flame_store_util import get_tiers_stored
+from pages.utils.flame_sim_util import FLAME_TYPES, estimate_probability
+from pages.utils.flame_util import TIER_LABELS, QUERY_CACHE, RANGE_ORDERS, get_tiers_cached, get_tiers_in_range, get_tier_stats, count_groups_packed, get_tier_column, unpack_tiers, count_tiers, get_max_theorical_value, calcular_ps_ms_por_nivel
 
 MAX_LEVEL = 300
 DEFAULT_PURE_SCALE = 12
 DEFAULT_MIXED_SCALE = 7
+PAGE_SIZE = 50
+SIMULATION_SIZES = [10**5, 10**6, 10**7]
+RANGE_ORDER_LABELS = {"groups": "Menos grupos", "total": "Maior soma dos atributos"}
+
+QUERY_CACHE.enable_persistence()
 
 def atualizar_por_nivel() -> None:
     """
@@ -32,6 +41,16 @@ st.sidebar.markdown("[🧠 Ajuda (Wiki)](https://maplestorywiki.net/w/Bonus_Stat
 
 st.sidebar.markdown("[📊 Calculadora de Bonus Stats](https://www.whackybeanz.com/calc/equips/setup)")
 
+cache_caption = st.sidebar.empty()
+
+def show_cache_stats() -> None:
+    """
+    escreve os contadores de `QUERY_CACHE` na barra lateral; chamada ao final da execução (inclusive antes de cada st.stop),
+    para que reflitam as consultas feitas nesta execução
+    """
+    cache_stats = QUERY_CACHE.stats()
+    cache_caption.caption(f"Cache de consultas: {cache_stats['entries']} itens, {cache_stats['hits']} acertos, {cache_stats['misses']} falhas, {cache_stats['evictions']} descartes")
+
 with st.expander("Como funciona"):
     st.write(
         """
@@ -43,6 +62,8 @@ with st.expander("Como funciona"):
 
         Insira os valores finais de STR, DEX, INT e LUK que você deseja verificar. A calculadora mostrará todas as possíveis combinações de bônus que resultam nesses valores, considerando os tiers puros e mistos.
 
+        Caso não saiba os valores exatos, use a consulta por **valores mínimos**: informe o mínimo (e, se quiser, o máximo) de cada atributo e a calculadora mostrará as melhores configurações dentro desses limites, ordenadas por grupos usados ou pela soma dos atributos.
+
         O nível do equipamento é opcional, mas pode ser usado para definir automaticamente os valores de cada tier.
         """
     )
@@ -51,6 +72,9 @@ theorical_max = get_max_theorical_value(MAX_LEVEL)
 
 st.caption(f"⚠️ Valor máximo teórico por atributo primário: {theorical_max} (nível {MAX_LEVEL})")
 
+modo = st.radio("Tipo de consulta", ["Valores exatos", "Valores mínimos"], horizontal=True)
+range_mode = modo == "Valores mínimos"
+
 col1, col2 = st.columns(2)
 with col1:
     str_val = st.number_input("STR", min_value=0, max_value=theorical_max, step=1, value=0)
@@ -62,6 +86,19 @@ with col2:
 STR, DEX, INT, LUK = 1, 2, 3, 4
 stats = {STR: str_val, DEX: dex_val, INT: int_val, LUK: luk_val}
 
+if range_mode:
+    with st.expander("Valores máximos (opcional)"):
+        col_max1, col_max2 = st.columns(2)
+        upper = {}
+        for stat, label, column in [(STR, "STR", col_max1), (DEX, "DEX", col_max2), (INT, "INT", col_max1), (LUK, "LUK", col_max2)]:
+            with column:
+                upper[stat] = st.number_input(f"{label} máximo", min_value=0, max_value=theorical_max, step=1, value=theorical_max)
+    col_order, col_k = st.columns(2)
+    with col_order:
+        range_order = st.selectbox("Ordenar por", RANGE_ORDERS, format_func=RANGE_ORDER_LABELS.get)
+    with col_k:
+        top_k = st.number_input("Quantidade de configurações", min_value=1, max_value=500, step=1, value=20)
+
 if not "ps" in st.session_state:
     st.session_state.ps = DEFAULT_PURE_SCALE
 if not "ms" in st.session_state:
@@ -75,20 +112,119 @@ with col4:
 
 st.number_input("Nível do equipamento (ex: 250)",on_change=atualizar_por_nivel, min_value=0, max_value=300, step=1, key="nivel", help="insira o nivel do equipamento ou deixe 0 se deseja inserir manualmente os valores de referencia dos atributos puro e misto")
 max_groups = st.number_input("Número máximo de grupos distintos de 1 a 4.", min_value=1, max_value=4, value=4)
-if st.button("Calcular Configurações Possíveis"):
-    tiers = get_tiers(stats, ps, ms)
-    filtered = list(filter(lambda t: count_groups_used(t) <= max_groups, tiers))
+with st.expander("Simulação de flames (Monte Carlo)"):
+    st.caption("Estima a probabilidade de uma flame dar pelo menos os valores de STR, DEX, INT e LUK informados acima (e no máximo os valores máximos, na consulta por valores mínimos), sorteando 4 linhas distintas entre 19 tipos e um tier por linha.")
+    col_type, col_size = st.columns(2)
+    with col_type:
+        flame_type = st.selectbox("Tipo de flame", list(FLAME_TYPES))
+    with col_size:
+        simulation_size = st.selectbox("Flames simuladas", SIMULATION_SIZES, index=1, format_func=lambda size: f"{size:,}".replace(",", "."))
+    if st.button("Simular"):
+        bounds = {i: (stats[i], upper[i] if range_mode else None) for i in range(1, 5)}
+        sim_status = st.empty()
+        try:
+            st.session_state.flame_simulation = (flame_type, run_job(
+                estimate_probability, bounds, ps, ms, FLAME_TYPES[flame_type], simulation_size,
+                on_wait=lambda elapsed: sim_status.caption(f"simulando... {elapsed:.1f}s"),
+            ))
+        except (PoolBusyError, TimeoutError, ValueError) as error:
+            sim_status.error(str(error))
+        else:
+            sim_status.empty()
+    if "flame_simulation" in st.session_state:
+        simulated_type, result = st.session_state.flame_simulation
+        col_p, col_rolls = st.columns(2)
+        with col_p:
+            st.metric(f"Probabilidade ({simulated_type})", f"{100*result['probability']:.4f}%")
+        with col_rolls:
+            st.metric("Flames esperadas até o sucesso", "∞" if result["hits"] == 0 else f"{result['expected_rolls']:.1f}")
+        st.caption(f"Intervalo de confiança de 95%: {100*result['low']:.4f}% a {100*result['high']:.4f}% ({result['hits']} sucessos em {result['samples']} flames).")
 
-    if not filtered:
+if st.button("Calcular Configurações Possíveis"):
+    if range_mode:
+        st.session_state.pop("flame_query", None)
+        st.session_state.flame_range_query = (tuple((stats[i], upper[i]) for i in range(1, 5)), ps, ms, max_groups, range_order, top_k)
+    else:
+        st.session_state.pop("flame_range_query", None)
+        st.session_state.flame_query = (tuple(stats[i] for i in range(1, 5)), ps, ms, max_groups)
+
+if "flame_range_query" in st.session_state:
+    query_bounds, query_ps, query_ms, query_max_groups, query_order, query_k = st.session_state.flame_range_query
+    if any(low > high for low, high in query_bounds):
+        st.error("O valor máximo de cada atributo deve ser maior ou igual ao mínimo.")
+        show_cache_stats()
+        st.stop()
+    status = st.empty()
+    def on_wait(elapsed: float) -> None:
+        status.caption(f"calculando... {elapsed:.1f}s ({queue_depth()} tarefa(s) pendente(s) no servidor)")
+    try:
+        found = run_job(get_tiers_in_range, dict(enumerate(query_bounds, 1)), query_ps, query_ms, query_k, query_order, query_max_groups, on_wait=on_wait)
+    except (PoolBusyError, TimeoutError) as error:
+        status.error(str(error))
+        show_cache_stats()
+        st.stop()
+    status.empty()
+    if not found:
+        st.error("Nenhuma combinação possível dentro dos limites fornecidos.")
+    else:
+        st.success(f"Exibindo as {len(found)} melhores configurações ({RANGE_ORDER_LABELS[query_order].lower()}).")
+        tiers = np.array([tier for tier, _ in found], dtype=np.int32)
+        final_stats = np.array([get_tier_stats(tier, query_ps, query_ms) for tier, _ in found], dtype=np.int32)
+        scales = np.array([query_ps]*4 + [query_ms]*6, dtype=np.int32)
+        data = {"#": np.arange(1, len(found) + 1), "Grupos": [groups for _, groups in found]}
+        data.update({f"{label} final": final_stats[:, i] for i, label in enumerate(TIER_LABELS[:4])})
+        data["Soma"] = final_stats.sum(axis=1)
+        data.update({label: tiers[:, i]*scales[i] for i, label in enumerate(TIER_LABELS)})
+        column_config = {
+            label: st.column_config.NumberColumn(label, help=f"{'Misto' if '/' in label else 'Puro'}: valor do bônus, tier = valor / {scale}")
+            for label, scale in zip(TIER_LABELS, scales)
+        }
+        st.dataframe(data, hide_index=True, column_config=column_config)
+
+if "flame_query" in st.session_state:
+    query_stats, query_ps, query_ms, query_max_groups = st.session_state.flame_query
+    query_stats = {i: value for i, value in enumerate(query_stats, 1)}
+    total, histogram = count_tiers(query_stats, query_ps, query_ms, query_max_groups)
+
+    if not total:
         st.error("Nenhuma combinação possível com os valores fornecidos.")
     else:
-        st.success(f"Foram encontradas {len(filtered)} combinações possíveis.")
-        pair_labels = ["STR", "DEX", "INT", "LUK"] + [f"{a}/{b}" for a, b in combinations(["STR", "DEX", "INT", "LUK"], 2)]
-        for i, tier in enumerate(sorted(filtered, key=lambda t: count_groups_used(t)), 1):
-            opt = count_groups_used(tier)
-            st.subheader(f"{i}ª configuração — usa {opt} grupo(s) de flame:")
-            values = [t * (ps if idx < 4 else ms) for idx, t in enumerate(tier)]
-            for label, value, t in zip(pair_labels, values, tier):
-                if value > 0:
-                    st.write(f"({'MISTO' if '/' in label else 'PURO'}) **{label}**: {value} (tier {t})")
-                    #st.markdown(f"""**({'MISTO' if '/' in label else 'PURO'})** <abbr title="Tier {t}">**{label}**: {value}</abbr>""", unsafe_allow_html=True)
\ No newline at end of file
+        st.success(f"Foram encontradas {total} combinações possíveis.")
+        st.caption("Quantidade de configurações por número de grupos usados")
+        st.bar_chart({"configurações": histogram[:query_max_groups + 1]})
+        if st.checkbox(f"Listar as {total} configurações", help="enumera e exibe as configurações em uma tabela paginada; o histograma acima é calculado sem enumerá-las."):
+            status = st.empty()
+            def on_wait(elapsed: float) -> None:
+                status.caption(f"calculando... {elapsed:.1f}s ({queue_depth()} tarefa(s) pendente(s) no servidor)")
+            try:
+                codes = get_tiers_stored(query_stats, query_ps, query_ms, query_max_groups, partial(get_tiers_cached, runner=partial(run_job, on_wait=on_wait)))
+            except (PoolBusyError, TimeoutError) as error:
+                status.error(str(error))
+                show_cache_stats()
+                st.stop()
+            status.empty()
+
+            col5, col6, col7 = st.columns(3)
+            with col5:
+                sort_by = st.selectbox("Ordenar por", ["Grupos"] + TIER_LABELS)
+            with col6:
+                descending = st.checkbox("Ordem decrescente")
+            with col7:
+                page_count = (total + PAGE_SIZE - 1) // PAGE_SIZE
+                page = st.number_input(f"Página (de {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+            sort_keys = count_groups_packed(codes) if sort_by == "Grupos" else get_tier_column(codes, TIER_LABELS.index(sort_by))
+            order = np.argsort(-sort_keys.astype(np.int16) if descending else sort_keys, kind="stable")
+            start, end = (page - 1)*PAGE_SIZE, min(page*PAGE_SIZE, total)
+            page_codes = codes[order[start:end]]
+            tiers = unpack_tiers(page_codes).astype(np.int32)
+            scales = np.array([query_ps]*4 + [query_ms]*6, dtype=np.int32)
+            data = {"#": np.arange(start + 1, end + 1), "Grupos": count_groups_packed(page_codes)}
+            data.update({label: tiers[:, i]*scales[i] for i, label in enumerate(TIER_LABELS)})
+            column_config = {
+                label: st.column_config.NumberColumn(label, help=f"{'Misto' if '/' in label else 'Puro'}: valor do bônus, tier = valor / {scale}")
+                for label, scale in zip(TIER_LABELS, scales)
+            }
+            st.dataframe(data, hide_index=True, column_config=column_config)
+            st.caption(f"Exibindo configurações {start + 1} a {end} de {total}.")
+
+show_cache_stats()
@@ -0,0 +1,90 @@
+import streamlit as st
+import numpy as np
+from pages.utils.flame_util import TIER_LABELS, MAX_GROUPS, QUERY_CACHE, calcular_ps_ms_por_nivel, get_feasibility_grid_cached, get_max_theorical_value
+
+STAT_LABELS = TIER_LABELS[:4]
+HEATMAP_SCALE = 3
+INFEASIBLE_COLOR = (30, 30, 30)
+GROUP_COLORS = np.array([
+    (253, 231, 37), (181, 222, 43), (110, 206, 88), (53, 183, 121), (31, 158, 137), (38, 130, 142),
+    (49, 104, 142), (62, 74, 137), (72, 40, 120), (68, 1, 84), (40, 0, 50),
+], dtype=np.uint8)
+
+QUERY_CACHE.enable_persistence()
+
+def colorir_grade(grid:np.ndarray) -> np.ndarray:
+    """
+    Converte a grade de `get_feasibility_grid` numa imagem RGB: uma cor por número mínimo de grupos (do amarelo, poucos
+    grupos, ao roxo, muitos grupos) e cinza escuro para combinações impossíveis. A primeira linha da imagem corresponde ao
+    maior valor do eixo vertical e cada célula é ampliada para `HEATMAP_SCALE` pixels.
+
+    Parâmetros:
+        grid (np.ndarray): Matriz de grupos mínimos, -1 para combinações impossíveis.
+
+    Retorna:
+        np.ndarray: Imagem RGB (uint8).
+    """
+    image = np.empty(grid.shape + (3,), dtype=np.uint8)
+    image[:] = INFEASIBLE_COLOR
+    feasible = grid >= 0
+    image[feasible] = GROUP_COLORS[grid[feasible]]
+    return np.kron(image[::-1], np.ones((HEATMAP_SCALE, HEATMAP_SCALE, 1), dtype=np.uint8))
+
+st.title("Maplestory Helper - Flame Heatmap")
+
+with st.expander("Como funciona"):
+    st.write(
+        """
+        Fixe o valor de dois atributos e o nível do equipamento. O mapa mostra, para cada par de valores dos outros dois
+        atributos, se existe alguma configuração de flame que produz exatamente esses 4 valores e quantos grupos
+        (linhas de flame de atributos primários) ela precisa no mínimo.
+
+        Cores claras indicam poucos grupos e cores escuras muitos grupos; as células em cinza escuro são impossíveis.
+        """
+    )
+
+nivel = st.number_input("Nível do equipamento (ex: 250)", min_value=0, max_value=300, step=1, value=250)
+ps, ms = calcular_ps_ms_por_nivel(nivel)
+st.caption(f"Valor de cada tier puro: {ps}, valor de cada tier misto: {ms}")
+
+fixed_stats = st.multiselect("Atributos fixos", STAT_LABELS, default=["INT", "LUK"], max_selections=2)
+if len(fixed_stats) != 2:
+    st.info("Selecione exatamente dois atributos fixos.")
+    st.stop()
+
+max_value = get_max_theorical_value(nivel)
+fixed = {}
+columns = st.columns(2)
+for column, label in zip(columns, fixed_stats):
+    with column:
+        fixed[STAT_LABELS.index(label) + 1] = st.number_input(f"Valor de {label}", min_value=0, max_value=max_value, step=1, value=0)
+
+grid = get_feasibility_grid_cached(fixed, ps, ms)
+vertical, horizontal = (label for label in STAT_LABELS if label not in fixed_stats)
+feasible = grid >= 0
+
+st.image(colorir_grade(grid), caption=f"eixo vertical: {vertical} (0 a {grid.shape[0] - 1}, de baixo para cima), eixo horizontal: {horizontal} (0 a {grid.shape[1] - 1})")
+legend = np.kron(np.vstack([GROUP_COLORS[None, :], GROUP_COLORS[None, :]]), np.ones((12, 24, 1), dtype=np.uint8))
+st.image(legend, caption=f"grupos mínimos: 0 (esquerda) a {MAX_GROUPS} (direita)")
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Pares possíveis", f"{int(feasible.sum())} de {grid.size}")
+with col2:
+    impossible_rows = int((~feasible.any(axis=1)).sum())
+    st.metric(f"Valores de {vertical} impossíveis", impossible_rows)
+with col3:
+    impossible_columns = int((~feasible.any(axis=0)).sum())
+    st.metric(f"Valores de {horizontal} impossíveis", impossible_columns)
+
+st.subheader("Consultar um par")
+col4, col5 = st.columns(2)
+with col4:
+    vertical_value = st.number_input(vertical, min_value=0, max_value=grid.shape[0] - 1, step=1, value=0)
+with col5:
+    horizontal_value = st.number_input(horizontal, min_value=0, max_value=grid.shape[1] - 1, step=1, value=0)
+groups = int(grid[vertical_value, horizontal_value])
+if groups < 0:
+    st.error(f"Nenhuma configuração produz {vertical} = {vertical_value} e {horizontal} = {horizontal_value} com os valores fixos.")
+else:
+    st.success(f"Possível com no mínimo {groups} grupo(s).")
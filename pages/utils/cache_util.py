@@ -0,0 +1,219 @@
+import atexit, multiprocessing, os, pickle, sys, tempfile, threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import Any
+
+def default_sizeof(value: Any) -> int:
+    """
+    estima o tamanho em bytes de um valor armazenado no cache: usa `nbytes` para vetores do numpy
+    e `sys.getsizeof` para os demais objetos (somando os itens de tuplas e listas)
+
+    Parâmetros:
+
+    - value (Any): o valor a ser medido
+
+    Retorna:
+
+    - int: o tamanho estimado em bytes
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(default_sizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+class LRUCache:
+    """
+    cache compartilhado por todas as threads do processo (e portanto por todas as sessões do streamlit),
+    com descarte do item usado há mais tempo quando o limite de memória é excedido e persistência opcional em disco
+
+    Parâmetros:
+
+    - max_bytes (int): o limite de memória, medido por `sizeof`, dos valores armazenados
+    - path (str ou None): o arquivo usado para persistir o cache entre execuções, sem persistência caso não informado.
+    o arquivo só é lido e gravado depois de `enable_persistence`, e apenas no processo principal
+    - sizeof (Callable): a função usada para medir cada valor, `default_sizeof` caso não informada
+    """
+
+    def __init__(self, max_bytes: int, path: str | None = None, sizeof: Callable[[Any], int] = default_sizeof) -> None:
+        if max_bytes <= 0:
+            raise ValueError("O limite de memória do cache deve ser positivo.")
+        self.max_bytes = max_bytes
+        self.path = path
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._persistent = False
+        self._pending: dict[Hashable, Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        obtem o valor associado a chave, marcando-o como o mais recentemente usado
+
+        Parâmetros:
+
+        - key (Hashable): a chave canonica da consulta
+        - default (Any): o valor retornado caso a chave não esteja no cache
+
+        Retorna:
+
+        - Any: o valor armazenado ou default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        armazena um valor, descartando os itens usados há mais tempo até que o limite de memória seja respeitado.
+        valores maiores que o proprio limite não são armazenados
+
+        Parâmetros:
+
+        - key (Hashable): a chave canonica da consulta
+        - value (Any): o valor a ser armazenado
+        """
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        obtem o valor associado a chave ou, em caso de falha, calcula-o com `compute` e o armazena.
+        o calculo é feito fora da trava, então sessões diferentes não esperam umas pelas outras, exceto quando pedem a mesma chave:
+        enquanto uma chave está sendo calculada, as demais chamadas esperam o resultado (ou a exceção) do primeiro calculo
+        em vez de repeti-lo, e são contadas como acertos
+
+        Parâmetros:
+
+        - key (Hashable): a chave canonica da consulta
+        - compute (Callable): função sem argumentos que calcula o valor
+
+        Retorna:
+
+        - Any: o valor armazenado ou calculado
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            pending = self._pending.get(key)
+            if pending is None:
+                self.misses += 1
+                future = self._pending[key] = Future()
+            else:
+                self.hits += 1
+        if pending is not None:
+            return pending.result()
+        try:
+            value = compute()
+        except BaseException as error:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(error)
+            raise
+        self.put(key, value)
+        with self._lock:
+            del self._pending[key]
+        future.set_result(value)
+        return value
+
+    def stats(self) -> dict[str, int]:
+        """
+        retorna os contadores do cache: acertos, falhas, descartes, quantidade de itens e bytes ocupados
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+            }
+
+    def clear(self) -> None:
+        """
+        remove todos os itens do cache, mantendo os contadores
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def enable_persistence(self) -> None:
+        """
+        carrega os itens gravados em `path` e registra `save` para o fim do processo; chamada explicitamente pela aplicação
+        (e não na importação do módulo), de forma que os processos do pool, que reimportam os módulos, não carreguem uma
+        cópia do arquivo nem o sobrescrevam ao terminar. chamadas repetidas e chamadas fora do processo principal não fazem nada
+        """
+        if self.path is None or multiprocessing.parent_process() is not None:
+            return
+        with self._lock:
+            if self._persistent:
+                return
+            self._persistent = True
+        self.load()
+        atexit.register(self.save)
+
+    def save(self) -> None:
+        """
+        grava os itens do cache em `path`, do menos para o mais recentemente usado.
+        a escrita é feita num arquivo temporário seguido de `os.replace`, então uma interrupção não corrompe o arquivo
+        """
+        if self.path is None or multiprocessing.parent_process() is not None:
+            return
+        with self._lock:
+            items = [(key, value) for key, (value, _) in self._entries.items()]
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(items, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self) -> None:
+        """
+        carrega os itens gravados em `path` por `save`, respeitando o limite de memória.
+        um arquivo ausente ou ilegível é ignorado e o cache começa vazio
+        """
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as file:
+                items = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return
+        for key, value in items:
+            self.put(key, value)
@@ -0,0 +1,248 @@
+import argparse, json, platform, sys, time, tracemalloc
+from collections.abc import Callable
+
+import numpy as np
+
+from pages.utils.flame_util import (
+    MAX_TIER, MIXED_PAIRS, QUERY_CACHE, calcular_ps_ms_por_nivel, count_tiers, get_max_theorical_value, get_tiers, get_tiers_batch,
+)
+
+WORST_CASE_LINES = 20
+"""Quantidade de linhas de atributos do cenário de pior caso."""
+
+WORST_CASE_CANDIDATES = 2000
+"""Quantidade de linhas sorteadas entre as quais são escolhidas as de pior caso."""
+
+INFEASIBLE_LINES = 200
+"""Quantidade de linhas de atributos sem solução do cenário de linhas inviáveis."""
+
+BATCH_LINES = 2000
+"""Quantidade de linhas de atributos do cenário em lote."""
+
+BATCH_ROUNDS = 5
+"""Quantidade de chamadas de `get_tiers_batch` do cenário em lote."""
+
+DEFAULT_THRESHOLD = 0.2
+"""Piora relativa máxima, em relação à referência, de latência mediana, p99 e vazão antes de a execução falhar."""
+
+Call = Callable[[], object]
+"""
+tipo customizado para anotar uma chamada medida pelo benchmark: uma função sem argumentos
+"""
+
+def _random_stats(ps:int, ms:int, size:int, rng:np.random.Generator) -> np.ndarray:
+    tiers = rng.integers(0, MAX_TIER + 1, (size, 10))
+    stats = ps*tiers[:, :4]
+    for column, (i, j) in enumerate(MIXED_PAIRS, 4):
+        stats[:, i] += ms*tiers[:, column]
+        stats[:, j] += ms*tiers[:, column]
+    return stats
+
+def _query(stats:np.ndarray, ps:int, ms:int) -> Call:
+    query = {i + 1: int(value) for i, value in enumerate(stats)}
+    return lambda: get_tiers(query, ps, ms)
+
+def worst_case_calls(rng:np.random.Generator, size:int = WORST_CASE_LINES) -> list[Call]:
+    """
+    Cenário de pior caso: entre `WORST_CASE_CANDIDATES` linhas alcançáveis sorteadas, de níveis também sorteados,
+    as `size` com mais configurações (contadas com `count_tiers`), consultadas com `get_tiers`.
+    """
+    candidates = []
+    for level in rng.integers(0, 301, WORST_CASE_CANDIDATES):
+        ps, ms = calcular_ps_ms_por_nivel(int(level))
+        stats = _random_stats(ps, ms, 1, rng)[0]
+        candidates.append((count_tiers({i + 1: int(v) for i, v in enumerate(stats)}, ps, ms)[0], stats, ps, ms))
+    candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+    return [_query(stats, ps, ms) for _, stats, ps, ms in candidates[:size]]
+
+def infeasible_calls(rng:np.random.Generator, size:int = INFEASIBLE_LINES, ps:int = 12, ms:int = 7) -> list[Call]:
+    """
+    Cenário de linhas inviáveis: `size` linhas uniformes, até o valor máximo de um atributo, sem nenhuma configuração,
+    que devem ser descartadas rapidamente.
+    """
+    calls = []
+    while len(calls) < size:
+        stats = rng.integers(0, get_max_theorical_value(300) + 1, 4)
+        if count_tiers({i + 1: int(v) for i, v in enumerate(stats)}, ps, ms)[0] == 0:
+            calls.append(_query(stats, ps, ms))
+    return calls
+
+def level_sweep_calls(rng:np.random.Generator) -> list[Call]:
+    """
+    Varredura de níveis: uma linha alcançável para cada nível de 0 a 300, com as escalas de `calcular_ps_ms_por_nivel`.
+    """
+    calls = []
+    for level in range(301):
+        ps, ms = calcular_ps_ms_por_nivel(level)
+        calls.append(_query(_random_stats(ps, ms, 1, rng)[0], ps, ms))
+    return calls
+
+def batch_calls(rng:np.random.Generator, size:int = BATCH_LINES, rounds:int = BATCH_ROUNDS) -> list[Call]:
+    """
+    Cenário em lote: `rounds` chamadas de `get_tiers_batch`, cada uma com `size` linhas alcançáveis de níveis sorteados.
+    """
+    calls = []
+    for _ in range(rounds):
+        levels = rng.integers(0, 301, size)
+        stats = np.vstack([_random_stats(*calcular_ps_ms_por_nivel(int(level)), 1, rng) for level in levels])
+        calls.append(lambda stats=stats, levels=levels: get_tiers_batch(stats, levels=levels))
+    return calls
+
+WORKLOADS: dict[str, Callable[[np.random.Generator], list[Call]]] = {
+    "worst_case": worst_case_calls,
+    "infeasible": infeasible_calls,
+    "level_sweep": level_sweep_calls,
+    "batch": batch_calls,
+}
+"""Cenários do benchmark, indexados pelo nome usado na linha de comando e no arquivo de referência."""
+
+def clear_query_caches() -> None:
+    """
+    Esvazia o cache de consultas `QUERY_CACHE`, para que cada chamada seja medida a frio.
+    Os índices construídos uma única vez por processo são mantidos.
+    """
+    QUERY_CACHE.clear()
+
+def measure(calls:list[Call], repeat:int = 1) -> dict[str, float]:
+    """
+    Mede uma lista de chamadas: percentis de latência por chamada (em milissegundos), vazão (chamadas por segundo)
+    e pico de memória alocada (em MiB). Os tempos são medidos sem tracemalloc, numa passada separada da memória,
+    e os caches de consultas são esvaziados antes de cada chamada.
+
+    Parâmetros:
+
+        calls (list[Call]): As chamadas medidas.
+        repeat (int): Quantas vezes cada chamada é repetida na medição de tempo.
+
+    Retorna:
+
+        dict[str, float]: As métricas calls, p50_ms, p90_ms, p99_ms, max_ms, throughput e peak_mib.
+    """
+    latencies = []
+    for _ in range(repeat):
+        for call in calls:
+            clear_query_caches()
+            start = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies)*1000
+    peak = 0
+    tracemalloc.start()
+    try:
+        for call in calls:
+            clear_query_caches()
+            tracemalloc.reset_peak()
+            call()
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {
+        "calls": len(latencies),
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p99_ms": float(p99),
+        "max_ms": float(latencies.max()),
+        "throughput": float(len(latencies)/latencies.sum()*1000),
+        "peak_mib": peak/2**20,
+    }
+
+def run_benchmarks(names:list[str], seed:int = 0, repeat:int = 1) -> dict[str, dict[str, float]]:
+    """
+    Executa os cenários de `WORKLOADS` informados, com entradas geradas a partir de `seed` para que as execuções
+    sejam reproduzíveis. Uma passada de aquecimento por todas as chamadas constrói os índices (por processo e
+    por par de escalas) antes da medição.
+
+    Parâmetros:
+
+        names (list[str]): Os nomes dos cenários.
+        seed (int): A semente usada para gerar as entradas.
+        repeat (int): Quantas vezes cada chamada é repetida na medição de tempo.
+
+    Retorna:
+
+        dict[str, dict[str, float]]: As métricas de `measure` de cada cenário.
+    """
+    results = {}
+    for name in names:
+        calls = WORKLOADS[name](np.random.default_rng(seed))
+        for call in calls:
+            call()
+        results[name] = measure(calls, repeat)
+    return results
+
+def find_regressions(results:dict[str, dict[str, float]], baseline:dict[str, dict[str, float]], threshold:float = DEFAULT_THRESHOLD) -> list[str]:
+    """
+    Compara as métricas com as de uma execução de referência, devolvendo uma descrição de cada piora acima de
+    `threshold` (relativa) na latência mediana, no p99 ou na vazão. Cenários ausentes da referência são ignorados.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if metrics[key] > reference[key]*(1 + threshold):
+                regressions.append(f"{name}: {key} {reference[key]:.3f} -> {metrics[key]:.3f}")
+        if metrics["throughput"] < reference["throughput"]*(1 - threshold):
+            regressions.append(f"{name}: throughput {reference['throughput']:.1f} -> {metrics['throughput']:.1f}")
+    return regressions
+
+def format_results(results:dict[str, dict[str, float]]) -> str:
+    """
+    Formata as métricas de `run_benchmarks` como uma tabela de texto.
+    """
+    header = f"{'cenário':<12} {'chamadas':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'chamadas/s':>11} {'pico MiB':>9}"
+    rows = [header]
+    for name, m in results.items():
+        rows.append(
+            f"{name:<12} {m['calls']:>8} {m['p50_ms']:>9.3f} {m['p90_ms']:>9.3f} {m['p99_ms']:>9.3f} "
+            f"{m['max_ms']:>9.3f} {m['throughput']:>11.1f} {m['peak_mib']:>9.2f}"
+        )
+    return "\n".join(rows)
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Constroi o parser de argumentos da linha de comando.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m pages.utils.flame_benchmark",
+        description="Mede latência, vazão e memória do solver de flame em cenários reproduzíveis.",
+    )
+    parser.add_argument("--workload", choices=list(WORKLOADS), action="append", help="cenário medido, todos caso omitido")
+    parser.add_argument("--seed", type=int, default=0, help="semente usada para gerar as entradas")
+    parser.add_argument("--repeat", type=int, default=1, help="repetições de cada chamada na medição de tempo")
+    parser.add_argument("--save", help="grava as métricas neste arquivo JSON, para uso como referência")
+    parser.add_argument("--baseline", help="arquivo JSON de referência; pioras acima de --threshold fazem a execução falhar")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="piora relativa tolerada em relação à referência")
+    return parser
+
+def main(argv:list[str] | None = None) -> int:
+    """
+    Ponto de entrada da linha de comando, ver `build_parser`.
+
+    Retorna:
+
+        int: 0 em caso de sucesso, 1 se houver regressões em relação à referência.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat deve ser um inteiro positivo")
+    results = run_benchmarks(args.workload or list(WORKLOADS), args.seed, args.repeat)
+    print(format_results(results))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__, "seed": args.seed, "results": results}, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"regressão: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
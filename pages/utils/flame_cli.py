@@ -0,0 +1,366 @@
+import argparse, csv, json, sys
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import combinations, islice
+from typing import TextIO
+
+import numpy as np
+
+from pages.utils.flame_nstat_util import MAX_STATS, get_tiers_n_parallel, iter_tiers_n, validate_n_query
+from pages.utils.flame_util import MAX_GROUPS, TIER_LABELS, calcular_ps_ms_por_nivel, count_groups_packed, get_tiers_batch, unpack_tiers, validate_query
+
+STAT_COLUMNS = ["str", "dex", "int", "luk"]
+"""Colunas (ou chaves JSON) com os valores de STR, DEX, INT e LUK, sem diferenciar maiúsculas de minúsculas."""
+
+DEFAULT_STATS = len(STAT_COLUMNS)
+"""Número de atributos padrão; outros valores usam o solver generalizado de `flame_nstat_util`."""
+
+CHUNK_SIZE = 1000
+"""Quantidade de linhas de atributos resolvidas por tarefa."""
+
+StatLine = tuple[int, list[int], int, int]
+"""
+tipo customizado para anotar uma linha de entrada: (número do registro, [STR, DEX, INT, LUK] ou [s1, ..., sn], ps, ms)
+"""
+
+def stat_columns(num_stats: int) -> list[str]:
+    """
+    Colunas de entrada para o número de atributos: `STAT_COLUMNS` para 4 atributos, s1 a sn nos demais casos.
+    """
+    return STAT_COLUMNS if num_stats == DEFAULT_STATS else [f"s{i}" for i in range(1, num_stats + 1)]
+
+def tier_labels(num_stats: int) -> list[str]:
+    """
+    Rótulos das colunas de tiers na saída: `TIER_LABELS` para 4 atributos; nos demais casos, os n grupos puros (S1 a Sn)
+    seguidos dos grupos mistos na ordem de `itertools.combinations`, a mesma das configurações de `iter_tiers_n`.
+    """
+    if num_stats == DEFAULT_STATS:
+        return TIER_LABELS
+    return [f"S{i}" for i in range(1, num_stats + 1)] + [f"S{i}/S{j}" for i, j in combinations(range(1, num_stats + 1), 2)]
+
+def parse_stat_line(record: dict, line: int, level: int | None = None, ps: int | None = None, ms: int | None = None, num_stats: int = DEFAULT_STATS) -> StatLine:
+    """
+    Converte um registro de entrada (linha CSV ou objeto JSON) em uma linha de atributos.
+    As escalas são obtidas, em ordem de prioridade, das colunas ps/ms, da coluna level (via `calcular_ps_ms_por_nivel`)
+    ou dos valores padrão passados na linha de comando.
+
+    Parâmetros:
+
+    - record (dict): o registro lido, com as colunas de `stat_columns` e opcionalmente level, ps e ms
+    - line (int): o número do registro na entrada, 1-indexado
+    - level (int ou None): nível padrão, usado quando o registro não informa escalas
+    - ps (int ou None): escala pura padrão
+    - ms (int ou None): escala mista padrão
+    - num_stats (int): o número de atributos de cada registro
+
+    Retorna:
+
+    - tuple: a linha de atributos como (line, stats, ps, ms)
+
+    Exceções:
+
+    - ValueError: se faltar algum atributo, se algum valor não for inteiro, se não houver escalas para o registro
+    ou se a consulta for inválida segundo `validate_query` ou `validate_n_query` (atributos negativos, escalas fora do intervalo), de forma
+    que um registro inválido não derrube o lote de `get_tiers_batch` em que seria resolvido
+    """
+    record = {str(key).strip().lower(): value for key, value in record.items()}
+    try:
+        stats = [int(record[column]) for column in stat_columns(num_stats)]
+    except KeyError as error:
+        raise ValueError(f"registro {line}: coluna {error} ausente") from None
+    except (TypeError, ValueError):
+        raise ValueError(f"registro {line}: os atributos devem ser inteiros") from None
+    try:
+        if record.get("ps") not in (None, "") and record.get("ms") not in (None, ""):
+            scales = int(record["ps"]), int(record["ms"])
+        elif record.get("level") not in (None, ""):
+            scales = calcular_ps_ms_por_nivel(int(record["level"]))
+        elif ps is not None and ms is not None:
+            scales = ps, ms
+        elif level is not None:
+            scales = calcular_ps_ms_por_nivel(level)
+        else:
+            raise ValueError("informe level ou ps/ms (na entrada ou na linha de comando)")
+        if num_stats == DEFAULT_STATS:
+            validate_query(dict(enumerate(stats, 1)), *scales, None, None)
+        else:
+            validate_n_query(stats, *scales, None, None)
+    except (TypeError, ValueError) as error:
+        raise ValueError(f"registro {line}: {error}") from None
+    return line, stats, *scales
+
+def read_stat_lines(stream: TextIO, input_format: str, level: int | None = None, ps: int | None = None, ms: int | None = None, num_stats: int = DEFAULT_STATS) -> Iterator[StatLine]:
+    """
+    Lê as linhas de atributos de um arquivo CSV (com cabeçalho) ou JSONL de forma preguiçosa.
+    Registros inválidos (incluindo linhas JSONL que não são JSON válido ou não são objetos) são reportados
+    no stderr e ignorados, sem interromper a leitura.
+
+    Parâmetros:
+
+    - stream (TextIO): o arquivo de entrada já aberto
+    - input_format (str): "csv" ou "jsonl"
+    - level, ps, ms: escalas padrão, ver `parse_stat_line`
+    - num_stats (int): o número de atributos de cada registro
+
+    Retorna:
+
+    - Iterator[StatLine]: gerador de linhas de atributos
+    """
+    if input_format == "csv":
+        records = csv.DictReader(stream)
+    else:
+        records = (row for row in stream if row.strip())
+    for line, record in enumerate(records, 1):
+        try:
+            if input_format != "csv":
+                try:
+                    record = json.loads(record)
+                except json.JSONDecodeError as error:
+                    raise ValueError(f"registro {line}: JSON inválido ({error})") from None
+                if not isinstance(record, dict):
+                    raise ValueError(f"registro {line}: o registro deve ser um objeto JSON")
+            yield parse_stat_line(record, line, level, ps, ms, num_stats)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+
+def solve_chunk(chunk: list[StatLine], max_groups: int | None = None, limit: int | None = None) -> list[tuple[int, int, int, np.ndarray]]:
+    """
+    Resolve um bloco de linhas de atributos com `get_tiers_batch`, agrupando as linhas por par (ps, ms).
+    É a unidade de trabalho enviada aos processos do pool, então recebe e devolve apenas dados serializáveis.
+
+    Parâmetros:
+
+    - chunk (list[StatLine]): o bloco de linhas de atributos
+    - max_groups (int ou None): número máximo de grupos distintos por configuração
+    - limit (int ou None): número máximo de configurações por linha
+
+    Retorna:
+
+    - list[tuple]: para cada linha, na ordem de entrada, a tupla (line, ps, ms, configurações compactadas)
+    """
+    results = [None]*len(chunk)
+    pairs = {}
+    for position, (_, _, ps, ms) in enumerate(chunk):
+        pairs.setdefault((ps, ms), []).append(position)
+    for (ps, ms), positions in pairs.items():
+        stats = np.array([chunk[position][1] for position in positions], dtype=np.int64)
+        try:
+            codes, offsets = get_tiers_batch(stats, ps, ms, max_groups=max_groups)
+        except ValueError as error:
+            for position in positions:
+                print(f"registro {chunk[position][0]}: {error}", file=sys.stderr)
+                results[position] = (chunk[position][0], ps, ms, np.zeros(0, dtype=np.uint32))
+            continue
+        for row, position in enumerate(positions):
+            results[position] = (chunk[position][0], ps, ms, codes[offsets[row]:offsets[row + 1]][:limit])
+    return results
+
+def solve_chunk_n(chunk: list[StatLine], max_groups: int | None = None, limit: int | None = None, executor: Executor | None = None, workers: int = 1) -> list[tuple[int, int, int, list[tuple[list[int], int]]]]:
+    """
+    Resolve um bloco de linhas com um número de atributos diferente de 4, linha a linha, com `iter_tiers_n`.
+    Com um pool, cada linha é dividida em partições resolvidas em paralelo por `get_tiers_n_parallel`, já que
+    uma única consulta de muitos atributos pode levar mais tempo que um bloco inteiro de 4 atributos.
+
+    Parâmetros:
+
+    - chunk (list[StatLine]): o bloco de linhas de atributos
+    - max_groups (int ou None): número máximo de grupos distintos por configuração
+    - limit (int ou None): número máximo de configurações por linha
+    - executor (Executor ou None): o pool usado para dividir cada linha, resolvendo no processo atual caso não informado
+    - workers (int): o número de processos do pool, usado para escolher o número de partições
+
+    Retorna:
+
+    - list[tuple]: para cada linha, na ordem de entrada, a tupla (line, ps, ms, pares (configuração, grupos usados))
+    """
+    if executor is None:
+        return [(line, ps, ms, list(islice(iter_tiers_n(stats, ps, ms, max_groups), limit))) for line, stats, ps, ms in chunk]
+    solved = []
+    for line, stats, ps, ms in chunk:
+        tiers = get_tiers_n_parallel(stats, ps, ms, max_groups, limit, workers, executor)
+        solved.append((line, ps, ms, [(tier, sum(1 for t in tier if t > 0)) for tier in tiers]))
+    return solved
+
+def format_solutions_n(solved: Iterable[tuple[int, int, int, list[tuple[list[int], int]]]], output_format: str) -> tuple[str, int]:
+    """
+    Equivalente de `format_solutions` para as tuplas produzidas por `solve_chunk_n`.
+    """
+    rows = [format_row(line, ps, ms, groups, tier, output_format) for line, ps, ms, found in solved for tier, groups in found]
+    return "".join(row + "\n" for row in rows), len(rows)
+
+def format_row(line: int, ps: int, ms: int, groups: int, tier: list[int], output_format: str) -> str:
+    """
+    Formata a linha de saída de uma configuração: número do registro de entrada, ps, ms, grupos usados e os tiers.
+    """
+    if output_format == "csv":
+        return f"{line},{ps},{ms},{groups}," + ",".join(map(str, tier))
+    return f'{{"line": {line}, "ps": {ps}, "ms": {ms}, "groups": {groups}, "tiers": [{", ".join(map(str, tier))}]}}'
+
+def format_solutions(solved: Iterable[tuple[int, int, int, np.ndarray]], output_format: str) -> tuple[str, int]:
+    """
+    Formata uma linha de saída por configuração encontrada, desempacotando as configurações apenas neste momento.
+    Cada linha contém o número do registro de entrada, ps, ms, os grupos usados e os 10 tiers (o cabeçalho CSV
+    é escrito à parte, por `write_solutions`).
+
+    Parâmetros:
+
+    - solved (Iterable[tuple]): as tuplas produzidas por `solve_chunk`
+    - output_format (str): "csv" ou "jsonl"
+
+    Retorna:
+
+    - tuple[str, int]: o texto formatado e o número de configurações contidas nele
+    """
+    rows = []
+    for line, ps, ms, codes in solved:
+        for tier, groups in zip(unpack_tiers(codes).tolist(), count_groups_packed(codes).tolist()):
+            rows.append(format_row(line, ps, ms, groups, tier, output_format))
+    return "".join(row + "\n" for row in rows), len(rows)
+
+def process_chunk(chunk: list[StatLine], output_format: str, max_groups: int | None = None, limit: int | None = None, num_stats: int = DEFAULT_STATS) -> tuple[str, int]:
+    """
+    Resolve e formata um bloco de linhas de atributos (`solve_chunk` seguido de `format_solutions`, ou `solve_chunk_n`
+    para outro número de atributos). É a unidade de trabalho enviada aos processos do pool, de forma que também a
+    formatação da saída é paralelizada.
+    """
+    if num_stats == DEFAULT_STATS:
+        return format_solutions(solve_chunk(chunk, max_groups, limit), output_format)
+    return format_solutions_n(solve_chunk_n(chunk, max_groups, limit), output_format)
+
+def iter_processed(lines: Iterable[StatLine], output_format: str, workers: int = 1, max_groups: int | None = None, limit: int | None = None, num_stats: int = DEFAULT_STATS) -> Iterator[tuple[str, int]]:
+    """
+    Processa as linhas de atributos em blocos de `CHUNK_SIZE`, opcionalmente distribuídos entre processos.
+    No máximo 2*workers blocos ficam pendentes ao mesmo tempo, então a memória usada não depende do tamanho
+    da entrada, e os blocos são devolvidos na ordem de entrada. Com outro número de atributos que não 4, os blocos
+    são lidos em ordem e os processos dividem cada consulta (ver `solve_chunk_n`).
+
+    Parâmetros:
+
+    - lines (Iterable[StatLine]): as linhas de atributos
+    - output_format (str): "csv" ou "jsonl"
+    - workers (int): o número de processos, processando no processo atual caso seja 1
+    - max_groups (int ou None): número máximo de grupos distintos por configuração
+    - limit (int ou None): número máximo de configurações por linha
+    - num_stats (int): o número de atributos de cada linha
+
+    Retorna:
+
+    - Iterator[tuple[str, int]]: gerador de blocos de texto formatado, ver `format_solutions`
+    """
+    lines = iter(lines)
+    chunks = iter(lambda: list(islice(lines, CHUNK_SIZE)), [])
+    if workers <= 1:
+        for chunk in chunks:
+            yield process_chunk(chunk, output_format, max_groups, limit, num_stats)
+        return
+    if num_stats != DEFAULT_STATS:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk in chunks:
+                yield format_solutions_n(solve_chunk_n(chunk, max_groups, limit, executor, workers), output_format)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(process_chunk, chunk, output_format, max_groups, limit, num_stats))
+            if len(pending) >= 2*workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def write_solutions(blocks: Iterable[tuple[str, int]], stream: TextIO, output_format: str, num_stats: int = DEFAULT_STATS) -> int:
+    """
+    Escreve os blocos produzidos por `iter_processed`, precedidos do cabeçalho no caso de CSV.
+
+    Parâmetros:
+
+    - blocks (Iterable[tuple[str, int]]): os blocos de texto formatado
+    - stream (TextIO): o arquivo de saída já aberto
+    - output_format (str): "csv" ou "jsonl"
+    - num_stats (int): o número de atributos, que define as colunas de tiers do cabeçalho (`tier_labels`)
+
+    Retorna:
+
+    - int: o número de configurações escritas
+    """
+    if output_format == "csv":
+        stream.write(",".join(["line", "ps", "ms", "groups"] + tier_labels(num_stats)) + "\n")
+    written = 0
+    for text, count in blocks:
+        stream.write(text)
+        written += count
+    return written
+
+def get_format(path: str, requested: str | None) -> str:
+    """
+    Determina o formato de um arquivo: o formato pedido explicitamente ou, na falta dele, a extensão do arquivo.
+    A entrada e a saída padrão ("-") usam jsonl por padrão.
+    """
+    if requested is not None:
+        return requested
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Constroi o parser de argumentos da linha de comando.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m pages.utils.flame_cli",
+        description="Resolve em lote as configurações de flame para linhas de STR, DEX, INT e LUK (ou de n atributos, com --stats) lidas de CSV ou JSONL.",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="arquivo de entrada (CSV com cabeçalho ou JSONL), '-' para stdin")
+    parser.add_argument("-o", "--output", default="-", help="arquivo de saída, '-' para stdout")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"], help="formato da entrada, deduzido da extensão caso omitido")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], help="formato da saída, deduzido da extensão caso omitido")
+    parser.add_argument("--level", type=int, help="nível padrão para registros sem level ou ps/ms")
+    parser.add_argument("--ps", type=int, help="escala pura padrão (requer --ms)")
+    parser.add_argument("--ms", type=int, help="escala mista padrão (requer --ps)")
+    parser.add_argument("--stats", type=int, default=DEFAULT_STATS, help=f"número de atributos de cada linha (colunas s1 a sn caso diferente de {DEFAULT_STATS}), entre 2 e {MAX_STATS}")
+    parser.add_argument("--max-groups", type=int, help="número máximo de grupos distintos por configuração")
+    parser.add_argument("--limit", type=int, help="número máximo de configurações por linha")
+    parser.add_argument("--workers", type=int, default=1, help="número de processos usados para resolver os blocos (ou cada consulta, com --stats diferente de 4)")
+    return parser
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Ponto de entrada da linha de comando, ver `build_parser`.
+
+    Retorna:
+
+    - int: o código de saída do processo
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if (args.ps is None) != (args.ms is None):
+        parser.error("--ps e --ms devem ser informados juntos")
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit deve ser um inteiro positivo")
+    if not 2 <= args.stats <= MAX_STATS:
+        parser.error(f"--stats deve estar entre 2 e {MAX_STATS}")
+    max_groups = MAX_GROUPS if args.stats == DEFAULT_STATS else args.stats*(args.stats + 1)//2
+    if args.max_groups is not None and not 0 <= args.max_groups <= max_groups:
+        parser.error(f"--max-groups deve estar entre 0 e {max_groups}")
+    if args.workers < 1:
+        parser.error("--workers deve ser um inteiro positivo")
+    if args.level is not None:
+        try:
+            calcular_ps_ms_por_nivel(args.level)
+        except ValueError as error:
+            parser.error(str(error))
+    input_stream = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        output_format = get_format(args.output, args.output_format)
+        lines = read_stat_lines(input_stream, get_format(args.input, args.input_format), args.level, args.ps, args.ms, args.stats)
+        blocks = iter_processed(lines, output_format, args.workers, args.max_groups, args.limit, args.stats)
+        written = write_solutions(blocks, output_stream, output_format, args.stats)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+    print(f"{written} configurações escritas", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+import os
+from collections.abc import Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from fractions import Fraction
+from functools import lru_cache
+from itertools import combinations, islice
+from math import gcd, lcm
+
+from pages.utils.flame_util import MAX_TIER
+from pages.utils.system_util import matrix_width, reduce_structured_matrix
+
+MAX_STATS = 10
+"""Número máximo de atributos aceito pelo solver generalizado (o mesmo limite da página de sistemas)."""
+
+def get_variables(num_stats:int) -> list[tuple[str, tuple[int, ...]]]:
+    """
+    Lista as variáveis do sistema de n atributos na ordem das colunas da matriz auxiliar de `system_util`:
+    primeiro os tiers mistos, na ordem de `itertools.combinations`, depois os tiers puros.
+
+    Parâmetros:
+
+        num_stats (int): Número de atributos do sistema.
+
+    Retorna:
+
+        list[tuple[str, tuple[int, ...]]]: Para cada coluna, o tipo ("mixed" ou "pure") e os atributos (0-indexados) que ela afeta.
+    """
+    return [("mixed", pair) for pair in combinations(range(num_stats), 2)] + [("pure", (i,)) for i in range(num_stats)]
+
+@lru_cache(maxsize=None)
+def _reduced_system(num_stats:int) -> tuple[tuple[int, ...], tuple[tuple[int, int, tuple[int, ...], tuple[int, ...]], ...]]:
+    """
+    Converte a matriz reduzida de `reduce_structured_matrix` em fórmulas inteiras para as variáveis dependentes.
+    As n primeiras colunas são as variáveis dependentes (pivôs) e as demais são livres. Cada linha k da matriz
+    reduzida diz que x_k + sum(R_kj*x_j) = sum(S_ki*s_i), onde x são os valores já escalados (ps*t ou ms*t);
+    multiplicando pelo mmc D_k dos denominadores, D_k*x_k = sum(b_ki*s_i) - sum(a_kj*x_j) com coeficientes inteiros.
+
+    Parâmetros:
+
+        num_stats (int): Número de atributos do sistema.
+
+    Retorna:
+
+        tuple: As colunas livres e, para cada variável dependente, a tupla (coluna, D_k, coeficientes a_kj das
+        colunas livres, coeficientes b_ki dos atributos).
+    """
+    reduced, _ = reduce_structured_matrix(num_stats)
+    num_columns = matrix_width(num_stats) - num_stats
+    free_columns = tuple(range(num_stats, num_columns))
+    dependents = []
+    for k, row in enumerate(reduced):
+        values = [Fraction(row.get(j, 0)) for j in range(num_columns + num_stats)]
+        denominator = lcm(*(value.denominator for value in values))
+        free_coefs = tuple(int(values[j]*denominator) for j in free_columns)
+        stat_coefs = tuple(int(value*denominator) for value in values[num_columns:])
+        dependents.append((k, denominator, free_coefs, stat_coefs))
+    return free_columns, tuple(dependents)
+
+def mixed_degrees_feasible(degrees:list[int]) -> bool:
+    """
+    Verifica se existe uma atribuição de tiers mistos (0 a MAX_TIER em cada par de atributos) em que cada atributo i
+    recebe exatamente degrees[i] tiers mistos no total. Pelo teorema de Chungphaisan (Erdős–Gallai para multigrafos
+    com multiplicidade limitada), isso ocorre se e somente se a soma é par e, com os graus em ordem decrescente,
+    sum(d[:k]) <= MAX_TIER*k*(k-1) + sum(min(d_j, MAX_TIER*k) para j >= k), para todo k.
+
+    Parâmetros:
+
+        degrees (list[int]): Soma de tiers mistos exigida de cada atributo.
+
+    Retorna:
+
+        bool: Se a atribuição existe.
+    """
+    if any(d < 0 for d in degrees) or sum(degrees) % 2:
+        return False
+    degrees = sorted(degrees, reverse=True)
+    prefix = 0
+    for k in range(1, len(degrees) + 1):
+        prefix += degrees[k - 1]
+        if prefix > MAX_TIER*k*(k - 1) + sum(min(d, MAX_TIER*k) for d in degrees[k:]):
+            return False
+    return True
+
+def validate_n_query(stats:list[int], ps:int, ms:int, max_groups:int | None, limit:int | None) -> None:
+    """
+    Valida os parâmetros de uma consulta de n atributos, levantando ValueError conforme descrito em `get_tiers_n`.
+    Também é usada pela linha de comando para rejeitar cada registro antes de resolvê-lo.
+    """
+    if not 2 <= len(stats) <= MAX_STATS:
+        raise ValueError(f"A lista de stats deve conter entre 2 e {MAX_STATS} valores.")
+    if any(not isinstance(s, int) for s in stats):
+        raise ValueError("Os valores dos atributos devem ser inteiros.")
+    if any(s < 0 for s in stats):
+        raise ValueError("Os valores dos atributos devem ser não negativos.")
+    if not isinstance(ps, int) or not isinstance(ms, int):
+        raise ValueError("Os valores de ps e ms devem ser inteiros.")
+    if ps < 0 or ps > 20:
+        raise ValueError("O valor de ps deve estar entre 0 e 20.")
+    if ms < 0 or ms > 20:
+        raise ValueError("O valor de ms deve estar entre 0 e 20.")
+    if ps == 0 and ms == 0:
+        raise ValueError("Os valores de ps e ms não podem ser ambos zero.")
+    num_variables = len(stats)*(len(stats) + 1)//2
+    if max_groups is not None and (not isinstance(max_groups, int) or max_groups < 0 or max_groups > num_variables):
+        raise ValueError(f"O número máximo de grupos deve ser um inteiro entre 0 e {num_variables}.")
+    if limit is not None and (not isinstance(limit, int) or limit < 1):
+        raise ValueError("O limite de resultados deve ser um inteiro positivo.")
+
+def iter_tiers_n(stats:list[int], ps:int, ms:int, max_groups:int | None = None) -> Iterator[tuple[list[int], int]]:
+    """
+    Generalização de `flame_util.iter_tiers` para n atributos, cada um recebendo um grupo puro e um grupo misto
+    com cada um dos outros atributos. As variáveis livres do sistema reduzido (tiers puros primeiro, depois os mistos
+    livres) são enumeradas em profundidade com propagação de limites: após cada atribuição, o restante de cada
+    atributo afetado precisa estar entre 0 e a capacidade das variáveis ainda não atribuídas e ser divisível pelo
+    mdc das suas escalas. As variáveis dependentes são calculadas pelas fórmulas de `_reduced_system` nas folhas.
+    Assim que os tiers puros são fixados, `mixed_degrees_feasible` descarta de uma vez as escolhas cujos restos não
+    podem ser cobertos por tiers mistos; durante a enumeração dos mistos, o restante de cada atributo também é limitado
+    pela soma do que seus vizinhos ainda podem receber.
+    Os parâmetros são validados imediatamente, antes da primeira iteração.
+
+    Parâmetros:
+
+        stats (list[int]): Valores finais de cada atributo.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+
+    Retorna:
+
+        Iterator[tuple[list[int], int]]: Gerador de pares (configuração, grupos usados). A configuração lista os n tiers
+        puros seguidos dos n(n-1)/2 tiers mistos na ordem de `itertools.combinations`, como em `flame_util.get_tiers`.
+
+    Exceções:
+
+        ValueError: Se houver menos de 2 ou mais de MAX_STATS atributos, ou nos mesmos casos de `flame_util.get_tiers`.
+    """
+    validate_n_query(stats, ps, ms, max_groups, None)
+    num_stats = len(stats)
+    max_groups = num_stats*(num_stats + 1)//2 if max_groups is None else max_groups
+    return _iter_tiers_n(tuple(stats), ps, ms, max_groups)
+
+def get_tiers_n(stats:list[int], ps:int, ms:int, max_groups:int | None = None, limit:int | None = None) -> list[list[int]]:
+    """
+    Versão materializada de `iter_tiers_n`, análoga a `flame_util.get_tiers`.
+
+    Parâmetros:
+
+        stats (list[int]): Valores finais de cada atributo.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+        limit (int ou None): Número máximo de configurações retornadas, sem limite caso não informado.
+
+    Retorna:
+
+        list[list[int]]: Lista de configurações, no formato descrito em `iter_tiers_n`.
+
+    Exceções:
+
+        ValueError: Nos mesmos casos de `iter_tiers_n` ou se limit não for um inteiro positivo.
+    """
+    validate_n_query(stats, ps, ms, max_groups, limit)
+    return [tier for tier, _ in islice(iter_tiers_n(stats, ps, ms, max_groups), limit)]
+
+def _search_order(num_stats:int) -> list[int]:
+    """
+    Ordem em que as colunas livres de `_reduced_system` são enumeradas: tiers puros primeiro, depois os mistos livres.
+    """
+    variables = get_variables(num_stats)
+    free_columns, _ = _reduced_system(num_stats)
+    return sorted(free_columns, key=lambda column: variables[column][0] != "pure")
+
+def _iter_tiers_n(stats:tuple[int, ...], ps:int, ms:int, max_groups:int, prefix:tuple[int, ...] = ()) -> Iterator[tuple[list[int], int]]:
+    """
+    Implementação de `iter_tiers_n` para parâmetros já validados.
+    Se `prefix` for informado, as primeiras variáveis de `_search_order` ficam fixas nesses tiers, restringindo a busca
+    a uma partição do espaço (usado por `get_tiers_n_parallel`).
+    """
+    num_stats = len(stats)
+    variables = get_variables(num_stats)
+    free_columns, dependents = _reduced_system(num_stats)
+    scales = [ms if kind == "mixed" else ps for kind, _ in variables]
+    order = _search_order(num_stats)
+    num_free_pure = sum(1 for column in order if variables[column][0] == "pure")
+    all_pure_free = num_free_pure == num_stats
+    # mdc das escalas das variáveis ainda não atribuídas de cada atributo, após atribuir order[:depth]
+    remaining_gcd = []
+    for depth in range(len(order) + 1):
+        unassigned = [column for column in range(len(variables)) if column not in order[:depth]]
+        remaining_gcd.append([gcd(*(scales[c] for c in unassigned if i in variables[c][1])) for i in range(num_stats)])
+    edges = [[(column, sum(touched) - i) for column, (kind, touched) in enumerate(variables) if kind == "mixed" and i in touched] for i in range(num_stats)]
+    residual = list(stats)
+    capacity = [MAX_TIER*(ps + ms*(num_stats - 1))]*num_stats
+    assigned = [False]*len(variables)
+    values = [0]*len(variables)
+
+    def feasible(touched:tuple[int, ...], depth:int, used:int) -> bool:
+        for i in touched:
+            g = remaining_gcd[depth][i]
+            if residual[i] < 0 or residual[i] > capacity[i] or (residual[i] % g if g else residual[i]):
+                return False
+        if not all_pure_free or depth < num_free_pure:
+            return True
+        if ms == 0:
+            return not any(residual)
+        degrees = [r // ms for r in residual]
+        if depth == num_free_pure and not mixed_degrees_feasible(degrees):
+            return False
+        if depth > num_free_pure:
+            for i in touched:
+                reachable = sum(min(MAX_TIER, degrees[j]) for column, j in edges[i] if not assigned[column])
+                if degrees[i] > reachable:
+                    return False
+        # cada grupo misto cobre no máximo MAX_TIER de cada um dos seus dois atributos
+        needed = max(-(-sum(degrees) // (2*MAX_TIER)), max(-(-d // MAX_TIER) for d in degrees))
+        return used + needed <= max_groups
+
+    def search(depth:int, used:int) -> Iterator[tuple[list[int], int]]:
+        if depth == len(order):
+            yield from leaf(used)
+            return
+        column = order[depth]
+        scale, touched = scales[column], variables[column][1]
+        assigned[column] = True
+        for t in (prefix[depth],) if depth < len(prefix) else range(MAX_TIER + 1 if scale else 1):
+            if used + (t > 0) > max_groups:
+                break
+            for i in touched:
+                residual[i] -= scale*t
+                capacity[i] -= scale*MAX_TIER
+            values[column] = t
+            if feasible(touched, depth + 1, used + (t > 0)):
+                yield from search(depth + 1, used + (t > 0))
+            for i in touched:
+                residual[i] += scale*t
+                capacity[i] += scale*MAX_TIER
+        assigned[column] = False
+        values[column] = 0
+
+    def leaf(used:int) -> Iterator[tuple[list[int], int]]:
+        for column, denominator, free_coefs, stat_coefs in dependents:
+            total = sum(b*s for b, s in zip(stat_coefs, stats)) - sum(a*scales[j]*values[j] for a, j in zip(free_coefs, free_columns))
+            if total % denominator:
+                return
+            scaled, scale = total // denominator, scales[column]
+            if scale == 0:
+                if scaled != 0:
+                    return
+                values[column] = 0
+                continue
+            if scaled < 0 or scaled % scale or scaled // scale > MAX_TIER:
+                return
+            values[column] = scaled // scale
+            used += values[column] > 0
+        if used > max_groups:
+            return
+        num_mixed = num_stats*(num_stats - 1)//2
+        yield values[num_mixed:] + values[:num_mixed], used
+
+    if feasible(tuple(range(num_stats)), 0, 0):
+        yield from search(0, 0)
+
+def _solve_partition(stats:tuple[int, ...], ps:int, ms:int, max_groups:int, prefix:tuple[int, ...]) -> list[list[int]]:
+    """
+    Resolve uma partição da busca (ver `_iter_tiers_n`); é a unidade de trabalho enviada aos processos.
+    """
+    return [tier for tier, _ in _iter_tiers_n(stats, ps, ms, max_groups, prefix)]
+
+def get_partitions(num_stats:int, ps:int, ms:int, min_partitions:int) -> list[tuple[int, ...]]:
+    """
+    Divide o espaço de busca de `iter_tiers_n` fixando os tiers das primeiras variáveis de `_search_order`
+    (começando pelo tier puro do primeiro atributo), com o menor número de variáveis fixas que produza ao menos
+    `min_partitions` partições. As partições são devolvidas na ordem em que a busca sequencial as percorre.
+
+    Parâmetros:
+
+        num_stats (int): Número de atributos do sistema.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        min_partitions (int): Número mínimo de partições desejado.
+
+    Retorna:
+
+        list[tuple[int, ...]]: Os prefixos de tiers que definem cada partição.
+    """
+    variables = get_variables(num_stats)
+    prefixes = [()]
+    for column in _search_order(num_stats):
+        if len(prefixes) >= min_partitions:
+            break
+        scale = ms if variables[column][0] == "mixed" else ps
+        prefixes = [prefix + (t,) for prefix in prefixes for t in range(MAX_TIER + 1 if scale else 1)]
+    return prefixes
+
+def get_tiers_n_parallel(stats:list[int], ps:int, ms:int, max_groups:int | None = None, limit:int | None = None, workers:int | None = None, executor:Executor | None = None) -> list[list[int]]:
+    """
+    Versão paralela de `get_tiers_n`: o espaço de busca é dividido por `get_partitions` em ao menos 4 partições por
+    processo, resolvidas independentemente num pool de processos. Como as partições são prefixos da enumeração
+    sequencial, concatená-las na ordem devolve exatamente o mesmo resultado, na mesma ordem, de `get_tiers_n`.
+    Com `limit`, as partições seguintes são canceladas assim que as anteriores já somam configurações suficientes.
+
+    Parâmetros:
+
+        stats (list[int]): Valores finais de cada atributo.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+        limit (int ou None): Número máximo de configurações retornadas, sem limite caso não informado.
+        workers (int ou None): Número de processos, `os.cpu_count()` caso não informado.
+        executor (Executor ou None): Pool já aberto onde as partições são resolvidas, reaproveitado entre consultas;
+            um pool com `workers` processos é criado (e fechado ao final) caso não informado.
+
+    Retorna:
+
+        list[list[int]]: Lista de configurações, no formato descrito em `iter_tiers_n`.
+
+    Exceções:
+
+        ValueError: Nos mesmos casos de `get_tiers_n`.
+    """
+    validate_n_query(stats, ps, ms, max_groups, limit)
+    num_stats = len(stats)
+    max_groups = num_stats*(num_stats + 1)//2 if max_groups is None else max_groups
+    workers = workers or os.cpu_count() or 1
+    partitions = get_partitions(num_stats, ps, ms, 4*workers)
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return _solve_partitions(executor, tuple(stats), ps, ms, max_groups, limit, partitions)
+    return _solve_partitions(executor, tuple(stats), ps, ms, max_groups, limit, partitions)
+
+def _solve_partitions(executor:Executor, stats:tuple[int, ...], ps:int, ms:int, max_groups:int, limit:int | None, partitions:list[tuple[int, ...]]) -> list[list[int]]:
+    """
+    Envia as partições ao pool e concatena os resultados na ordem das partições, cancelando as pendentes assim que
+    `limit` configurações forem reunidas (ver `get_tiers_n_parallel`).
+    """
+    tiers = []
+    futures = [executor.submit(_solve_partition, stats, ps, ms, max_groups, prefix) for prefix in partitions]
+    for future in futures:
+        tiers.extend(future.result())
+        if limit is not None and len(tiers) >= limit:
+            for pending in futures:
+                pending.cancel()
+            break
+    return tiers[:limit]
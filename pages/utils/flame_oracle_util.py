@@ -0,0 +1,401 @@
+import argparse, os, sys
+from collections.abc import Callable, Iterable, Iterator
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+
+from pages.utils.flame_nstat_util import get_tiers_n
+from pages.utils.flame_util import (
+    MAX_GROUPS, MAX_TIER, MIXED_PAIRS, RANGE_ORDERS, calcular_ps_ms_por_nivel, count_groups_used, count_stat_vectors, decode_stats,
+    get_tier_stats, get_tiers, get_tiers_batch, get_tiers_in_range, get_tiers_packed, level_scales, stats_base, unpack_tiers,
+)
+
+ORACLE_CHUNK_SIZE = 1 << 22
+"""Quantidade de configurações (combinação mista × combinação pura) processadas por vez na enumeração completa."""
+
+ORACLE_CACHE_SIZE = 4096
+"""Número de consultas de `oracle_tiers` mantidas em cache, para que vários solvers sejam comparados com o mesmo gabarito."""
+
+RANGE_REGRESSIONS = [
+    ({1: (27, 87), 2: (94, 109), 3: (50, 110), 4: (21, 49)}, 12, 7, 20, "total", 3),
+    ({1: (100, None), 2: (40, None), 3: (0, None), 4: (0, None)}, 12, 7, 20, "total", 4),
+    ({1: (0, None), 2: (0, None), 3: (0, None), 4: (0, None)}, 5, 3, 20, "total", 1),
+]
+"""
+Consultas por intervalo que já divergiram do oráculo (limite otimista de "total" com max_groups), verificadas sempre
+que --range-samples é informado, como tuplas (bounds, ps, ms, k, order, max_groups).
+"""
+
+Solver = Callable[[tuple[int, int, int, int], int, int, int | None], Iterable[Iterable[int]]]
+"""
+tipo customizado para anotar um solver comparável ao oráculo: (stats, ps, ms, max_groups) -> configurações de 10 tiers
+"""
+
+Mismatch = tuple[tuple[int, int, int, int], int, int, int | None, list[tuple[int, ...]], list[tuple[int, ...]]]
+"""
+tipo customizado para anotar uma divergência: (stats, ps, ms, max_groups, configurações ausentes, configurações extras)
+"""
+
+@lru_cache(maxsize=None)
+def _mixed_space() -> tuple[np.ndarray, np.ndarray]:
+    tiers = np.array(list(product(range(MAX_TIER + 1), repeat=len(MIXED_PAIRS))), dtype=np.int16)
+    sums = np.zeros((len(tiers), 4), dtype=np.int16)
+    for column, (i, j) in enumerate(MIXED_PAIRS):
+        sums[:, i] += tiers[:, column]
+        sums[:, j] += tiers[:, column]
+    return tiers, sums
+
+@lru_cache(maxsize=None)
+def _pure_space() -> np.ndarray:
+    return np.array(list(product(range(MAX_TIER + 1), repeat=4)), dtype=np.int64)
+
+def oracle_tiers(stats:tuple[int, int, int, int], ps:int, ms:int, max_groups:int | None = None) -> list[tuple[int, ...]]:
+    """
+    Solver de referência: percorre, de forma vetorizada, todas as 8^6 combinações de tiers mistos e deduz diretamente
+    os tiers puros que completam cada atributo, sem nenhuma das reduções usadas pelos solvers rápidos
+    (índices invertidos, poda por grupos, lotes vetorizados). Serve de gabarito para `compare_solver`.
+
+    Parâmetros:
+
+        stats (tuple[int, int, int, int]): Valores finais de STR, DEX, INT e LUK.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+
+    Retorna:
+
+        list[tuple[int, ...]]: Todas as configurações de 10 tiers, em ordem lexicográfica.
+    """
+    return list(_oracle_tiers(tuple(stats), ps, ms, max_groups))
+
+@lru_cache(maxsize=ORACLE_CACHE_SIZE)
+def _oracle_tiers(stats:tuple[int, int, int, int], ps:int, ms:int, max_groups:int | None) -> tuple[tuple[int, ...], ...]:
+    tiers, sums = _mixed_space()
+    residual = np.asarray(stats, dtype=np.int64) - ms*sums.astype(np.int64)
+    if ps:
+        valid = ((residual >= 0) & (residual <= MAX_TIER*ps) & (residual % ps == 0)).all(axis=1)
+        pure = residual[valid] // ps
+    else:
+        valid = (residual == 0).all(axis=1)
+        pure = np.zeros((int(valid.sum()), 4), dtype=np.int64)
+    found = np.hstack([pure, tiers[valid]])
+    if max_groups is not None:
+        found = found[(found > 0).sum(axis=1) <= max_groups]
+    return tuple(sorted(map(tuple, found.tolist())))
+
+def table_path(directory:str, ps:int, ms:int) -> str:
+    """
+    Retorna o caminho do arquivo da tabela de `count_stat_vectors` para o par (ps, ms).
+    """
+    return os.path.join(directory, f"oracle_ps{ps}_ms{ms}.npz")
+
+def build_oracle_tables(directory:str, scales:Iterable[tuple[int, int]] | None = None, chunk_size:int = ORACLE_CHUNK_SIZE) -> list[str]:
+    """
+    Calcula e grava as tabelas de `count_stat_vectors` de cada par (ps, ms), por padrão todos os de `level_scales`.
+
+    Parâmetros:
+
+        directory (str): Diretório onde as tabelas são gravadas.
+        scales (Iterable[tuple[int, int]] ou None): Pares (ps, ms) calculados.
+        chunk_size (int): Número de linhas processadas por bloco.
+
+    Retorna:
+
+        list[str]: Os caminhos dos arquivos gravados.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for ps, ms in level_scales() if scales is None else scales:
+        keys, counts = count_stat_vectors(ps, ms, chunk_size)
+        path = table_path(directory, ps, ms)
+        np.savez_compressed(path, keys=keys, counts=counts)
+        paths.append(path)
+    return paths
+
+def load_oracle_table(directory:str, ps:int, ms:int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Carrega uma tabela gravada por `build_oracle_tables`, calculando-a com `count_stat_vectors` caso o arquivo não exista.
+    """
+    path = table_path(directory, ps, ms)
+    if not os.path.exists(path):
+        return count_stat_vectors(ps, ms)
+    with np.load(path) as table:
+        return table["keys"], table["counts"]
+
+def _solve_get_tiers(stats:tuple[int, int, int, int], ps:int, ms:int, max_groups:int | None) -> list[list[int]]:
+    return get_tiers(dict(enumerate(stats, 1)), ps, ms, max_groups)
+
+def _solve_packed(stats:tuple[int, int, int, int], ps:int, ms:int, max_groups:int | None) -> list[list[int]]:
+    return unpack_tiers(get_tiers_packed(dict(enumerate(stats, 1)), ps, ms, max_groups)).tolist()
+
+def _solve_batch(stats:tuple[int, int, int, int], ps:int, ms:int, max_groups:int | None) -> list[list[int]]:
+    codes, _ = get_tiers_batch(np.array([stats]), ps, ms, max_groups=max_groups)
+    return unpack_tiers(codes).tolist()
+
+def _solve_n(stats:tuple[int, int, int, int], ps:int, ms:int, max_groups:int | None) -> list[list[int]]:
+    return get_tiers_n(list(stats), ps, ms, max_groups)
+
+SOLVERS: dict[str, Solver] = {
+    "get_tiers": _solve_get_tiers,
+    "get_tiers_packed": _solve_packed,
+    "get_tiers_batch": _solve_batch,
+    "get_tiers_n": _solve_n,
+}
+"""Solvers rápidos verificados por `compare_solver`, indexados pelo nome usado na linha de comando."""
+
+def compare_solver(solver:Solver, stats_list:Iterable[tuple[int, int, int, int]], ps:int, ms:int, max_groups:int | None = None) -> Iterator[Mismatch]:
+    """
+    Compara, como conjuntos, as configurações devolvidas por `solver` com as de `oracle_tiers` para cada vetor de
+    atributos, produzindo apenas as divergências. Configurações repetidas pelo solver também contam como extras.
+
+    Parâmetros:
+
+        solver (Solver): O solver verificado, por exemplo um dos valores de `SOLVERS`.
+        stats_list (Iterable[tuple[int, int, int, int]]): Vetores de atributos consultados.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+
+    Retorna:
+
+        Iterator[Mismatch]: Gerador de divergências (stats, ps, ms, max_groups, ausentes, extras).
+    """
+    for stats in stats_list:
+        stats = tuple(int(value) for value in stats)
+        expected = oracle_tiers(stats, ps, ms, max_groups)
+        found = sorted(tuple(tier) for tier in solver(stats, ps, ms, max_groups))
+        if found != expected:
+            expected_set, found_set = set(expected), set(found)
+            extra = sorted(found_set - expected_set) + [tier for tier in found_set if found.count(tier) > 1]
+            yield stats, ps, ms, max_groups, sorted(expected_set - found_set), extra
+
+@lru_cache(maxsize=None)
+def _mixed_group_classes() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    tiers, sums = _mixed_space()
+    rows = np.hstack([sums, (tiers > 0).sum(axis=1, dtype=np.int16)[:, None]])
+    classes, multiplicity = np.unique(rows, axis=0, return_counts=True)
+    return classes[:, :4].astype(np.int64), classes[:, 4].astype(np.int64), multiplicity
+
+def oracle_range_scores(bounds:dict[int, tuple[int, int | None]], ps:int, ms:int, k:int, order:str = "groups", max_groups:int | None = None, chunk_size:int = ORACLE_CHUNK_SIZE) -> list[tuple[int, int]]:
+    """
+    Referência para `get_tiers_in_range`: percorre todas as configurações (combinações mistas agrupadas pela soma por
+    atributo e pelo número de grupos, vezes todas as 8^4 combinações puras), filtra as que ficam dentro dos limites
+    e devolve os k melhores pares (grupos, soma dos atributos) na ordem pedida, com as repetições.
+
+    Parâmetros:
+
+        bounds (dict): Dicionário indexado de 1 a 4 com pares (mínimo, máximo); máximo None indica sem limite.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        k (int): Número de pares devolvidos.
+        order (str): Critério de ordenação, um de `RANGE_ORDERS`.
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+        chunk_size (int): Número de linhas processadas por bloco.
+
+    Retorna:
+
+        list[tuple[int, int]]: Até k pares (grupos, soma dos atributos), do melhor para o pior.
+    """
+    sums, mixed_groups, multiplicity = _mixed_group_classes()
+    pure = _pure_space()
+    low = np.array([bounds[i][0] for i in range(1, 5)], dtype=np.int64)
+    high = np.array([stats_base(ps, ms) if bounds[i][1] is None else bounds[i][1] for i in range(1, 5)], dtype=np.int64)
+    reachable = ((ms*sums <= high) & (ms*sums + MAX_TIER*ps >= low)).all(axis=1)
+    sums, mixed_groups, multiplicity = sums[reachable], mixed_groups[reachable], multiplicity[reachable]
+    total_base = 4*stats_base(ps, ms)
+    pure_groups = (pure > 0).sum(axis=1)
+    step = max(1, chunk_size // len(pure))
+    counts = np.zeros((MAX_GROUPS + 1)*total_base, dtype=np.int64)
+    for start in range(0, len(sums), step):
+        stats = (ms*sums[start:start + step])[:, None, :] + (ps*pure)[None, :, :]
+        groups = mixed_groups[start:start + step, None] + pure_groups[None, :]
+        valid = ((stats >= low) & (stats <= high)).all(axis=2)
+        if max_groups is not None:
+            valid &= groups <= max_groups
+        class_ids, _ = np.nonzero(valid)
+        pairs = groups[valid]*total_base + stats.sum(axis=2)[valid]
+        counts += np.bincount(pairs, weights=multiplicity[start + class_ids], minlength=len(counts)).astype(np.int64)
+    scores = {divmod(pair, total_base): int(counts[pair]) for pair in np.flatnonzero(counts).tolist()}
+    ranked = sorted(scores, key=(lambda pair: (pair[0], -pair[1])) if order == "groups" else (lambda pair: (-pair[1], pair[0])))
+    best = []
+    for pair in ranked:
+        best.extend([pair]*min(scores[pair], k - len(best)))
+        if len(best) == k:
+            break
+    return best
+
+def compare_range_query(bounds:dict[int, tuple[int, int | None]], ps:int, ms:int, k:int, order:str = "groups", max_groups:int | None = None) -> list[str]:
+    """
+    Compara `get_tiers_in_range` com `oracle_range_scores`: as configurações devolvidas devem ser distintas, ficar dentro
+    dos limites, informar corretamente os grupos usados e ter exatamente os k melhores pares (grupos, soma) do oráculo.
+
+    Parâmetros:
+
+        bounds (dict): Dicionário indexado de 1 a 4 com pares (mínimo, máximo); máximo None indica sem limite.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        k (int): Número de configurações pedidas.
+        order (str): Critério de ordenação, um de `RANGE_ORDERS`.
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+
+    Retorna:
+
+        list[str]: Os problemas encontrados, vazia se a consulta estiver correta.
+    """
+    found = get_tiers_in_range(bounds, ps, ms, k, order, max_groups)
+    problems = []
+    if len({tuple(tier) for tier, _ in found}) != len(found):
+        problems.append("configurações repetidas")
+    for tier, groups in found:
+        stats = get_tier_stats(tier, ps, ms)
+        if any(stats[i - 1] < bounds[i][0] or (bounds[i][1] is not None and stats[i - 1] > bounds[i][1]) for i in range(1, 5)):
+            problems.append(f"{tier} fora dos limites")
+        if groups != count_groups_used(tier) or (max_groups is not None and groups > max_groups):
+            problems.append(f"{tier} com grupos incorretos")
+    expected = oracle_range_scores(bounds, ps, ms, k, order, max_groups)
+    scores = [(groups, sum(get_tier_stats(tier, ps, ms))) for tier, groups in found]
+    if scores != expected:
+        problems.append(f"pares (grupos, soma) {scores} diferentes do oráculo {expected}")
+    return problems
+
+def sample_bounds(ps:int, ms:int, size:int, rng:np.random.Generator) -> list[dict[int, tuple[int, int | None]]]:
+    """
+    Sorteia limites para `compare_range_query`: mínimos uniformes até metade do valor máximo de um atributo e,
+    para metade dos atributos, um máximo uniforme acima do mínimo (os demais ficam sem limite).
+
+    Parâmetros:
+
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        size (int): Número de consultas sorteadas.
+        rng (np.random.Generator): Gerador de números aleatórios.
+
+    Retorna:
+
+        list[dict]: Os limites de cada consulta, no formato de `get_tiers_in_range`.
+    """
+    upper = stats_base(ps, ms) - 1
+    bounds_list = []
+    for _ in range(size):
+        bounds = {}
+        for i in range(1, 5):
+            low = int(rng.integers(0, upper//2 + 1))
+            bounds[i] = (low, int(rng.integers(low, upper + 1)) if rng.random() < 0.5 else None)
+        bounds_list.append(bounds)
+    return bounds_list
+
+def sample_stats(ps:int, ms:int, size:int, rng:np.random.Generator, table:tuple[np.ndarray, np.ndarray] | None = None) -> np.ndarray:
+    """
+    Sorteia vetores de atributos para `compare_solver`: metade alcançáveis, tirados da tabela de `count_stat_vectors`
+    (ou de configurações aleatórias, na falta dela) e permutados ao acaso, e metade uniformes entre 0 e o valor
+    máximo de um atributo, em sua maioria inalcançáveis, para verificar que o solver não inventa configurações.
+
+    Parâmetros:
+
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        size (int): Número de vetores sorteados.
+        rng (np.random.Generator): Gerador de números aleatórios.
+        table (tuple[np.ndarray, np.ndarray] ou None): Tabela de `count_stat_vectors` para (ps, ms).
+
+    Retorna:
+
+        np.ndarray: Matriz (size, 4) de vetores de atributos.
+    """
+    reachable = size // 2
+    if table is not None:
+        stats = decode_stats(rng.choice(table[0], reachable), ps, ms)
+        stats = np.take_along_axis(stats, rng.permuted(np.tile(np.arange(4), (reachable, 1)), axis=1), axis=1)
+    else:
+        tiers = rng.integers(0, MAX_TIER + 1, (reachable, 10))
+        stats = ps*tiers[:, :4]
+        for column, (i, j) in enumerate(MIXED_PAIRS, 4):
+            stats[:, i] += ms*tiers[:, column]
+            stats[:, j] += ms*tiers[:, column]
+    uniform = rng.integers(0, stats_base(ps, ms), (size - reachable, 4))
+    return np.vstack([stats, uniform])
+
+def exhaustive_stats(upper:int) -> np.ndarray:
+    """
+    Retorna todos os vetores de atributos com valores entre 0 e `upper`, inclusive, para `compare_solver`.
+    """
+    return np.array(list(product(range(upper + 1), repeat=4)), dtype=np.int64)
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Constroi o parser de argumentos da linha de comando.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m pages.utils.flame_oracle_util",
+        description="Compara os solvers de flame com o solver de referência, ou grava as tabelas do oráculo.",
+    )
+    parser.add_argument("--solver", choices=list(SOLVERS), action="append", help="solver verificado, todos caso omitido")
+    parser.add_argument("--level", type=int, action="append", help="nível cujo par (ps, ms) é verificado, todos caso omitido")
+    parser.add_argument("--samples", type=int, default=200, help="vetores sorteados por par (ps, ms)")
+    parser.add_argument("--grid", type=int, help="verifica também todos os vetores com atributos entre 0 e GRID")
+    parser.add_argument("--max-groups", type=int, help="número máximo de grupos distintos por configuração")
+    parser.add_argument("--seed", type=int, default=0, help="semente do sorteio")
+    parser.add_argument("--tables", help="diretório das tabelas do oráculo, usadas para sortear vetores alcançáveis")
+    parser.add_argument("--build-tables", action="store_true", help="grava as tabelas em --tables e termina")
+    parser.add_argument("--range-samples", type=int, default=0, help="consultas por intervalo sorteadas por par (ps, ms), em cada ordenação (ativa também as consultas de RANGE_REGRESSIONS)")
+    parser.add_argument("--range-k", type=int, default=20, help="número de configurações pedidas em cada consulta por intervalo")
+    return parser
+
+def main(argv:list[str] | None = None) -> int:
+    """
+    Ponto de entrada da linha de comando, ver `build_parser`.
+
+    Retorna:
+
+        int: 0 se nenhuma divergência for encontrada, 1 caso contrário.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.max_groups is not None and not 0 <= args.max_groups <= MAX_GROUPS:
+        parser.error(f"--max-groups deve estar entre 0 e {MAX_GROUPS}")
+    try:
+        scales = level_scales() if args.level is None else sorted({calcular_ps_ms_por_nivel(level) for level in args.level})
+    except ValueError as error:
+        parser.error(str(error))
+    if args.build_tables:
+        if args.tables is None:
+            parser.error("--build-tables requer --tables")
+        for path in build_oracle_tables(args.tables, scales):
+            print(path, file=sys.stderr)
+        return 0
+    rng = np.random.default_rng(args.seed)
+    failures = 0
+    if args.range_samples:
+        regression_failures = 0
+        for bounds, ps, ms, k, order, max_groups in RANGE_REGRESSIONS:
+            problems = compare_range_query(bounds, ps, ms, k, order, max_groups)
+            for problem in problems[:5]:
+                print(f"get_tiers_in_range ps={ps} ms={ms} order={order} bounds={bounds} max_groups={max_groups}: {problem}", file=sys.stderr)
+            regression_failures += bool(problems)
+        print(f"get_tiers_in_range regressões: {len(RANGE_REGRESSIONS)} consultas, {regression_failures} divergências")
+        failures += regression_failures
+    for ps, ms in scales:
+        table = load_oracle_table(args.tables, ps, ms) if args.tables else None
+        stats_list = sample_stats(ps, ms, args.samples, rng, table)
+        if args.grid is not None:
+            stats_list = np.vstack([stats_list, exhaustive_stats(args.grid)])
+        for name in args.solver or SOLVERS:
+            mismatches = list(compare_solver(SOLVERS[name], stats_list, ps, ms, args.max_groups))
+            for stats, _, _, _, missing, extra in mismatches[:5]:
+                print(f"{name} ps={ps} ms={ms} stats={list(stats)}: {len(missing)} ausentes, {len(extra)} extras", file=sys.stderr)
+            print(f"{name} ps={ps} ms={ms}: {len(stats_list)} vetores, {len(mismatches)} divergências")
+            failures += len(mismatches)
+        for order in RANGE_ORDERS if args.range_samples else ():
+            range_failures = 0
+            for bounds in sample_bounds(ps, ms, args.range_samples, rng):
+                problems = compare_range_query(bounds, ps, ms, args.range_k, order, args.max_groups)
+                for problem in problems[:5]:
+                    print(f"get_tiers_in_range ps={ps} ms={ms} order={order} bounds={bounds}: {problem}", file=sys.stderr)
+                range_failures += bool(problems)
+            print(f"get_tiers_in_range ps={ps} ms={ms} order={order}: {args.range_samples} consultas, {range_failures} divergências")
+            failures += range_failures
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import combinations
+from math import sqrt
+
+import numpy as np
+
+from pages.utils.flame_util import MAX_TIER, MIXED_PAIRS, validate_query
+
+FLAME_TYPES = {
+    "Powerful Rebirth Flame": {3: 0.20, 4: 0.30, 5: 0.36, 6: 0.14},
+    "Eternal Rebirth Flame": {4: 0.29, 5: 0.45, 6: 0.25, 7: 0.01},
+    "Uniforme": {tier: 1/MAX_TIER for tier in range(1, MAX_TIER + 1)},
+}
+"""Distribuição do tier de cada linha sorteada, por tipo de flame (valores de itens de chefe)."""
+
+LINE_POOL_SIZE = 19
+"""
+Quantidade de tipos de linha que uma flame pode sortear: os 10 grupos de atributos primários, na ordem de
+`TIER_LABELS`, seguidos de 9 linhas que não alteram STR, DEX, INT e LUK (HP, MP, ataque, defesa, etc.).
+"""
+
+DEFAULT_LINES = 4
+"""Número de linhas distintas sorteadas por flame (itens de chefe sempre recebem 4 linhas)."""
+
+SIM_BATCH_SIZE = 1 << 20
+"""Quantidade de flames sorteadas por vez pelo simulador."""
+
+HIT_TABLE_MAX_SIZE = 1 << 24
+"""
+Tamanho máximo (subconjuntos de linhas × combinações de tiers) da tabela de acertos de `simulate_hits`;
+acima dele as flames são sorteadas linha a linha com `sample_flames`.
+"""
+
+CONFIDENCE_Z = 1.959963984540054
+"""Quantil da normal padrão usado nos intervalos de confiança de 95% de `estimate_probability`."""
+
+@lru_cache(maxsize=None)
+def _line_contributions(ps:int, ms:int, pool_size:int) -> np.ndarray:
+    contributions = np.zeros((pool_size, 4), dtype=np.int32)
+    for i in range(4):
+        contributions[i, i] = ps
+    for line, (i, j) in enumerate(MIXED_PAIRS, 4):
+        contributions[line, [i, j]] = ms
+    return contributions
+
+@lru_cache(maxsize=None)
+def _line_sets(pool_size:int, lines:int) -> np.ndarray:
+    return np.array(list(combinations(range(pool_size), lines)), dtype=np.int8)
+
+def _alias_table(probs:np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Monta as tabelas do método de alias de Walker, que sorteia uma distribuição discreta com um único número
+    aleatório e duas consultas por amostra, independentemente do número de categorias.
+    """
+    size = len(probs)
+    scaled = np.asarray(probs, dtype=np.float64)*size/np.sum(probs)
+    threshold = np.ones(size)
+    alias = np.arange(size)
+    small = [i for i in range(size) if scaled[i] < 1]
+    large = [i for i in range(size) if scaled[i] >= 1]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        threshold[less], alias[less] = scaled[less], more
+        scaled[more] -= 1 - scaled[less]
+        (small if scaled[more] < 1 else large).append(more)
+    return threshold, alias
+
+def _sample_alias(threshold:np.ndarray, alias:np.ndarray, size:int, rng:np.random.Generator) -> np.ndarray:
+    scaled = rng.random(size)*len(threshold)
+    index = scaled.astype(np.int64)
+    return np.where(scaled - index < threshold[index], index, alias[index])
+
+@lru_cache(maxsize=32)
+def _hit_table(bounds:tuple[tuple[int, int | None], ...], ps:int, ms:int, tier_items:tuple[tuple[int, float], ...], lines:int, pool_size:int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pré-calcula, para cada subconjunto de linhas e cada combinação de tiers dessas linhas, se a flame resultante fica
+    dentro dos limites, junto das tabelas de alias da distribuição das combinações de tiers.
+
+    Retorna:
+
+        tuple: Vetor booleano de acertos indexado por subconjunto*combinações + combinação, e as tabelas de `_alias_table`.
+    """
+    tiers = np.array([tier for tier, _ in tier_items], dtype=np.int32)
+    probs = np.array([p for _, p in tier_items])
+    combos = np.stack(np.meshgrid(*[np.arange(len(tiers))]*lines, indexing="ij"), axis=-1).reshape(-1, lines)
+    line_sets = _line_sets(pool_size, lines)
+    contributions = _line_contributions(ps, ms, pool_size)
+    low = np.array([low for low, _ in bounds])
+    high = np.array([np.iinfo(np.int32).max if high is None else high for _, high in bounds])
+    step = max(1, SIM_BATCH_SIZE // len(combos))
+    hits = []
+    for start in range(0, len(line_sets), step):
+        chosen = contributions[line_sets[start:start + step]]
+        stats = np.einsum("cl,slk->sck", tiers[combos], chosen)
+        hits.append(((stats >= low) & (stats <= high)).all(axis=2).reshape(-1))
+    return np.concatenate(hits), *_alias_table(probs[combos].prod(axis=1))
+
+def _validate_simulation(bounds:dict[int, tuple[int, int | None]], ps:int, ms:int, tier_probs:dict[int, float], lines:int, pool_size:int) -> None:
+    """
+    Valida os parâmetros de uma simulação, levantando ValueError conforme descrito em `simulate_hits`.
+    """
+    if len(bounds) != 4 or any(len(bounds[i]) != 2 for i in range(1, 5)):
+        raise ValueError("O dicionário de limites deve conter exatamente 4 pares (mínimo, máximo).")
+    validate_query({i: bounds[i][0] for i in range(1, 5)}, ps, ms, None, None)
+    if any(bounds[i][1] is not None and bounds[i][1] < bounds[i][0] for i in range(1, 5)):
+        raise ValueError("O valor máximo de cada atributo deve ser maior ou igual ao mínimo.")
+    if pool_size < 10:
+        raise ValueError("O conjunto de linhas deve conter ao menos os 10 grupos de atributos primários.")
+    if not 1 <= lines <= pool_size:
+        raise ValueError(f"O número de linhas deve estar entre 1 e {pool_size}.")
+    if not tier_probs or any(not 1 <= tier <= MAX_TIER for tier in tier_probs):
+        raise ValueError(f"Os tiers sorteados devem estar entre 1 e {MAX_TIER}.")
+    if any(p < 0 for p in tier_probs.values()) or abs(sum(tier_probs.values()) - 1) > 1e-9:
+        raise ValueError("As probabilidades dos tiers devem ser não negativas e somar 1.")
+
+def sample_flames(size:int, ps:int, ms:int, tier_probs:dict[int, float], rng:np.random.Generator, lines:int = DEFAULT_LINES, pool_size:int = LINE_POOL_SIZE) -> np.ndarray:
+    """
+    Sorteia `size` flames e devolve os valores de STR, DEX, INT e LUK recebidos por cada uma.
+    Cada flame escolhe `lines` tipos de linha distintos, de forma uniforme entre os `pool_size` tipos (sorteando
+    diretamente o índice de um dos subconjuntos possíveis), e um tier para cada linha segundo `tier_probs`.
+    Os tipos de linha 0 a 9 seguem o modelo de `flame_util`: tier*ps no atributo puro, tier*ms em cada atributo misto.
+
+    Parâmetros:
+
+        size (int): Número de flames sorteadas.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        tier_probs (dict[int, float]): Probabilidade de cada tier, por exemplo um dos valores de `FLAME_TYPES`.
+        rng (np.random.Generator): Gerador de números aleatórios.
+        lines (int): Número de linhas distintas por flame.
+        pool_size (int): Número de tipos de linha possíveis.
+
+    Retorna:
+
+        np.ndarray: Matriz (size, 4) com os atributos recebidos.
+    """
+    line_sets = _line_sets(pool_size, lines)
+    chosen = line_sets[rng.integers(0, len(line_sets), size)]
+    tiers = rng.choice(np.array(list(tier_probs), dtype=np.int32), size=(size, lines), p=list(tier_probs.values()))
+    return np.einsum("nl,nls->ns", tiers, _line_contributions(ps, ms, pool_size)[chosen])
+
+def simulate_hits(bounds:dict[int, tuple[int, int | None]], ps:int, ms:int, tier_probs:dict[int, float], samples:int, seed:int | np.random.SeedSequence | None = None, lines:int = DEFAULT_LINES, pool_size:int = LINE_POOL_SIZE) -> int:
+    """
+    Sorteia `samples` flames em blocos de `SIM_BATCH_SIZE` e conta quantas ficam dentro dos limites de cada atributo.
+    Quando cabe em `HIT_TABLE_MAX_SIZE`, o resultado de cada flame possível (subconjunto de linhas e tiers de cada
+    linha) é pré-calculado uma única vez, e cada amostra custa apenas o sorteio de dois índices e uma consulta à
+    tabela. É a unidade de trabalho enviada aos processos por `estimate_probability`.
+
+    Parâmetros:
+
+        bounds (dict): Dicionário indexado de 1 a 4 com pares (mínimo, máximo) de cada atributo; máximo None indica sem limite.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        tier_probs (dict[int, float]): Probabilidade de cada tier.
+        samples (int): Número de flames sorteadas.
+        seed (int, SeedSequence ou None): Semente do gerador de números aleatórios.
+        lines (int): Número de linhas distintas por flame.
+        pool_size (int): Número de tipos de linha possíveis.
+
+    Retorna:
+
+        int: O número de flames dentro dos limites.
+
+    Exceções:
+
+        ValueError: Se bounds não contiver 4 pares ou nos mesmos casos de `get_tiers` para os mínimos, ps e ms.
+        ValueError: Se algum máximo for menor que o mínimo correspondente.
+        ValueError: Se lines, pool_size ou tier_probs forem inválidos.
+    """
+    _validate_simulation(bounds, ps, ms, tier_probs, lines, pool_size)
+    rng = np.random.default_rng(seed)
+    num_sets, num_combos = len(_line_sets(pool_size, lines)), len(tier_probs)**lines
+    hits = 0
+    if num_sets*num_combos <= HIT_TABLE_MAX_SIZE:
+        table, threshold, alias = _hit_table(tuple(bounds[i] for i in range(1, 5)), ps, ms, tuple(tier_probs.items()), lines, pool_size)
+        for start in range(0, samples, SIM_BATCH_SIZE):
+            size = min(SIM_BATCH_SIZE, samples - start)
+            flames = rng.integers(0, num_sets, size)*num_combos + _sample_alias(threshold, alias, size, rng)
+            hits += int(np.count_nonzero(table[flames]))
+        return hits
+    low = np.array([bounds[i][0] for i in range(1, 5)])
+    high = np.array([np.iinfo(np.int32).max if bounds[i][1] is None else bounds[i][1] for i in range(1, 5)])
+    for start in range(0, samples, SIM_BATCH_SIZE):
+        stats = sample_flames(min(SIM_BATCH_SIZE, samples - start), ps, ms, tier_probs, rng, lines, pool_size)
+        hits += int(((stats >= low) & (stats <= high)).all(axis=1).sum())
+    return hits
+
+def wilson_interval(hits:int, samples:int, z:float = CONFIDENCE_Z) -> tuple[float, float]:
+    """
+    Calcula o intervalo de confiança de Wilson para uma proporção, adequado também a probabilidades próximas de 0.
+
+    Parâmetros:
+
+        hits (int): Número de sucessos.
+        samples (int): Número de amostras.
+        z (float): Quantil da normal padrão do nível de confiança desejado.
+
+    Retorna:
+
+        tuple[float, float]: Os limites inferior e superior do intervalo.
+    """
+    if samples == 0:
+        return 0.0, 1.0
+    p = hits/samples
+    denominator = 1 + z*z/samples
+    center = (p + z*z/(2*samples))/denominator
+    margin = z*sqrt(p*(1 - p)/samples + z*z/(4*samples*samples))/denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+def estimate_probability(bounds:dict[int, tuple[int, int | None]], ps:int, ms:int, tier_probs:dict[int, float], samples:int, seed:int | None = None, workers:int = 1, lines:int = DEFAULT_LINES, pool_size:int = LINE_POOL_SIZE) -> dict[str, float]:
+    """
+    Estima por Monte Carlo a probabilidade de uma flame deixar cada atributo dentro dos limites informados
+    (por exemplo, STR >= 100 e DEX >= 40), com intervalo de confiança de 95%.
+    Com `workers` > 1 as amostras são divididas entre processos, cada um com um fluxo aleatório independente
+    derivado de `seed`, então o resultado para uma mesma semente não depende da ordem de execução.
+
+    Parâmetros:
+
+        bounds (dict): Dicionário indexado de 1 a 4 com pares (mínimo, máximo) de cada atributo; máximo None indica sem limite.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        tier_probs (dict[int, float]): Probabilidade de cada tier, por exemplo um dos valores de `FLAME_TYPES`.
+        samples (int): Número total de flames sorteadas.
+        seed (int ou None): Semente do gerador de números aleatórios.
+        workers (int): Número de processos.
+        lines (int): Número de linhas distintas por flame.
+        pool_size (int): Número de tipos de linha possíveis.
+
+    Retorna:
+
+        dict[str, float]: samples, hits, probability, low e high (limites do intervalo de confiança) e expected_rolls
+        (número esperado de flames até o primeiro sucesso, infinito caso nenhum sucesso tenha sido observado).
+
+    Exceções:
+
+        ValueError: Se samples ou workers não forem positivos, ou nos mesmos casos de `simulate_hits`.
+    """
+    if samples < 1 or workers < 1:
+        raise ValueError("O número de amostras e de processos deve ser positivo.")
+    _validate_simulation(bounds, ps, ms, tier_probs, lines, pool_size)
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    shares = [samples//workers + (worker < samples % workers) for worker in range(workers)]
+    if workers == 1:
+        hits = simulate_hits(bounds, ps, ms, tier_probs, samples, seeds[0], lines, pool_size)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(simulate_hits, bounds, ps, ms, tier_probs, share, worker_seed, lines, pool_size)
+                for share, worker_seed in zip(shares, seeds)
+            ]
+            hits = sum(future.result() for future in futures)
+    low, high = wilson_interval(hits, samples)
+    return {
+        "samples": samples,
+        "hits": hits,
+        "probability": hits/samples,
+        "low": low,
+        "high": high,
+        "expected_rolls": samples/hits if hits else float("inf"),
+    }
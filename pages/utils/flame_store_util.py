@@ -0,0 +1,257 @@
+import argparse, json, os, sys, tempfile
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from pages.utils.flame_util import (
+    MAX_GROUPS, MIXED_PAIRS, calcular_ps_ms_por_nivel, count_groups_packed, count_stat_vectors, decode_stats, encode_stats, get_tiers_batch,
+    get_tiers_packed, level_scales, pack_tiers, stats_base, unpack_tiers, validate_query,
+)
+
+STORE_VERSION = 1
+"""Versão do formato gravado por `build_solution_store`; lojas de outras versões são recusadas."""
+
+STORE_CHUNK_SIZE = 50000
+"""Quantidade de vetores de atributos resolvidos por tarefa durante a geração da loja."""
+
+def _solve_store_chunk(stats:np.ndarray, ps:int, ms:int, max_groups:int | None) -> tuple[np.ndarray, np.ndarray]:
+    return get_tiers_batch(stats, ps, ms, max_groups=max_groups)
+
+def _write_atomic(path:str, data:bytes) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def build_solution_store(path:str, scales:Iterable[tuple[int, int]] | None = None, max_groups:int | None = None, workers:int = 1, chunk_size:int = STORE_CHUNK_SIZE) -> str:
+    """
+    Gera offline uma loja de soluções em disco, lida depois por `SolutionStore` via mmap.
+    Para cada par (ps, ms) os vetores de atributos alcançáveis são obtidos de `count_stat_vectors` (apenas os canônicos,
+    em ordem não crescente, pois as demais permutações são reconstruídas na leitura) e resolvidos em blocos com
+    `get_tiers_batch`, opcionalmente em vários processos. Cada par ocupa um diretório com três arquivos binários:
+
+    - keys.bin: int64, os vetores canônicos com ao menos uma configuração, codificados por `encode_stats`, em ordem
+      crescente (índice ordenado)
+    - offsets.bin: int64, N+1 deslocamentos; as configurações do vetor i ficam em codes[offsets[i]:offsets[i+1]]
+    - codes.bin: uint32, as configurações compactadas por `pack_tier`, em ordem crescente de grupos usados
+
+    O arquivo meta.json, gravado por último, descreve a versão do formato, o limite de grupos e os pares gerados.
+
+    Parâmetros:
+
+        path (str): Diretório da loja.
+        scales (Iterable[tuple[int, int]] ou None): Pares (ps, ms) gerados, todos os de `level_scales` caso não informado.
+        max_groups (int ou None): Número máximo de grupos das configurações guardadas, sem limite caso não informado.
+        workers (int): Número de processos usados para resolver os blocos.
+        chunk_size (int): Número de vetores de atributos por bloco.
+
+    Retorna:
+
+        str: O caminho de meta.json.
+    """
+    os.makedirs(path, exist_ok=True)
+    pairs = []
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for ps, ms in level_scales() if scales is None else scales:
+            keys, _ = count_stat_vectors(ps, ms)
+            stats = decode_stats(keys, ps, ms)
+            chunks = [stats[start:start + chunk_size] for start in range(0, len(stats), chunk_size)]
+            mapper = executor.map if executor is not None else map
+            directory = os.path.join(path, f"ps{ps}_ms{ms}")
+            os.makedirs(directory, exist_ok=True)
+            offsets, total = [np.zeros(1, dtype=np.int64)], 0
+            with open(os.path.join(directory, "codes.bin"), "wb") as file:
+                for codes, chunk_offsets in mapper(_solve_store_chunk, chunks, repeat(ps), repeat(ms), repeat(max_groups)):
+                    file.write(codes.astype(np.uint32).tobytes())
+                    offsets.append(chunk_offsets[1:].astype(np.int64) + total)
+                    total += len(codes)
+            offsets = np.concatenate(offsets)
+            nonempty = np.diff(offsets) > 0
+            keys, offsets = keys[nonempty], np.concatenate([offsets[:1], offsets[1:][nonempty]])
+            _write_atomic(os.path.join(directory, "offsets.bin"), offsets.tobytes())
+            _write_atomic(os.path.join(directory, "keys.bin"), keys.astype(np.int64).tobytes())
+            pairs.append({"ps": ps, "ms": ms, "keys": len(keys), "codes": total})
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    meta_path = os.path.join(path, "meta.json")
+    meta = {"version": STORE_VERSION, "max_groups": MAX_GROUPS if max_groups is None else max_groups, "pairs": pairs}
+    _write_atomic(meta_path, json.dumps(meta, indent=2).encode("utf-8"))
+    return meta_path
+
+def _canonical_columns(order:np.ndarray) -> np.ndarray:
+    """
+    Dada a ordem que leva um vetor de atributos à forma canônica (atributo original de cada posição canônica),
+    devolve, para cada coluna de uma configuração canônica, a coluna correspondente na configuração original.
+    """
+    columns = list(order)
+    for i, j in MIXED_PAIRS:
+        columns.append(4 + MIXED_PAIRS.index(tuple(sorted((int(order[i]), int(order[j]))))))
+    return np.array(columns)
+
+class SolutionStore:
+    """
+    Leitura de uma loja gerada por `build_solution_store`. Os arquivos são abertos somente leitura com mmap na
+    primeira consulta de cada par (ps, ms), então abrir a loja é instantâneo e as páginas lidas ficam no cache do
+    sistema operacional, compartilhadas por todos os processos que usam a mesma loja.
+
+    Parâmetros:
+
+        path (str): Diretório da loja.
+
+    Exceções:
+
+        ValueError: Se a loja não existir ou tiver sido gerada com outra versão do formato.
+    """
+
+    def __init__(self, path:str) -> None:
+        meta_path = os.path.join(path, "meta.json")
+        try:
+            with open(meta_path, encoding="utf-8") as file:
+                meta = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            raise ValueError(f"Loja de soluções inválida ou ausente: {path}") from None
+        if meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Versão da loja de soluções não suportada: {meta.get('version')}")
+        self.path = path
+        self.max_groups = meta["max_groups"]
+        self.pairs = {(pair["ps"], pair["ms"]): pair for pair in meta["pairs"]}
+        self._arrays: dict[tuple[int, int], tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def __contains__(self, scales:tuple[int, int]) -> bool:
+        return tuple(scales) in self.pairs
+
+    def _open(self, ps:int, ms:int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        arrays = self._arrays.get((ps, ms))
+        if arrays is None:
+            pair = self.pairs[(ps, ms)]
+            directory = os.path.join(self.path, f"ps{ps}_ms{ms}")
+
+            def open_array(name:str, dtype:type, size:int) -> np.ndarray:
+                if size == 0:
+                    return np.zeros(0, dtype=dtype)
+                return np.memmap(os.path.join(directory, name), dtype=dtype, mode="r", shape=(size,))
+
+            arrays = (
+                open_array("keys.bin", np.int64, pair["keys"]),
+                open_array("offsets.bin", np.int64, pair["keys"] + 1),
+                open_array("codes.bin", np.uint32, pair["codes"]),
+            )
+            self._arrays[(ps, ms)] = arrays
+        return arrays
+
+    def get(self, stats:dict[int, int, int, int], ps:int, ms:int, max_groups:int | None = None) -> np.ndarray | None:
+        """
+        Obtém as configurações compactadas de uma consulta, no mesmo formato e ordem (crescente de grupos) de
+        `get_tiers_packed`. O vetor de atributos é levado à forma canônica, localizado por busca binária no índice
+        ordenado, e as configurações encontradas são permutadas de volta para a ordem original dos atributos.
+
+        Parâmetros:
+
+            stats (dict): Dicionário com os valores finais dos atributos, indexado de 1 a 4.
+            ps (int): Valor do tier puro (pure scale).
+            ms (int): Valor do tier misto (mixed scale).
+            max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+
+        Retorna:
+
+            np.ndarray ou None: Vetor uint32 de configurações, ou None se o par (ps, ms) não estiver na loja ou se
+            max_groups exceder o limite de grupos com que a loja foi gerada.
+
+        Exceções:
+
+            ValueError: Nos mesmos casos de `get_tiers`.
+        """
+        validate_query(stats, ps, ms, max_groups, None)
+        max_groups = MAX_GROUPS if max_groups is None else max_groups
+        if (ps, ms) not in self.pairs or max_groups > self.max_groups:
+            return None
+        keys, offsets, codes = self._open(ps, ms)
+        values = np.array([stats[i] for i in range(1, 5)], dtype=np.int64)
+        if (values >= stats_base(ps, ms)).any():
+            return np.zeros(0, dtype=np.uint32)
+        order = np.argsort(-values, kind="stable")
+        key = encode_stats(values[order][None, :], ps, ms)[0]
+        position = int(np.searchsorted(keys, key))
+        if position == len(keys) or keys[position] != key:
+            return np.zeros(0, dtype=np.uint32)
+        found = np.array(codes[offsets[position]:offsets[position + 1]])
+        if (order != np.arange(4)).any():
+            tiers = np.empty((len(found), MAX_GROUPS), dtype=np.uint8)
+            tiers[:, _canonical_columns(order)] = unpack_tiers(found)
+            found = pack_tiers(tiers)
+        if max_groups < self.max_groups:
+            found = found[count_groups_packed(found) <= max_groups]
+        return found
+
+def open_solution_store(path:str | None) -> SolutionStore | None:
+    """
+    Abre a loja de soluções em `path`, devolvendo None se o caminho não for informado ou a loja for inválida.
+    """
+    if not path:
+        return None
+    try:
+        return SolutionStore(path)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return None
+
+SOLUTION_STORE = open_solution_store(os.environ.get("FLAME_STORE_PATH"))
+"""
+Loja de soluções compartilhada por todos os processos, aberta a partir da variável de ambiente FLAME_STORE_PATH
+(None caso não definida), usada por `get_tiers_stored`.
+"""
+
+def get_tiers_stored(stats:dict[int, int, int, int], ps:int, ms:int, max_groups:int | None = None, fallback:Callable[..., np.ndarray] = get_tiers_packed) -> np.ndarray:
+    """
+    Obtém as configurações compactadas de `SOLUTION_STORE` quando a consulta estiver coberta pela loja e, caso contrário,
+    de `fallback` (por exemplo `flame_util.get_tiers_cached`), chamado como fallback(stats, ps, ms, max_groups).
+
+    Retorna:
+
+        np.ndarray: Vetor uint32 de configurações compactadas, em ordem crescente de grupos usados.
+    """
+    found = None if SOLUTION_STORE is None else SOLUTION_STORE.get(stats, ps, ms, max_groups)
+    if found is not None:
+        return found
+    return fallback(stats, ps, ms, max_groups)
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Constroi o parser de argumentos da linha de comando.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m pages.utils.flame_store_util",
+        description="Gera a loja de soluções de flame lida via mmap pelo servidor (variável de ambiente FLAME_STORE_PATH).",
+    )
+    parser.add_argument("path", help="diretório da loja")
+    parser.add_argument("--level", type=int, action="append", help="nível cujo par (ps, ms) é gerado, todos caso omitido")
+    parser.add_argument("--max-groups", type=int, help="número máximo de grupos das configurações guardadas")
+    parser.add_argument("--workers", type=int, default=1, help="número de processos usados na geração")
+    return parser
+
+def main(argv:list[str] | None = None) -> int:
+    """
+    Ponto de entrada da linha de comando, ver `build_parser`.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.max_groups is not None and not 0 <= args.max_groups <= MAX_GROUPS:
+        parser.error(f"--max-groups deve estar entre 0 e {MAX_GROUPS}")
+    try:
+        scales = None if args.level is None else sorted({calcular_ps_ms_por_nivel(level) for level in args.level})
+    except ValueError as error:
+        parser.error(str(error))
+    print(build_solution_store(args.path, scales, args.max_groups, args.workers), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
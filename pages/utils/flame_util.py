@@ -1,163 +1,555 @@
-from itertools import product
-from math import lcm, floor, ceil
+import os
+from collections.abc import Callable, Iterator
+from functools import lru_cache
+from itertools import combinations, islice, product
+
+import numpy as np
+
+from pages.utils.cache_util import LRUCache
 
 MAX_TIER = 7
 """Valor máximo de cada tier (puro ou misto) para os atributos STR, DEX, INT e LUK."""
 
-def extended_gcd(a:int, b:int) -> tuple[int, int, int]:
+MAX_MIXED_PER_STAT = 3*MAX_TIER
+"""Soma máxima dos tiers mistos que um atributo pode receber (cada atributo participa de 3 grupos mistos)."""
+
+MAX_GROUPS = 10
+"""Quantidade total de grupos de flame (4 puros e 6 mistos) de uma configuração de tiers."""
+
+TIER_LABELS = ["STR", "DEX", "INT", "LUK", "STR/DEX", "STR/INT", "STR/LUK", "DEX/INT", "DEX/LUK", "INT/LUK"]
+"""Rótulo de cada posição de uma configuração de tiers: 4 grupos puros seguidos dos 6 grupos mistos."""
+
+MIXED_PAIRS = list(combinations(range(4), 2))
+"""Pares de atributos de cada tier misto, na mesma ordem das colunas 5 a 10 das configurações."""
+
+TIER_BITS = 3
+"""Número de bits usados por cada tier na representação compactada (suficiente para 0 a MAX_TIER)."""
+
+QUERY_CACHE_MAX_BYTES = 64*1024*1024
+"""Limite de memória do cache de consultas compartilhado entre sessões (`QUERY_CACHE`)."""
+
+QUERY_CACHE = LRUCache(QUERY_CACHE_MAX_BYTES, os.environ.get("FLAME_CACHE_PATH"))
+"""
+Cache de consultas compactadas compartilhado por todas as sessões do processo, usado por `get_tiers_cached`.
+Se a variável de ambiente FLAME_CACHE_PATH estiver definida, as páginas de flames chamam `enable_persistence`, que carrega o cache desse arquivo
+e o grava nele ao final do processo principal.
+"""
+
+def validate_query(stats:dict[int, int, int, int], ps:int, ms:int, max_groups:int | None, limit:int | None) -> None:
     """
-    algoritmo de Euclides estendido para encontrar o máximo divisor comum (MDC) bem como os coeficientes de Bézout.
-    O algoritmo é recursivo e retorna o MDC, x e y tais que:
-    a*x + b*y = gcd(a, b)
+    Valida os parâmetros de uma consulta de tiers, levantando ValueError conforme descrito em `get_tiers`.
+    Também é usada pelos módulos que validam consultas antes de chegar às funções de busca.
 
     Parâmetros:
 
-        a (int): Primeiro número inteiro.
-        b (int): Segundo número inteiro.
+        stats (dict): Dicionário com os valores finais dos atributos, indexado de 1 a 4.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, não validado caso não informado.
+        limit (int ou None): Número máximo de configurações retornadas, não validado caso não informado.
 
-    Retorna:
-    
-        tuple[int, int, int]: Tupla contendo o máximo divisor comum (MDC), x e y.
+    Exceções:
+
+        ValueError: Nos mesmos casos de `get_tiers`.
     """
-    if b == 0:
-        return a, 1, 0
-    d, x1, y1 = extended_gcd(b, a % b)
-    return d, y1, x1 - (a // b) * y1
+    if len(stats) != 4:
+        raise ValueError("O dicionário de stats deve conter exatamente 4 valores.")
+    if any(not isinstance(stats[i], int) for i in range(1, 5)):
+        raise ValueError("Os valores dos atributos devem ser inteiros.")
+    if not isinstance(ps, int) or not isinstance(ms, int):  
+        raise ValueError("Os valores de ps e ms devem ser inteiros.")
+    if any(stats[i] < 0 for i in range(1, 5)):
+        raise ValueError("Os valores dos atributos devem ser não negativos.")
+    if ps < 0 or ps > 20:
+        raise ValueError("O valor de ps deve estar entre 0 e 20.")
+    if ms < 0 or ms > 20:
+        raise ValueError("O valor de ms deve estar entre 0 e 20.")
+    if ps == 0 and ms == 0:
+        raise ValueError("Os valores de ps e ms não podem ser ambos zero.")
+    if max_groups is not None and (not isinstance(max_groups, int) or max_groups < 0 or max_groups > MAX_GROUPS):
+        raise ValueError(f"O número máximo de grupos deve ser um inteiro entre 0 e {MAX_GROUPS}.")
+    if limit is not None and (not isinstance(limit, int) or limit < 1):
+        raise ValueError("O limite de resultados deve ser um inteiro positivo.")
 
-def solve_linear(p:int, m:int, s:int) -> tuple[int, int, int, int]:
+def get_tiers(stats:dict[int, int, int, int], ps:int, ms:int, max_groups:int | None = None, limit:int | None = None) -> list[list[int]]:
     """
-    resolve a equação diofantica px+my=s usando o algoritmo extendido de euclides.
+    Gera todas as combinações possíveis de tiers para os atributos STR, DEX, INT e LUK.
+    Cada combinação é representada como uma lista de 10 inteiros:
+    - Os primeiros 4 representam os tiers puros: STR, DEX, INT e LUK.
+    - Os últimos 6 representam os tiers mistos: STR/DEX, STR/INT, STR/LUK, DEX/INT, DEX/LUK, INT/LUK.
+    A função considera os valores de ps (escala de bônus puro) e ms (escala de bônus misto) para calcular
+    todas as configurações válidas que resultam nos valores finais fornecidos em `stats`.
 
-    Parametros:
+    Parâmetros:
 
-        p (int): coeficiente de x
-        m (int): coeficiente de y
-        s (int): valor total desejado
+        stats (dict): Dicionário com os valores finais dos atributos, indexado de 1 a 4.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+        limit (int ou None): Número máximo de configurações retornadas, sem limite caso não informado.
 
     Retorna:
 
-        tuple[int, int, int, int]: Tupla contendo as soluções particulares (x, y) e os passos dx e dy.
+        list[list[int]]: Lista de combinações válidas, cada uma como lista de 10 inteiros.
 
     Exceções:
 
-        ValueError: Se não houver solução para a equação.
+        ValueError: Se o dicionário de stats não contiver exatamente 4 valores ou se os valores não forem inteiros.
+        ValueError: Se ps ou ms não forem inteiros ou estiverem fora do intervalo permitido (0 a 20).
+        ValueError: Se os valores dos atributos forem negativos ou se ps e ms forem ambos zero.
+        ValueError: Se max_groups não estiver entre 0 e MAX_GROUPS ou se limit não for um inteiro positivo.
     """
-    d, x0, y0 = extended_gcd(p, m)
-    if s % d != 0:
-        raise ValueError("No solution exists for the given equation.")
-    scale = s // d
-    x = x0 * scale
-    y = y0 * scale
-    dx = lcm(p, m) // p
-    dy = lcm(p, m) // m
-    return (x, y, dx, dy)  # or return (x, y) if only one is needed
+    return [tier for tier, _ in get_tiers_with_groups(stats, ps, ms, max_groups, limit)]
 
-def limit_y(s:int, m:int) -> int:
+def get_tiers_with_groups(stats:dict[int, int, int, int], ps:int, ms:int, max_groups:int | None = None, limit:int | None = None) -> list[tuple[list[int], int]]:
     """
-    Limita o valor de y na equação diofantica px+my=s.
-    o valor de y é limitado assumindo que um stats recebe no maximo 3 tiers mistos.
+    Variante de `get_tiers` que devolve, junto de cada configuração, o número de grupos usados por ela
+    (o mesmo valor de `count_groups_used`). O limite de grupos é aplicado durante a busca, descartando
+    combinações parciais que já excedem o orçamento, em vez de filtrar o resultado completo.
 
     Parâmetros:
 
-        s (int): Valor total da equação.
-        m (int): Coeficiente de y na equação.
+        stats (dict): Dicionário com os valores finais dos atributos, indexado de 1 a 4.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+        limit (int ou None): Número máximo de configurações retornadas, sem limite caso não informado.
 
     Retorna:
 
-        int: Valor máximo permitido para y.
+        list[tuple[list[int], int]]: Lista de pares (configuração de 10 tiers, grupos usados), em ordem crescente de grupos.
+
+    Exceções:
+
+        ValueError: Nos mesmos casos de `get_tiers`.
     """
-    return min(3*MAX_TIER, s//m)
+    validate_query(stats, ps, ms, max_groups, limit)
+    max_groups = MAX_GROUPS if max_groups is None else max_groups
+    found = _lookup_tiers(tuple(stats[i] for i in range(1, 5)), ps, ms, max_groups, limit)
+    return [(list(tier), groups) for tier, groups in found]
 
-def get_tiers(stats:dict[int, int, int, int], ps:int, ms:int) -> list[list[int]]:
+def iter_tiers(stats:dict[int, int, int, int], ps:int, ms:int, max_groups:int | None = None) -> Iterator[tuple[list[int], int]]:
     """
-    Gera todas as combinações possíveis de tiers para os atributos STR, DEX, INT e LUK.
-    Cada combinação é representada como uma lista de 10 inteiros:
-    - Os primeiros 4 representam os tiers puros: STR, DEX, INT e LUK.
-    - Os últimos 6 representam os tiers mistos: STR/DEX, STR/INT, STR/LUK, DEX/INT, DEX/LUK, INT/LUK.
-    A função considera os valores de ps (escala de bônus puro) e ms (escala de bônus misto) para calcular
-    todas as configurações válidas que resultam nos valores finais fornecidos em `stats`.
+    Versão preguiçosa de `get_tiers_with_groups`: devolve um gerador que produz cada configuração assim que ela
+    é encontrada, em ordem crescente de grupos usados, sem manter a lista de resultados em memória.
+    O chamador pode interromper a iteração a qualquer momento (por exemplo com `itertools.islice`).
+    Os parâmetros são validados imediatamente, antes da primeira iteração.
 
     Parâmetros:
 
         stats (dict): Dicionário com os valores finais dos atributos, indexado de 1 a 4.
         ps (int): Valor do tier puro (pure scale).
         ms (int): Valor do tier misto (mixed scale).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
 
     Retorna:
 
-        list[list[int]]: Lista de combinações válidas, cada uma como lista de 10 inteiros.
+        Iterator[tuple[list[int], int]]: Gerador de pares (configuração de 10 tiers, grupos usados).
 
     Exceções:
 
-        ValueError: Se o dicionário de stats não contiver exatamente 4 valores ou se os valores não forem inteiros.
-        ValueError: Se ps ou ms não forem inteiros ou estiverem fora do intervalo permitido (0 a 20).
-        ValueError: Se os valores dos atributos forem negativos ou se ps e ms forem ambos zero.
+        ValueError: Nos mesmos casos de `get_tiers`.
     """
-    if len(stats) != 4:
-        raise ValueError("O dicionário de stats deve conter exatamente 4 valores.")
-    if any(not isinstance(stats[i], int) for i in range(1, 5)):
-        raise ValueError("Os valores dos atributos devem ser inteiros.")
-    if not isinstance(ps, int) or not isinstance(ms, int):  
-        raise ValueError("Os valores de ps e ms devem ser inteiros.")
-    if any(stats[i] < 0 for i in range(1, 5)):
-        raise ValueError("Os valores dos atributos devem ser não negativos.")
-    if ps < 0 or ps > 20:
-        raise ValueError("O valor de ps deve estar entre 0 e 20.")
-    if ms < 0 or ms > 20:
-        raise ValueError("O valor de ms deve estar entre 0 e 20.")
-    if ps == 0 and ms == 0:
-        raise ValueError("Os valores de ps e ms não podem ser ambos zero.")
-    tiers = []
-    if ms == 0:
-        tier = []
-        for i in range(1, 5):
-            if stats[i] % ps != 0 or stats[i] // ps > MAX_TIER:
-                return tiers
-            tier.append(stats[i]//ps)
-        tier = tier + [0]*6
-        tiers.append(tier)
-        return tiers
-
-    STR, DEX, INT, LUK = 1, 2, 3, 4
-    stats_tiers = {STR: [], DEX: [], INT: [], LUK: []}
-    for i in range(1, 5):
-        try:
-            x0, y0, dx, dy = solve_linear(ps, ms, stats[i])
-            tx1 = ceil(-x0/dx)
-            tx2 = floor((MAX_TIER-x0)/dx)
-            ty1 = ceil((y0-limit_y(stats[i], ms))/dy)
-            ty2 = floor(y0/dy)
-            for tx in range(max(tx1, ty1), min(tx2, ty2)+1):
-                x = x0 + tx*dx
-                y = y0 - tx*dy
-                stats_tiers[i].append(x)
-        except ValueError:
-            return []
-    if any(len(v) == 0 for v in stats_tiers.values()):
-        return tiers
-    for combo in product(*[stats_tiers[i] for i in range(1, 5)]):
-        t1, t2, t3, t4 = combo
-        mixed_stats_total_tier = {
-            i: (stats[i] - ps * combo[i - 1]) // ms for i in range(2, 5)
-        }
-        possibilities = [
-            range(min(mixed_stats_total_tier[i], mixed_stats_total_tier[j], MAX_TIER)+1) for i, j in [(DEX, LUK), (INT, LUK)]
-        ]
-        for t24, t34 in product(*possibilities):
-            aux_t12 = ps*(t3+t4-t1-t2)+(stats[STR]+stats[DEX]-stats[INT]-stats[LUK])
-            aux_t13 = ps*(t2+t4-t1-t3)+(stats[STR]+stats[INT]-stats[DEX]-stats[LUK])
-            aux_t14 = -ps*t4+stats[LUK]
-            aux_t23 = ps*(t1-t2-t3-t4)+(stats[DEX]+stats[INT]+stats[LUK]-stats[STR])
-            if not aux_t12%(2*ms) == 0 or not aux_t13%(2*ms) == 0 or not aux_t14%(ms) == 0 or not aux_t23%(2*ms) == 0:
+    validate_query(stats, ps, ms, max_groups, None)
+    max_groups = MAX_GROUPS if max_groups is None else max_groups
+    found = _iter_tiers(tuple(stats[i] for i in range(1, 5)), ps, ms, max_groups)
+    return ((list(tier), groups) for tier, groups in found)
+
+@lru_cache(maxsize=None)
+def _mixed_index() -> dict[tuple[int, int, int, int], tuple[tuple[tuple[int, ...], ...], ...]]:
+    """
+    Índice inverso dos tiers mistos, construído uma única vez por processo.
+    Mapeia a soma de tiers mistos recebida por cada atributo (STR, DEX, INT, LUK) para todas as
+    combinações (STR/DEX, STR/INT, STR/LUK, DEX/INT, DEX/LUK, INT/LUK) que produzem essa soma,
+    separadas pelo número de grupos mistos usados (a posição g guarda as combinações com g grupos).
+    O índice não depende de ps e ms, então é compartilhado por todos os níveis.
+
+    Retorna:
+
+        dict: Dicionário indexado pela tupla de somas mistas por atributo.
+    """
+    index = {}
+    for mixed in product(range(MAX_TIER + 1), repeat=6):
+        t12, t13, t14, t23, t24, t34 = mixed
+        key = (t12 + t13 + t14, t12 + t23 + t24, t13 + t23 + t34, t14 + t24 + t34)
+        buckets = index.setdefault(key, [[] for _ in range(7)])
+        buckets[sum(1 for t in mixed if t > 0)].append(mixed)
+    return {key: tuple(tuple(bucket) for bucket in buckets) for key, buckets in index.items()}
+
+@lru_cache(maxsize=None)
+def _stat_decompositions(ps:int, ms:int) -> dict[int, tuple[tuple[int, int], ...]]:
+    """
+    Índice inverso de um único atributo para o par (ps, ms), construído na primeira consulta do par.
+    Mapeia cada valor alcançável s para todos os pares (x, y) com s = ps*x + ms*y, onde x é o tier puro
+    (0 a MAX_TIER) e y é a soma dos tiers mistos (0 a MAX_MIXED_PER_STAT).
+    Uma escala nula não admite tiers do tipo correspondente.
+
+    Parâmetros:
+
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+
+    Retorna:
+
+        dict: Dicionário indexado pelo valor final do atributo.
+    """
+    table = {}
+    for x in range(MAX_TIER + 1 if ps else 1):
+        for y in range(MAX_MIXED_PER_STAT + 1 if ms else 1):
+            table.setdefault(ps*x + ms*y, []).append((x, y))
+    return {value: tuple(pairs) for value, pairs in table.items()}
+
+def _lookup_tiers(stats:tuple[int, int, int, int], ps:int, ms:int, max_groups:int, limit:int | None) -> tuple[tuple[tuple[int, ...], int], ...]:
+    """
+    Materializa (até `limit` itens) o resultado de `_iter_tiers` para uma consulta.
+
+    Parâmetros:
+
+        stats (tuple): Valores finais de STR, DEX, INT e LUK.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int): Número máximo de grupos distintos por configuração.
+        limit (int ou None): Número máximo de configurações retornadas.
+
+    Retorna:
+
+        tuple: Pares (configuração como tupla de 10 inteiros, grupos usados).
+    """
+    return tuple(islice(_iter_tiers(stats, ps, ms, max_groups), limit))
+
+def _iter_branches(stats:tuple[int, int, int, int], ps:int, ms:int, max_groups:int) -> Iterator[tuple[int, tuple[int, int, int, int], tuple[int, int, int, int], int]]:
+    """
+    Percorre as escolhas de tiers puros de uma consulta, por aprofundamento iterativo no número de grupos:
+    para cada total de grupos, de 0 a `max_groups`, os laços aninhados acumulam os grupos puros usados e
+    abandonam o ramo assim que o total é excedido. Cada ramo restante indica a chave do índice misto e
+    quantos grupos mistos faltam para completar o total.
+
+    Parâmetros:
+
+        stats (tuple): Valores finais de STR, DEX, INT e LUK.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int): Número máximo de grupos distintos por configuração.
+
+    Retorna:
+
+        Iterator: Gerador de tuplas (total de grupos, tiers puros, somas mistas por atributo, grupos mistos restantes).
+    """
+    table = _stat_decompositions(ps, ms)
+    mixed_index = _mixed_index()
+    c1, c2, c3, c4 = (table.get(s, ()) for s in stats)
+    if not (c1 and c2 and c3 and c4):
+        return
+    for groups in range(max_groups + 1):
+        for x1, y1 in c1:
+            g1 = (x1 > 0)
+            if g1 > groups:
                 continue
-            t12 = aux_t12//(2*ms)+t34
-            t13 = aux_t13//(2*ms)+t24
-            t14 = aux_t14//ms-(t24+t34)
-            t23 = aux_t23//(2*ms)-(t24+t34)
-            tier = [t1, t2, t3, t4, t12, t13, t14, t23, t24, t34]
-            if all(0 <= t <= MAX_TIER for t in tier):
-                tiers.append(tier)
-    return tiers
+            for x2, y2 in c2:
+                g2 = g1 + (x2 > 0)
+                if g2 > groups:
+                    continue
+                for x3, y3 in c3:
+                    g3 = g2 + (x3 > 0)
+                    if g3 > groups:
+                        continue
+                    for x4, y4 in c4:
+                        g4 = g3 + (x4 > 0)
+                        key = (y1, y2, y3, y4)
+                        buckets = mixed_index.get(key)
+                        if g4 > groups or buckets is None or groups - g4 >= len(buckets) or not buckets[groups - g4]:
+                            continue
+                        yield groups, (x1, x2, x3, x4), key, groups - g4
+
+def _iter_tiers(stats:tuple[int, int, int, int], ps:int, ms:int, max_groups:int) -> Iterator[tuple[tuple[int, ...], int]]:
+    """
+    Resolve uma consulta combinando os índices de `_stat_decompositions` e `_mixed_index`, sem resolver
+    equações diofantinas. Como `_iter_branches` percorre os totais de grupos em ordem, as configurações
+    são produzidas em ordem crescente de grupos, sem ordenação posterior.
+
+    Parâmetros:
+
+        stats (tuple): Valores finais de STR, DEX, INT e LUK.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int): Número máximo de grupos distintos por configuração.
+
+    Retorna:
+
+        Iterator: Gerador de pares (configuração como tupla de 10 inteiros, grupos usados).
+    """
+    mixed_index = _mixed_index()
+    for groups, pure, key, mixed_groups in _iter_branches(stats, ps, ms, max_groups):
+        for mixed in mixed_index[key][mixed_groups]:
+            yield pure + mixed, groups
+
+@lru_cache(maxsize=None)
+def _mixed_counts() -> dict[tuple[int, int, int, int], tuple[int, ...]]:
+    """
+    Tamanho de cada balde de `_mixed_index`: para cada chave de somas mistas, quantas combinações mistas
+    existem com 0, 1, ..., 6 grupos.
+
+    Retorna:
+
+        dict: Dicionário indexado pela tupla de somas mistas por atributo.
+    """
+    return {key: tuple(len(bucket) for bucket in buckets) for key, buckets in _mixed_index().items()}
+
+def count_tiers(stats:dict[int, int, int, int], ps:int, ms:int, max_groups:int | None = None) -> tuple[int, list[int]]:
+    """
+    Conta as configurações de `get_tiers` sem enumerá-las, devolvendo também o histograma por grupos usados.
+    Para cada escolha de tiers puros (no máximo (MAX_TIER+1)^4 combinações dos candidatos por atributo) soma-se
+    o tamanho dos baldes do índice misto correspondente, então o custo não depende do número de soluções.
+
+    Parâmetros:
+
+        stats (dict): Dicionário com os valores finais dos atributos, indexado de 1 a 4.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+
+    Retorna:
+
+        tuple[int, list[int]]: Total de configurações e histograma, onde a posição g guarda quantas usam g grupos.
+
+    Exceções:
+
+        ValueError: Nos mesmos casos de `get_tiers`.
+    """
+    validate_query(stats, ps, ms, max_groups, None)
+    max_groups = MAX_GROUPS if max_groups is None else max_groups
+    table = _stat_decompositions(ps, ms)
+    mixed_counts = _mixed_counts()
+    histogram = [0]*(MAX_GROUPS + 1)
+    for combo in product(*(table.get(stats[i], ()) for i in range(1, 5))):
+        counts = mixed_counts.get(tuple(y for _, y in combo))
+        if counts is None:
+            continue
+        pure_groups = sum(1 for x, _ in combo if x > 0)
+        for mixed_groups, count in enumerate(counts):
+            histogram[pure_groups + mixed_groups] += count
+    histogram = [count if groups <= max_groups else 0 for groups, count in enumerate(histogram)]
+    return sum(histogram), histogram
+
+def pack_tier(tier:list[int]) -> int:
+    """
+    Compacta uma configuração de 10 tiers em um único inteiro de 30 bits, usando TIER_BITS bits por tier.
+    O tier de índice i ocupa os bits [TIER_BITS*i, TIER_BITS*(i+1)).
+
+    Parâmetros:
+
+        tier (list[int]): Lista de 10 inteiros representando a configuração de tiers.
+
+    Retorna:
+
+        int: Configuração compactada.
+    """
+    code = 0
+    for i, t in enumerate(tier):
+        code |= t << (TIER_BITS*i)
+    return code
+
+def unpack_tier(code:int) -> list[int]:
+    """
+    Operação inversa de `pack_tier`.
+
+    Parâmetros:
+
+        code (int): Configuração compactada.
+
+    Retorna:
+
+        list[int]: Lista de 10 inteiros representando a configuração de tiers.
+    """
+    code = int(code)
+    return [(code >> (TIER_BITS*i)) & MAX_TIER for i in range(MAX_GROUPS)]
+
+def unpack_tiers(codes:np.ndarray) -> np.ndarray:
+    """
+    Versão vetorizada de `unpack_tier`.
+
+    Parâmetros:
+
+        codes (np.ndarray): Vetor de configurações compactadas (uint32).
+
+    Retorna:
+
+        np.ndarray: Matriz (N, 10) de tiers.
+    """
+    codes = np.asarray(codes, dtype=np.uint32)
+    shifts = np.arange(MAX_GROUPS, dtype=np.uint32)*np.uint32(TIER_BITS)
+    return ((codes[:, None] >> shifts) & np.uint32(MAX_TIER)).astype(np.uint8)
+
+def pack_tiers(tiers:np.ndarray) -> np.ndarray:
+    """
+    Versão vetorizada de `pack_tier`, operação inversa de `unpack_tiers`.
+
+    Parâmetros:
+
+        tiers (np.ndarray): Matriz (N, 10) de tiers.
+
+    Retorna:
+
+        np.ndarray: Vetor de configurações compactadas (uint32).
+    """
+    tiers = np.asarray(tiers, dtype=np.uint32).reshape(-1, MAX_GROUPS)
+    shifts = np.arange(MAX_GROUPS, dtype=np.uint32)*np.uint32(TIER_BITS)
+    return np.bitwise_or.reduce(tiers << shifts, axis=1).astype(np.uint32)
+
+def get_tier_column(codes:np.ndarray, index:int) -> np.ndarray:
+    """
+    Extrai um único tier de cada configuração compactada, sem desempacotar as demais posições.
+
+    Parâmetros:
+
+        codes (np.ndarray): Vetor de configurações compactadas (uint32).
+        index (int): Posição do tier na configuração (0 a 9, na ordem de `TIER_LABELS`).
+
+    Retorna:
+
+        np.ndarray: Vetor com o tier da posição pedida em cada configuração.
+    """
+    codes = np.asarray(codes, dtype=np.uint32)
+    return ((codes >> np.uint32(TIER_BITS*index)) & np.uint32(MAX_TIER)).astype(np.uint8)
+
+_NONZERO_LOW_BITS = sum(1 << (TIER_BITS*i) for i in range(MAX_GROUPS))
+
+def count_groups_packed(codes:np.ndarray) -> np.ndarray:
+    """
+    Versão vetorizada de `count_groups_used` para configurações compactadas.
+    Cada campo não nulo é reduzido ao seu bit menos significativo e os bits resultantes são contados,
+    sem desempacotar as configurações nem validar cada valor.
+
+    Parâmetros:
+
+        codes (np.ndarray): Vetor de configurações compactadas (uint32).
+
+    Retorna:
+
+        np.ndarray: Vetor com o número de grupos usados por cada configuração.
+    """
+    codes = np.asarray(codes, dtype=np.uint32)
+    nonzero = (codes | (codes >> 1) | (codes >> 2)) & np.uint32(_NONZERO_LOW_BITS)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(nonzero).astype(np.uint8)
+    groups = np.zeros(codes.shape, dtype=np.uint8)
+    for i in range(MAX_GROUPS):
+        groups += ((nonzero >> np.uint32(TIER_BITS*i)) & np.uint32(1)).astype(np.uint8)
+    return groups
+
+def sort_packed_by_groups(codes:np.ndarray) -> np.ndarray:
+    """
+    Ordena configurações compactadas pelo número de grupos usados, preservando a ordem relativa dos empates.
+
+    Parâmetros:
+
+        codes (np.ndarray): Vetor de configurações compactadas (uint32).
+
+    Retorna:
+
+        np.ndarray: Novo vetor ordenado.
+    """
+    codes = np.asarray(codes, dtype=np.uint32)
+    return codes[np.argsort(count_groups_packed(codes), kind="stable")]
+
+@lru_cache(maxsize=None)
+def _packed_mixed_index() -> tuple[np.ndarray, dict[tuple[int, int, int, int], np.ndarray]]:
+    """
+    Equivalente compactado de `_mixed_index`: todas as combinações mistas, já deslocadas para as posições
+    4 a 9 da configuração, num único vetor uint32 ordenado por (somas mistas por atributo, grupos), e um
+    dicionário que leva cada chave de somas aos limites dos seus baldes por grupos dentro do vetor.
+
+    Retorna:
+
+        tuple: Vetor de combinações compactadas e dicionário de limites (o balde g vai de limits[g] a limits[g+1]).
+    """
+    grid = np.indices((MAX_TIER + 1,)*6, dtype=np.uint32).reshape(6, -1)
+    t12, t13, t14, t23, t24, t34 = grid
+    sums = np.stack([t12 + t13 + t14, t12 + t23 + t24, t13 + t23 + t34, t14 + t24 + t34])
+    key_ids = np.ravel_multi_index(sums, (MAX_MIXED_PER_STAT + 1,)*4)
+    groups = (grid > 0).sum(axis=0)
+    codes = np.zeros(grid.shape[1], dtype=np.uint32)
+    for j in range(6):
+        codes |= grid[j] << np.uint32(TIER_BITS*(4 + j))
+    order = np.lexsort((groups, key_ids))
+    codes, key_ids, groups = codes[order], key_ids[order], groups[order]
+    starts = np.flatnonzero(np.r_[True, key_ids[1:] != key_ids[:-1]])
+    ends = np.r_[starts[1:], len(codes)]
+    limits = {}
+    for start, end in zip(starts, ends):
+        key = tuple(int(v) for v in np.unravel_index(key_ids[start], (MAX_MIXED_PER_STAT + 1,)*4))
+        limits[key] = start + np.searchsorted(groups[start:end], np.arange(8))
+    return codes, limits
+
+def get_tiers_packed(stats:dict[int, int, int, int], ps:int, ms:int, max_groups:int | None = None) -> np.ndarray:
+    """
+    Variante de `get_tiers_with_groups` que devolve as configurações compactadas (ver `pack_tier`) num único
+    vetor uint32, em ordem crescente de grupos usados. Cada ramo da busca acrescenta um bloco inteiro de
+    combinações mistas de uma só vez, sem criar listas por configuração; o desempacotamento fica a cargo de
+    `unpack_tier`, apenas para as linhas efetivamente exibidas.
+
+    Parâmetros:
+
+        stats (dict): Dicionário com os valores finais dos atributos, indexado de 1 a 4.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+
+    Retorna:
+
+        np.ndarray: Vetor uint32 de configurações compactadas.
+
+    Exceções:
+
+        ValueError: Nos mesmos casos de `get_tiers`.
+    """
+    validate_query(stats, ps, ms, max_groups, None)
+    max_groups = MAX_GROUPS if max_groups is None else max_groups
+    codes, limits = _packed_mixed_index()
+    chunks = []
+    for _, pure, key, mixed_groups in _iter_branches(tuple(stats[i] for i in range(1, 5)), ps, ms, max_groups):
+        bounds = limits[key]
+        chunks.append(codes[bounds[mixed_groups]:bounds[mixed_groups + 1]] | np.uint32(pack_tier(pure)))
+    if not chunks:
+        return np.zeros(0, dtype=np.uint32)
+    return np.concatenate(chunks)
+
+def get_tiers_cached(stats:dict[int, int, int, int], ps:int, ms:int, max_groups:int | None = None, runner:Callable[..., np.ndarray] | None = None) -> np.ndarray:
+    """
+    Versão de `get_tiers_packed` servida pelo cache compartilhado `QUERY_CACHE`, indexado pela consulta canônica
+    (STR, DEX, INT, LUK, ps, ms, max_groups). O vetor devolvido é somente leitura, pois é compartilhado entre sessões.
+
+    Parâmetros:
+
+        stats (dict): Dicionário com os valores finais dos atributos, indexado de 1 a 4.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+        runner (Callable ou None): Função que executa o solver em caso de falha no cache, chamada como
+            runner(get_tiers_packed, stats, ps, ms, max_groups) (por exemplo `pool_util.run_job`);
+            o solver é chamado diretamente caso não informada.
+
+    Retorna:
+
+        np.ndarray: Vetor uint32 de configurações compactadas, em ordem crescente de grupos usados.
+
+    Exceções:
+
+        ValueError: Nos mesmos casos de `get_tiers`.
+    """
+    validate_query(stats, ps, ms, max_groups, None)
+    max_groups = MAX_GROUPS if max_groups is None else max_groups
+    key = ("tiers", tuple(stats[i] for i in range(1, 5)), ps, ms, max_groups)
+
+    def compute() -> np.ndarray:
+        if runner is None:
+            codes = get_tiers_packed(stats, ps, ms, max_groups)
+        else:
+            codes = runner(get_tiers_packed, stats, ps, ms, max_groups)
+        codes.setflags(write=False)
+        return codes
+
+    return QUERY_CACHE.get_or_compute(key, compute)
 
 def count_groups_used(tier:list[int]) -> int:
     """
@@ -252,4 +644,411 @@ def get_max_theorical_value(lv:int) -> int:
     if lv < 0:
         raise ValueError("O nível deve ser maior ou igual a 0.")
     ps, ms = calcular_ps_ms_por_nivel(lv)
-    return MAX_TIER*(ps + 3*ms)
\ No newline at end of file
+    return MAX_TIER*(ps + 3*ms)
+
+BATCH_CHUNK_SIZE = 256
+"""Quantidade de linhas processadas por vez em `get_tiers_batch`, limitando a memória dos vetores intermediários."""
+
+@lru_cache(maxsize=None)
+def _dense_mixed_bounds() -> tuple[np.ndarray, np.ndarray]:
+    """
+    Versão densa dos limites de `_packed_mixed_index`, indexada pela chave de somas mistas linearizada
+    (`np.ravel_multi_index` sobre (MAX_MIXED_PER_STAT+1)^4), para consultas vetorizadas.
+    Chaves inalcançáveis têm início igual ao fim.
+
+    Retorna:
+
+        tuple[np.ndarray, np.ndarray]: Vetores de início e fim de cada chave no vetor de combinações mistas.
+    """
+    _, limits = _packed_mixed_index()
+    starts = np.zeros((MAX_MIXED_PER_STAT + 1)**4, dtype=np.int64)
+    ends = np.zeros((MAX_MIXED_PER_STAT + 1)**4, dtype=np.int64)
+    for key, bounds in limits.items():
+        key_id = np.ravel_multi_index(key, (MAX_MIXED_PER_STAT + 1,)*4)
+        starts[key_id], ends[key_id] = bounds[0], bounds[-1]
+    return starts, ends
+
+def _solve_batch(stats:np.ndarray, ps:int, ms:int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Resolve de uma só vez todas as linhas de `stats` que compartilham o mesmo par (ps, ms).
+    Para cada linha e cada tier puro candidato calcula-se o resto s - ps*x; o teste de divisibilidade por ms
+    e os limites de x e y = (s - ps*x)/ms são feitos como operações vetorizadas sobre todas as
+    (MAX_TIER+1)^4 escolhas de tiers puros, e os blocos mistos correspondentes são expandidos com `np.repeat`.
+
+    Parâmetros:
+
+        stats (np.ndarray): Matriz (N, 4) de valores de STR, DEX, INT e LUK.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+
+    Retorna:
+
+        tuple[np.ndarray, np.ndarray]: Configurações compactadas e o índice da linha de origem de cada uma.
+    """
+    codes, _ = _packed_mixed_index()
+    starts, ends = _dense_mixed_bounds()
+    pure_tiers = np.arange(MAX_TIER + 1)
+    residual = stats[:, :, None] - ps*pure_tiers[None, None, :]
+    if ms:
+        valid = (residual >= 0) & (residual % ms == 0) & (residual // ms <= MAX_MIXED_PER_STAT)
+        mixed = np.where(valid, residual // max(ms, 1), 0)
+    else:
+        valid = residual == 0
+        mixed = np.zeros_like(residual)
+    if not ps:
+        valid[:, :, 1:] = False
+    pure = np.indices((MAX_TIER + 1,)*4).reshape(4, -1)
+    combo_valid = valid[:, 0, pure[0]] & valid[:, 1, pure[1]] & valid[:, 2, pure[2]] & valid[:, 3, pure[3]]
+    rows, combos = np.nonzero(combo_valid)
+    key_ids = np.ravel_multi_index(tuple(mixed[rows, i, pure[i, combos]] for i in range(4)), (MAX_MIXED_PER_STAT + 1,)*4)
+    counts = ends[key_ids] - starts[key_ids]
+    pure_codes = np.zeros(len(combos), dtype=np.uint32)
+    for i in range(4):
+        pure_codes |= pure[i, combos].astype(np.uint32) << np.uint32(TIER_BITS*i)
+    total = int(counts.sum())
+    block_offsets = np.cumsum(counts) - counts
+    positions = np.repeat(starts[key_ids] - block_offsets, counts) + np.arange(total)
+    return codes[positions] | np.repeat(pure_codes, counts), np.repeat(rows, counts)
+
+def get_tiers_batch(stats:np.ndarray, ps:int | None = None, ms:int | None = None, levels:np.ndarray | None = None, max_groups:int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Versão vetorizada de `get_tiers_packed` para muitas linhas de atributos de uma vez.
+    As escalas podem ser informadas como um único par (ps, ms) para todas as linhas ou como um nível por linha,
+    convertido com `calcular_ps_ms_por_nivel`. O resultado segue o formato CSR: as configurações compactadas
+    da linha i ficam em `codes[offsets[i]:offsets[i+1]]`, em ordem crescente de grupos usados.
+
+    Parâmetros:
+
+        stats (np.ndarray): Matriz (N, 4) de inteiros com os valores de STR, DEX, INT e LUK.
+        ps (int ou None): Valor do tier puro (pure scale), usado junto de ms.
+        ms (int ou None): Valor do tier misto (mixed scale), usado junto de ps.
+        levels (np.ndarray ou None): Vetor (N,) com o nível do equipamento de cada linha, alternativo a (ps, ms).
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+
+    Retorna:
+
+        tuple[np.ndarray, np.ndarray]: Vetor uint32 de configurações compactadas e vetor de N+1 deslocamentos.
+
+    Exceções:
+
+        ValueError: Se stats não for uma matriz (N, 4) de inteiros não negativos.
+        ValueError: Se não for informado exatamente um entre o par (ps, ms) e levels, ou se levels não tiver N valores.
+        ValueError: Nos mesmos casos de `get_tiers` para ps, ms, max_groups e para cada nível.
+    """
+    stats = np.asarray(stats)
+    if stats.ndim != 2 or stats.shape[1] != 4:
+        raise ValueError("A matriz de stats deve ter formato (N, 4).")
+    if stats.size and not np.issubdtype(stats.dtype, np.integer):
+        raise ValueError("Os valores dos atributos devem ser inteiros.")
+    stats = stats.astype(np.int64)
+    if (stats < 0).any():
+        raise ValueError("Os valores dos atributos devem ser não negativos.")
+    if (levels is None) == (ps is None and ms is None):
+        raise ValueError("Informe exatamente um entre o par (ps, ms) e o vetor de níveis.")
+    if levels is None:
+        validate_query({1: 0, 2: 0, 3: 0, 4: 0}, ps, ms, max_groups, None)
+        scales = np.tile(np.array([ps, ms], dtype=np.int64), (len(stats), 1))
+    else:
+        levels = np.asarray(levels)
+        if levels.shape != (len(stats),):
+            raise ValueError("O vetor de níveis deve conter um nível por linha de stats.")
+        unique_levels, inverse = np.unique(levels, return_inverse=True)
+        level_scales = np.array([calcular_ps_ms_por_nivel(int(lv)) for lv in unique_levels], dtype=np.int64).reshape(-1, 2)
+        scales = level_scales[inverse.reshape(-1)]
+        validate_query({1: 0, 2: 0, 3: 0, 4: 0}, 1, 1, max_groups, None)
+    code_chunks, row_chunks = [], []
+    pairs, pair_of_row = np.unique(scales, axis=0, return_inverse=True)
+    pair_of_row = pair_of_row.reshape(-1)
+    for pair_index, (pair_ps, pair_ms) in enumerate(pairs):
+        pair_rows = np.flatnonzero(pair_of_row == pair_index)
+        for start in range(0, len(pair_rows), BATCH_CHUNK_SIZE):
+            chunk_rows = pair_rows[start:start + BATCH_CHUNK_SIZE]
+            codes, rows = _solve_batch(stats[chunk_rows], int(pair_ps), int(pair_ms))
+            code_chunks.append(codes)
+            row_chunks.append(chunk_rows[rows])
+    codes = np.concatenate(code_chunks) if code_chunks else np.zeros(0, dtype=np.uint32)
+    rows = np.concatenate(row_chunks) if row_chunks else np.zeros(0, dtype=np.int64)
+    groups = count_groups_packed(codes)
+    if max_groups is not None:
+        keep = groups <= max_groups
+        codes, rows, groups = codes[keep], rows[keep], groups[keep]
+    order = np.lexsort((groups, rows))
+    codes, rows = codes[order], rows[order]
+    offsets = np.zeros(len(stats) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(stats)), out=offsets[1:])
+    return codes, offsets
+
+RANGE_ORDERS = ("groups", "total")
+"""
+Critérios de ordenação de `get_tiers_in_range`: "groups" (menos grupos usados e, em caso de empate, maior soma
+dos atributos) ou "total" (maior soma dos atributos e, em caso de empate, menos grupos usados).
+"""
+
+@lru_cache(maxsize=None)
+def _range_index() -> tuple[list[tuple[int, int, int, int]], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Versão vetorizada das chaves de `_mixed_index` usada por `get_tiers_in_range`, construída uma única vez por processo.
+
+    Retorna:
+
+        tuple: As chaves (somas mistas por atributo) em lista e como matriz (K, 4), o número de combinações mistas
+        de cada chave por grupos usados (K, 7) e todas as combinações de tiers puros (8^4, 4) em ordem lexicográfica.
+    """
+    mixed_counts = _mixed_counts()
+    keys = sorted(mixed_counts)
+    counts = np.array([mixed_counts[key] for key in keys], dtype=np.int64)
+    pure = np.array(list(product(range(MAX_TIER + 1), repeat=4)), dtype=np.int64)
+    return keys, np.array(keys, dtype=np.int64), counts, pure
+
+def _validate_bounds(bounds:dict[int, tuple[int, int | None]], ps:int, ms:int, k:int, order:str, max_groups:int | None) -> None:
+    """
+    Valida os parâmetros de uma consulta por intervalo, levantando ValueError conforme descrito em `get_tiers_in_range`.
+    """
+    if len(bounds) != 4 or any(len(bounds[i]) != 2 for i in range(1, 5)):
+        raise ValueError("O dicionário de limites deve conter exatamente 4 pares (mínimo, máximo).")
+    validate_query({i: bounds[i][0] for i in range(1, 5)}, ps, ms, max_groups, k)
+    for i in range(1, 5):
+        low, high = bounds[i]
+        if high is not None and (not isinstance(high, int) or high < low):
+            raise ValueError("O valor máximo de cada atributo deve ser um inteiro maior ou igual ao mínimo.")
+    if order not in RANGE_ORDERS:
+        raise ValueError(f"A ordenação deve ser uma entre {', '.join(RANGE_ORDERS)}.")
+
+def get_tiers_in_range(bounds:dict[int, tuple[int, int | None]], ps:int, ms:int, k:int = 10, order:str = "groups", max_groups:int | None = None) -> list[tuple[list[int], int]]:
+    """
+    Busca as `k` melhores configurações cujos atributos finais ficam dentro de um intervalo por atributo
+    (por exemplo, STR >= 100 e DEX >= 40), em vez de valores exatos como em `get_tiers`.
+
+    A busca é um branch-and-bound sobre as chaves de `_mixed_index`: fixadas as somas mistas de cada atributo,
+    os tiers puros admissíveis formam um intervalo independente por atributo, de onde sai um limite otimista para a chave:
+    para "groups", o menor número de grupos (tiers puros opcionais zerados); para "total", a maior soma alcançável
+    dentro do orçamento de grupos restante (os tiers puros obrigatórios no máximo admissível, mais os maiores tiers
+    opcionais que ainda cabem em max_groups menos os grupos mínimos).
+    As chaves são visitadas da melhor para a pior, e a busca termina assim que a melhor configuração da próxima
+    chave é pior que a k-ésima já encontrada. Empates são desfeitos pela ordem lexicográfica da configuração.
+
+    Parâmetros:
+
+        bounds (dict): Dicionário indexado de 1 a 4 com pares (mínimo, máximo) de cada atributo; máximo None indica sem limite.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        k (int): Número máximo de configurações retornadas.
+        order (str): Critério de ordenação, um de `RANGE_ORDERS`.
+        max_groups (int ou None): Número máximo de grupos distintos por configuração, sem limite caso não informado.
+
+    Retorna:
+
+        list[tuple[list[int], int]]: Até k pares (configuração de 10 tiers, grupos usados), da melhor para a pior.
+
+    Exceções:
+
+        ValueError: Se bounds não contiver 4 pares ou se algum máximo for menor que o mínimo correspondente.
+        ValueError: Se order não for um de `RANGE_ORDERS` ou se k não for um inteiro positivo.
+        ValueError: Nos mesmos casos de `get_tiers` para os mínimos, ps, ms e max_groups.
+    """
+    _validate_bounds(bounds, ps, ms, k, order, max_groups)
+    max_groups = MAX_GROUPS if max_groups is None else max_groups
+    key_list, keys, counts, pure_space = _range_index()
+    low = np.array([bounds[i][0] for i in range(1, 5)], dtype=np.int64)
+    high = np.array([MAX_TIER*ps + MAX_MIXED_PER_STAT*ms if bounds[i][1] is None else bounds[i][1] for i in range(1, 5)], dtype=np.int64)
+    mixed_part = ms*keys
+    if ps:
+        pure_low = np.maximum(0, -((mixed_part - low) // ps))
+        pure_high = np.minimum(MAX_TIER, (high - mixed_part) // ps)
+    else:
+        inside = (mixed_part >= low) & (mixed_part <= high)
+        pure_low = np.where(inside, 0, 1)
+        pure_high = np.zeros_like(pure_low)
+    min_mixed_groups = np.argmax(counts > 0, axis=1)
+    mixed_total = mixed_part.sum(axis=1)
+    required = pure_low > 0
+    best_groups = min_mixed_groups + required.sum(axis=1)
+    if order == "groups":
+        best_total = mixed_total + ps*np.where(required, pure_high, 0).sum(axis=1)
+    else:
+        optional = -np.sort(-np.where(required, 0, np.maximum(pure_high, 0)), axis=1)
+        optional_sums = np.hstack([np.zeros((len(keys), 1), dtype=np.int64), np.cumsum(optional, axis=1)])
+        budget = np.clip(max_groups - best_groups, 0, 4)
+        best_total = mixed_total + ps*(np.where(required, pure_high, 0).sum(axis=1) + optional_sums[np.arange(len(keys)), budget])
+    candidates = np.flatnonzero((pure_low <= pure_high).all(axis=1) & (best_groups <= max_groups))
+    if order == "groups":
+        candidates = candidates[np.lexsort((-best_total[candidates], best_groups[candidates]))]
+    else:
+        candidates = candidates[np.lexsort((best_groups[candidates], -best_total[candidates]))]
+    mixed_index = _mixed_index()
+    best = []
+    for key_id in candidates.tolist():
+        bound = (int(best_groups[key_id]), -int(best_total[key_id])) if order == "groups" else (-int(best_total[key_id]), int(best_groups[key_id]))
+        if len(best) == k and bound > best[-1][0]:
+            break
+        pure = pure_space[((pure_space >= pure_low[key_id]) & (pure_space <= pure_high[key_id])).all(axis=1)]
+        mixed_groups = np.flatnonzero(counts[key_id])
+        groups = (pure > 0).sum(axis=1)[:, None] + mixed_groups[None, :]
+        totals = np.broadcast_to((mixed_total[key_id] + ps*pure.sum(axis=1))[:, None], groups.shape)
+        rows = np.broadcast_to(np.arange(len(pure))[:, None], groups.shape)
+        valid = groups <= max_groups
+        groups, totals, rows = groups[valid], totals[valid], rows[valid]
+        branch_order = np.lexsort((rows, groups, -totals) if order == "total" else (rows, -totals, groups))
+        buckets = mixed_index[key_list[key_id]]
+        found = []
+        for branch in branch_order.tolist():
+            score = (int(groups[branch]), -int(totals[branch])) if order == "groups" else (-int(totals[branch]), int(groups[branch]))
+            if len(found) >= k or (len(best) == k and score > best[-1][0]):
+                break
+            pure_tier = tuple(pure[rows[branch]].tolist())
+            mixed_count = int(groups[branch]) - sum(1 for x in pure_tier if x > 0)
+            found.extend((score, pure_tier + mixed, int(groups[branch])) for mixed in buckets[mixed_count][:k - len(found)])
+        best = sorted(best + found)[:k]
+    return [(list(tier), groups) for _, tier, groups in best]
+
+def get_tier_stats(tier:list[int], ps:int, ms:int) -> list[int]:
+    """
+    Calcula os valores finais de STR, DEX, INT e LUK produzidos por uma configuração de 10 tiers.
+
+    Parâmetros:
+
+        tier (list[int]): Configuração de 10 tiers, no formato de `get_tiers`.
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+
+    Retorna:
+
+        list[int]: Valores finais dos 4 atributos.
+    """
+    stats = [ps*tier[i] for i in range(4)]
+    for t, (i, j) in zip(tier[4:], MIXED_PAIRS):
+        stats[i] += ms*t
+        stats[j] += ms*t
+    return stats
+
+def get_feasibility_grid(fixed:dict[int, int], ps:int, ms:int) -> np.ndarray:
+    """
+    Avalia de uma só vez um corte 2D do espaço de atributos: fixados os valores de dois atributos, calcula, para
+    cada par de valores dos outros dois (de 0 ao máximo alcançável com ps e ms), o menor número de grupos de uma
+    configuração que produz exatamente esses 4 valores. Em vez de uma consulta por célula, percorre uma única vez
+    as chaves de `_mixed_index` compatíveis com os atributos fixos e espalha o resultado na grade com `np.minimum.at`.
+
+    Parâmetros:
+
+        fixed (dict[int, int]): Dicionário com exatamente 2 atributos fixos, indexados de 1 a 4 (1: STR, 2: DEX, 3: INT, 4: LUK).
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+
+    Retorna:
+
+        np.ndarray: Matriz int8 quadrada onde a posição [i, j] guarda o menor número de grupos com o primeiro atributo
+        livre (na ordem STR, DEX, INT, LUK) igual a i e o segundo igual a j, ou -1 se não houver configuração.
+
+    Exceções:
+
+        ValueError: Se fixed não contiver exatamente 2 atributos entre 1 e 4.
+        ValueError: Nos mesmos casos de `get_tiers` para os valores fixos, ps e ms.
+    """
+    if len(fixed) != 2 or any(stat not in (1, 2, 3, 4) for stat in fixed):
+        raise ValueError("Informe exatamente 2 atributos fixos, indexados de 1 a 4.")
+    validate_query({i: fixed.get(i, 0) for i in range(1, 5)}, ps, ms, None, None)
+    (first_fixed, first_value), (second_fixed, second_value) = sorted(fixed.items())
+    first_axis, second_axis = (i - 1 for i in range(1, 5) if i not in fixed)
+    size = MAX_TIER*ps + MAX_MIXED_PER_STAT*ms + 1
+    grid = np.full((size, size), MAX_GROUPS + 1, dtype=np.int8)
+    _, keys, counts, _ = _range_index()
+    min_mixed_groups = np.argmax(counts > 0, axis=1)
+    table = _stat_decompositions(ps, ms)
+    pure = np.arange(MAX_TIER + 1 if ps else 1)
+    pure_groups = (pure > 0).astype(np.int8)
+    for x1, y1 in table.get(first_value, ()):
+        for x2, y2 in table.get(second_value, ()):
+            selected = (keys[:, first_fixed - 1] == y1) & (keys[:, second_fixed - 1] == y2)
+            base = min_mixed_groups[selected] + (x1 > 0) + (x2 > 0)
+            rows = ps*pure[None, :, None] + ms*keys[selected, first_axis][:, None, None]
+            columns = ps*pure[None, None, :] + ms*keys[selected, second_axis][:, None, None]
+            groups = base[:, None, None] + pure_groups[None, :, None] + pure_groups[None, None, :]
+            rows, columns, groups = np.broadcast_arrays(rows, columns, groups)
+            np.minimum.at(grid, (rows.ravel(), columns.ravel()), groups.ravel())
+    grid[grid > MAX_GROUPS] = -1
+    return grid
+
+def get_feasibility_grid_cached(fixed:dict[int, int], ps:int, ms:int) -> np.ndarray:
+    """
+    Versão de `get_feasibility_grid` servida pelo cache compartilhado `QUERY_CACHE`, indexado por (atributos fixos, ps, ms).
+    A matriz devolvida é somente leitura, pois é compartilhada entre sessões.
+    """
+    key = ("feasibility", tuple(sorted(fixed.items())), ps, ms)
+
+    def compute() -> np.ndarray:
+        grid = get_feasibility_grid(fixed, ps, ms)
+        grid.setflags(write=False)
+        return grid
+
+    return QUERY_CACHE.get_or_compute(key, compute)
+
+STAT_COUNT_CHUNK_SIZE = 1 << 22
+"""Quantidade de vetores de atributos (soma mista × combinação pura) processados por vez em `count_stat_vectors`."""
+
+def stats_base(ps:int, ms:int) -> int:
+    """
+    Retorna a base usada por `encode_stats`: um a mais que o maior valor alcançável por um atributo.
+    """
+    return MAX_TIER*ps + MAX_MIXED_PER_STAT*ms + 1
+
+def encode_stats(stats:np.ndarray, ps:int, ms:int) -> np.ndarray:
+    """
+    Codifica vetores de atributos (N, 4) num único inteiro por linha, na base de `stats_base`.
+    A ordem dos códigos é a ordem lexicográfica dos vetores.
+    """
+    base = stats_base(ps, ms)
+    stats = np.asarray(stats, dtype=np.int64)
+    return ((stats[:, 0]*base + stats[:, 1])*base + stats[:, 2])*base + stats[:, 3]
+
+def decode_stats(keys:np.ndarray, ps:int, ms:int) -> np.ndarray:
+    """
+    Inversa de `encode_stats`: devolve os vetores de atributos (N, 4) dos códigos informados.
+    """
+    base = stats_base(ps, ms)
+    stats = np.empty((len(keys), 4), dtype=np.int64)
+    keys = np.asarray(keys, dtype=np.int64)
+    for column in range(3, -1, -1):
+        keys, stats[:, column] = np.divmod(keys, base)
+    return stats
+
+def level_scales() -> list[tuple[int, int]]:
+    """
+    Retorna todos os pares (ps, ms) distintos produzidos por `calcular_ps_ms_por_nivel` nos níveis de 0 a 300.
+    """
+    return sorted({calcular_ps_ms_por_nivel(level) for level in range(301)})
+
+def count_stat_vectors(ps:int, ms:int, chunk_size:int = STAT_COUNT_CHUNK_SIZE) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Enumera o espaço completo de 8^10 configurações e conta quantas configurações produzem cada vetor de atributos.
+    O espaço é reduzido de duas formas: as 8^6 combinações mistas são agrupadas pela soma que adicionam a cada
+    atributo (as chaves de `_mixed_counts`, com a multiplicidade de cada uma), e, como o modelo é simétrico por
+    permutação dos atributos, apenas os vetores canônicos (em ordem não crescente) são guardados. O processamento
+    é feito em blocos de `chunk_size` linhas.
+
+    Parâmetros:
+
+        ps (int): Valor do tier puro (pure scale).
+        ms (int): Valor do tier misto (mixed scale).
+        chunk_size (int): Número de linhas processadas por bloco.
+
+    Retorna:
+
+        tuple[np.ndarray, np.ndarray]: Os códigos (ver `encode_stats`) dos vetores canônicos alcançáveis, em ordem
+        crescente, e o número de configurações de cada um.
+    """
+    mixed_counts = _mixed_counts()
+    sums = np.array(list(mixed_counts), dtype=np.int64)
+    multiplicity = np.array([sum(counts) for counts in mixed_counts.values()], dtype=np.int64)
+    pure = np.array(list(product(range(MAX_TIER + 1), repeat=4)), dtype=np.int64)*ps
+    step = max(1, chunk_size // len(pure))
+    key_parts, count_parts = [], []
+    for start in range(0, len(sums), step):
+        stats = (ms*sums[start:start + step])[:, None, :] + pure[None, :, :]
+        weights = np.repeat(multiplicity[start:start + step], len(pure))
+        stats = stats.reshape(-1, 4)
+        canonical = (stats[:, :-1] >= stats[:, 1:]).all(axis=1)
+        keys, inverse = np.unique(encode_stats(stats[canonical], ps, ms), return_inverse=True)
+        key_parts.append(keys)
+        count_parts.append(np.bincount(inverse, weights=weights[canonical]).astype(np.int64))
+    keys, inverse = np.unique(np.concatenate(key_parts), return_inverse=True)
+    return keys, np.bincount(inverse, weights=np.concatenate(count_parts)).astype(np.int64)
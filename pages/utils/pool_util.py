@@ -0,0 +1,122 @@
+import multiprocessing, os, threading, time
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any
+
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+"""Número de processos do pool compartilhado, deixando um núcleo livre para o servidor do streamlit."""
+
+MAX_PENDING_JOBS = 4*MAX_WORKERS
+"""Número máximo de tarefas em execução ou na fila; acima disso novas tarefas são recusadas (back-pressure)."""
+
+JOB_TIMEOUT = 30.0
+"""Tempo máximo, em segundos, que `run_job` espera pelo resultado de uma tarefa."""
+
+POLL_INTERVAL = 0.1
+"""Intervalo, em segundos, entre as verificações de `run_job` enquanto espera o resultado de uma tarefa."""
+
+class PoolBusyError(RuntimeError):
+    """
+    erro levantado quando o pool já possui `MAX_PENDING_JOBS` tarefas pendentes
+    """
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_PENDING_JOBS)
+_pending = 0
+_pending_lock = threading.Lock()
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    obtem o pool de processos compartilhado por todas as sessões, criando-o na primeira chamada.
+    os processos são iniciados com "spawn", pois o servidor do streamlit possui várias threads ativas
+
+    Retorna:
+
+    - ProcessPoolExecutor: o pool compartilhado
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+def queue_depth() -> int:
+    """
+    retorna o número de tarefas enviadas ao pool que ainda não terminaram (em execução ou na fila)
+    """
+    return _pending
+
+def _release_slot(_: Future) -> None:
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+    _slots.release()
+
+def submit_job(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """
+    envia uma tarefa ao pool compartilhado, recusando-a imediatamente caso o limite de tarefas pendentes tenha sido atingido
+
+    Parâmetros:
+
+    - fn (Callable): a função a ser executada, definida no nível de um modulo para que possa ser serializada
+    - args, kwargs: os argumentos da função
+
+    Retorna:
+
+    - Future: o resultado futuro da tarefa
+
+    Exceções:
+
+    - PoolBusyError: se houver `MAX_PENDING_JOBS` tarefas pendentes
+    """
+    global _pending
+    if not _slots.acquire(blocking=False):
+        raise PoolBusyError("O servidor está ocupado, tente novamente em instantes.")
+    try:
+        future = get_executor().submit(fn, *args, **kwargs)
+    except BaseException:
+        _slots.release()
+        raise
+    with _pending_lock:
+        _pending += 1
+    future.add_done_callback(_release_slot)
+    return future
+
+def run_job(fn: Callable[..., Any], *args: Any, timeout: float = JOB_TIMEOUT, on_wait: Callable[[float], None] | None = None, **kwargs: Any) -> Any:
+    """
+    executa uma tarefa no pool compartilhado e espera pelo seu resultado, liberando a GIL da thread da sessão.
+    enquanto espera, chama `on_wait` a cada `POLL_INTERVAL` segundos com o tempo decorrido; no streamlit, atualizar um
+    elemento nesse callback permite que um rerun da sessão interrompa a espera, caso em que a tarefa é cancelada.
+    uma tarefa que já começou a executar não pode ser interrompida, então apenas o seu resultado é descartado
+
+    Parâmetros:
+
+    - fn (Callable): a função a ser executada, definida no nível de um modulo para que possa ser serializada
+    - args, kwargs: os argumentos da função
+    - timeout (float): o tempo máximo de espera em segundos
+    - on_wait (Callable ou None): callback chamado durante a espera com o tempo decorrido em segundos
+
+    Retorna:
+
+    - Any: o valor retornado por fn
+
+    Exceções:
+
+    - PoolBusyError: se houver `MAX_PENDING_JOBS` tarefas pendentes
+    - TimeoutError: se a tarefa não terminar dentro de timeout segundos
+    """
+    future = submit_job(fn, *args, **kwargs)
+    start = time.monotonic()
+    try:
+        while True:
+            try:
+                return future.result(timeout=POLL_INTERVAL)
+            except FutureTimeoutError:
+                elapsed = time.monotonic() - start
+                if elapsed >= timeout:
+                    raise TimeoutError(f"A tarefa excedeu o tempo limite de {timeout:g} segundos.") from None
+                if on_wait is not None:
+                    on_wait(elapsed)
+    finally:
+        future.cancel()
@@ -0,0 +1,305 @@
+import argparse, re, sys
+from math import gcd, lcm
+
+import numpy as np
+
+from pages.utils.system_util import REDUCTION_ENGINES, SparseRow, generate_auxiliar_matrix
+from pages.utils.system_doc_util import build_system_artifacts
+
+ROW_PATTERN = r"M\.row\((\d+)\)"
+"""
+referencia a uma linha da matrix no codigo sage, com o indice capturado
+"""
+
+SAGE_STEP_PATTERNS = {
+    "swap": re.compile(rf"M\[(\d+)\], M\[(\d+)\] = {ROW_PATTERN}, {ROW_PATTERN}"),
+    "subtract": re.compile(rf"M\[(\d+)\] = {ROW_PATTERN}([+-])(?:(\d+)\*)?{ROW_PATTERN}"),
+    "multiply": re.compile(rf"M\[(\d+)\] = ([+-])(?:(\d+)\*)?{ROW_PATTERN}"),
+    "divide": re.compile(rf"M\[(\d+)\] = (-?){ROW_PATTERN}(?:/(\d+))?"),
+}
+"""
+formato de cada linha de passo produzida por `decode_step`, testados em ordem
+"""
+
+Assignment = tuple[int, list[tuple[int, int, int]]]
+"""
+atribuição M[alvo] = soma de (numerador/denominador)*M.row(linha), como (alvo, [(linha, numerador, denominador), ...])
+"""
+
+def parse_sage_step(line: str) -> list[Assignment]:
+    """
+    interpreta uma linha de passo do codigo sage como atribuições simultaneas de combinações lineares de linhas
+
+    Parâmetros:
+
+    - line (str): a linha do codigo sage, como produzida por `decode_step`
+
+    Retorna:
+
+    - list[Assignment]: as atribuições da linha (duas para uma troca, nenhuma para um comentario)
+
+    Exceções:
+
+    - ValueError: se a linha não corresponder a nenhum passo conhecido
+    """
+    if line.startswith("#"):
+        return []
+    for kind, pattern in SAGE_STEP_PATTERNS.items():
+        match = pattern.fullmatch(line)
+        if match is None:
+            continue
+        groups = match.groups()
+        if kind == "swap":
+            i, j, a, b = map(int, groups)
+            return [(i, [(a, 1, 1)]), (j, [(b, 1, 1)])]
+        if kind == "subtract":
+            target, row, sign, factor, other = groups
+            coefficient = int(factor or 1)*(1 if sign == "+" else -1)
+            return [(int(target), [(int(row), 1, 1), (int(other), coefficient, 1)])]
+        if kind == "multiply":
+            target, sign, factor, row = groups
+            return [(int(target), [(int(row), int(factor or 1)*(1 if sign == "+" else -1), 1)])]
+        target, sign, row, divisor = groups
+        return [(int(target), [(int(row), -1 if sign else 1, int(divisor or 1))])]
+    raise ValueError(f"passo do sage não reconhecido: {line!r}")
+
+def parse_sage_script(script: str) -> tuple[list[list[str]], list[str]]:
+    """
+    separa o codigo sage de `write_sage_code` na matrix estendida (celulas simbolicas) e nas linhas de passo
+
+    Parâmetros:
+
+    - script (str): o codigo sage, com ou sem o texto de apresentação e a cerca de markdown
+
+    Retorna:
+
+    - tuple[list[list[str]], list[str]]: as linhas da matrix, com cada celula como string ("0", "m", "p", "s1", ...),
+    e as linhas de passo, na ordem
+    """
+    matrix, steps = [], []
+    for line in script.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("[") and stripped.rstrip(",").endswith("]"):
+            matrix.append([cell.strip() for cell in stripped.rstrip(",")[1:-1].split(",")])
+        elif stripped.startswith("M[") or (stripped.startswith("#") and matrix):
+            steps.append(stripped)
+    return matrix, steps
+
+def symbolic_matrix(cells: list[list[str]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    converte a matrix estendida simbolica num tensor inteiro em que cada celula é um vetor de coeficientes sobre
+    (p, m, s_1, ..., s_n), com um denominador por linha
+
+    Parâmetros:
+
+    - cells (list[list[str]]): a matrix estendida, com as celulas "0", "m", "p" ou "s{k}"
+
+    Retorna:
+
+    - tuple[np.ndarray, np.ndarray]: os numeradores, de forma (linhas, colunas, 2 + n), e os denominadores, de forma (linhas,)
+
+    Exceções:
+
+    - ValueError: se alguma celula não for reconhecida
+    """
+    num_stats = len(cells)
+    numerators = np.zeros((num_stats, len(cells[0]), 2 + num_stats), dtype=np.int64)
+    for i, row in enumerate(cells):
+        for j, cell in enumerate(row):
+            if cell == "p":
+                numerators[i, j, 0] = 1
+            elif cell == "m":
+                numerators[i, j, 1] = 1
+            elif re.fullmatch(r"s\d+", cell):
+                numerators[i, j, 1 + int(cell[1:])] = 1
+            elif cell != "0":
+                raise ValueError(f"celula não reconhecida: {cell!r}")
+    return numerators, np.ones(num_stats, dtype=np.int64)
+
+def normalize_symbolic_row(numerators: np.ndarray, denominator: int) -> tuple[np.ndarray, int]:
+    """
+    divide o numerador e o denominador de uma linha pelo seu mdc, deixando o denominador positivo
+
+    Parâmetros:
+
+    - numerators (np.ndarray): os numeradores da linha, de forma (colunas, 2 + n)
+    - denominator (int): o denominador da linha
+
+    Retorna:
+
+    - tuple[np.ndarray, int]: a linha normalizada
+    """
+    d = gcd(int(np.gcd.reduce(numerators, axis=None)), denominator)
+    if denominator < 0:
+        d = -d
+    return numerators//d, denominator//d
+
+def execute_sage_steps(numerators: np.ndarray, denominators: np.ndarray, steps: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    aplica as linhas de passo do codigo sage a matrix simbolica, com aritmetica inteira exata
+
+    Parâmetros:
+
+    - numerators (np.ndarray): os numeradores, de `symbolic_matrix`
+    - denominators (np.ndarray): os denominadores, de `symbolic_matrix`
+    - steps (list[str]): as linhas de passo, de `parse_sage_script`
+
+    Retorna:
+
+    - tuple[np.ndarray, np.ndarray]: os numeradores e denominadores da matrix resultante (as entradas não são alteradas)
+
+    Exceções:
+
+    - ValueError: se algum passo não for reconhecido
+    """
+    numerators, denominators = numerators.copy(), denominators.copy()
+    for line in steps:
+        results = []
+        for target, terms in parse_sage_step(line):
+            denominator = lcm(*(den*int(denominators[row]) for row, _, den in terms))
+            combination = sum(numerators[row]*(num*(denominator//(den*int(denominators[row])))) for row, num, den in terms)
+            results.append((target, *normalize_symbolic_row(combination, denominator)))
+        for target, row_numerators, row_denominator in results:
+            numerators[target], denominators[target] = row_numerators, row_denominator
+    return numerators, denominators
+
+def expected_symbolic_matrix(reduced_matrix: list[SparseRow], num_stats: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    monta a matrix simbolica que o codigo sage deve produzir a partir da matrix reduzida: as colunas mistas e puras da
+    reduzida multiplicadas por m e p, e as colunas dos atributos combinadas na ultima coluna
+
+    Parâmetros:
+
+    - reduced_matrix (list[SparseRow]): a matrix reduzida esparsa
+    - num_stats (int): o numero de atributos
+
+    Retorna:
+
+    - tuple[np.ndarray, np.ndarray]: os numeradores e denominadores, no formato de `symbolic_matrix`
+    """
+    num_mixed = num_stats*(num_stats - 1)//2
+    numerators = np.zeros((num_stats, num_mixed + num_stats + 1, 2 + num_stats), dtype=np.int64)
+    denominators = np.ones(num_stats, dtype=np.int64)
+    for i, row in enumerate(reduced_matrix):
+        denominator = lcm(*(value.denominator for value in row.values()))
+        for k, value in row.items():
+            coefficient = int(value*denominator)
+            if k < num_mixed:
+                numerators[i, k, 1] = coefficient
+            elif k < num_mixed + num_stats:
+                numerators[i, k, 0] = coefficient
+            else:
+                numerators[i, -1, 2 + k - num_mixed - num_stats] = coefficient
+        denominators[i] = denominator
+    return numerators, denominators
+
+def same_symbolic_matrix(a: tuple[np.ndarray, np.ndarray], b: tuple[np.ndarray, np.ndarray]) -> bool:
+    """
+    compara duas matrizes simbolicas por produto cruzado dos numeradores e denominadores de cada linha
+
+    Parâmetros:
+
+    - a (tuple[np.ndarray, np.ndarray]): a primeira matrix
+    - b (tuple[np.ndarray, np.ndarray]): a segunda matrix
+
+    Retorna:
+
+    - bool: se as matrizes são iguais
+    """
+    (a_num, a_den), (b_num, b_den) = a, b
+    return a_num.shape == b_num.shape and bool(np.array_equal(a_num*b_den[:, None, None], b_num*a_den[:, None, None]))
+
+def solves_system(reduced_matrix: list[SparseRow], num_stats: int) -> bool:
+    """
+    confere que a matrix reduzida resolve o sistema original: com A = [A_dep | A_livre] as colunas das incognitas da matrix
+    auxiliar e a reduzida igual a [I | F | G], as variaveis dependentes x_dep = G*s - F*x_livre satisfazem A*x = s para
+    quaisquer s e x_livre, ou seja, A_dep*G = I e A_dep*F = A_livre
+
+    Parâmetros:
+
+    - reduced_matrix (list[SparseRow]): a matrix reduzida esparsa
+    - num_stats (int): o numero de atributos
+
+    Retorna:
+
+    - bool: se a solução satisfaz o sistema
+    """
+    auxiliar = np.array(generate_auxiliar_matrix(num_stats), dtype=np.int64)
+    num_unknowns = auxiliar.shape[1] - num_stats
+    denominator = lcm(*(value.denominator for row in reduced_matrix for value in row.values()))
+    scaled = np.zeros(auxiliar.shape, dtype=np.int64)
+    for i, row in enumerate(reduced_matrix):
+        for k, value in row.items():
+            scaled[i, k] = int(value*denominator)
+    dependent = auxiliar[:, :num_stats]
+    if not np.array_equal(scaled[:, :num_stats], denominator*np.eye(num_stats, dtype=np.int64)):
+        return False
+    if not np.array_equal(dependent @ scaled[:, num_unknowns:], denominator*np.eye(num_stats, dtype=np.int64)):
+        return False
+    return bool(np.array_equal(dependent @ scaled[:, num_stats:num_unknowns], denominator*auxiliar[:, num_stats:num_unknowns]))
+
+def check_system(num_stats: int, engine: str = "structured") -> list[str]:
+    """
+    valida offline o documento de um sistema: executa o codigo sage emitido sobre a matrix simbolica que ele mesmo define
+    e confere que o resultado é a matrix reduzida e que a reduzida resolve o sistema original
+
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos
+    - engine (str): o motor de escalonamento, uma das chaves de `REDUCTION_ENGINES`
+
+    Retorna:
+
+    - list[str]: os problemas encontrados, vazia se o sistema for valido
+    """
+    artifacts = build_system_artifacts(num_stats, engine)
+    cells, steps = parse_sage_script(artifacts.sage_code)
+    problems = []
+    try:
+        result = execute_sage_steps(*symbolic_matrix(cells), steps)
+    except ValueError as error:
+        return [str(error)]
+    if not same_symbolic_matrix(result, expected_symbolic_matrix(artifacts.reduced_matrix, num_stats)):
+        problems.append("o codigo sage não produz a matrix reduzida")
+    if not solves_system(artifacts.reduced_matrix, num_stats):
+        problems.append("a matrix reduzida não resolve o sistema original")
+    return problems
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    constroi o parser de argumentos da linha de comando
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m pages.utils.system_check_util",
+        description="Executa o codigo sage gerado para cada sistema sem o sage e confere o resultado.",
+    )
+    parser.add_argument("--max-stats", type=int, default=20, help="maior numero de atributos verificado (a partir de 2)")
+    parser.add_argument("--engine", choices=list(REDUCTION_ENGINES), action="append", help="motor verificado, todos caso omitido")
+    return parser
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    ponto de entrada da linha de comando, ver `build_parser`
+
+    Retorna:
+
+    - int: 0 se todos os sistemas forem validos, 1 caso contrario
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.max_stats < 2:
+        parser.error("--max-stats deve ser pelo menos 2")
+    total_failures = 0
+    for engine in args.engine or REDUCTION_ENGINES:
+        failures = 0
+        for num_stats in range(2, args.max_stats + 1):
+            problems = check_system(num_stats, engine)
+            for problem in problems:
+                print(f"{engine} n={num_stats}: {problem}", file=sys.stderr)
+            failures += bool(problems)
+        print(f"{engine}: {args.max_stats - 1} sistemas, {failures} com problemas")
+        total_failures += failures
+    return 1 if total_failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,382 @@
+import os, textwrap, re
+from collections.abc import Callable
+from fractions import Fraction
+from math import lcm
+from typing import NamedTuple
+from pages.utils.cache_util import LRUCache
+from pages.utils.system_util import REDUCTION_ENGINES, Step, SparseRow, Term, decode_step, convert_matrix, generate_extended_matrix, iter_reduced_systems
+
+SYSTEM_CACHE_MAX_BYTES = 64*1024*1024
+"""
+limite de memória do cache de artefatos dos sistemas (`SYSTEM_CACHE`)
+"""
+
+class SystemArtifacts(NamedTuple):
+    """
+    artefatos de um sistema que dependem apenas do numero de atributos e do motor de escalonamento: a matrix reduzida,
+    os passos e os codigos LaTeX/sage sem os textos de apresentação, que são aplicados depois por `render_system_sections`
+    """
+    num_stats: int
+    reduced_matrix: list[SparseRow]
+    steps: list[Step]
+    extended_code: str
+    sage_code: str
+    solution_code: str
+    verification_code: str
+
+SYSTEM_CACHE = LRUCache(SYSTEM_CACHE_MAX_BYTES, os.environ.get("SYSTEM_CACHE_PATH"))
+"""
+cache de artefatos dos sistemas compartilhado por todas as sessões do processo, usado por `get_system_artifacts`;
+se a variavel de ambiente SYSTEM_CACHE_PATH estiver definida, a pagina de sistemas chama `enable_persistence`, que carrega o cache desse arquivo
+e o grava nele ao final do processo principal
+"""
+
+def write_extended_matrix_markdown(matrix:list[list[str]], extended_matrix_introduction: str = "") -> tuple[str, str]:
+    """
+    escreve a matrix estendida em LaTeX
+
+    Parâmetros:
+
+    - matrix (list[list[str]]): a matrix estendida, de `generate_extended_matrix`
+    - extended_matrix_introduction (str): texto de apresentação colocado antes do codigo
+
+    Retorna:
+
+    - tuple[str, str]: o codigo LaTeX e o markdown com a apresentação
+    """
+    markdown = extended_matrix_introduction
+    header_size = len(matrix[0])
+    header = ''.join(['c']*(header_size - 1) + [':c'])
+    content = '\\\\\n'.join(['&'.join(map(str, row)) for row in matrix])
+    code = textwrap.dedent(f"""
+    $$
+    \\left[\\begin{{array}}{{{header}}}
+    {content}
+    \\end{{array}}\\right]
+    $$
+    """).replace("\t", "\t")
+    code = re.sub(" ( )+", "", code)
+    code = re.sub(r"s(\d+)", r"s_{\g<1>}", code)
+    if markdown:
+        markdown += "\n"
+    markdown += code
+    return code, markdown
+
+def write_sage_code(matrix:list[list[str]], num_stats:int, steps:list[Step], sage_code_introduction: str | None = None) -> str:
+    """
+    escreve o codigo sage que monta a matrix estendida e aplica os passos de escalonamento
+
+    Parâmetros:
+
+    - matrix (list[list[str]]): a matrix estendida, de `generate_extended_matrix`
+    - num_stats (int): o numero de atributos
+    - steps (list[Step]): os passos de escalonamento de um dos motores de `REDUCTION_ENGINES`
+    - sage_code_introduction (str ou None): texto de apresentação colocado antes do codigo
+
+    Retorna:
+
+    - str: o markdown com o bloco de codigo sage
+    """
+    variables = ['p', 'm'] + [f's{i}' for i in range(1, num_stats + 1)]
+    sage_variables_definition = f"var('{' '.join(variables)}')"
+    aux = ',\n    '.join([f"[{', '.join(row)}]" for row in matrix])
+    sage_matrix_definition = f"M = matrix([\n    {aux}\n])"
+    sage_step = [decode_step(step) for step in steps]
+    sage_step = '\n'.join(sage_step)
+    final_sage_code = ""
+    if sage_code_introduction is not None:
+        final_sage_code += f"{sage_code_introduction}\n\n"
+    final_sage_code += f"```sage\n{sage_variables_definition}\n{sage_matrix_definition}\n{sage_step}\nM\n```"
+    return final_sage_code
+
+def sort_variable(var:Term) -> tuple[int, str]:
+    return (-1 if var.value >= 0 else 1, var.var)
+
+def write_equation_formater(num: int) -> str:
+    return str(num) if num not in [-1, 1] else f"{'' if num == 1 else '-'}"
+
+def get_value(i: int, v: Term, m:int = 1) -> str:
+    sign = ''
+    if v.value >= 0:
+        sign += '+' if i > 0 else ''
+    else:
+        sign += '-'
+    body = f"{write_equation_formater(abs(v.value.numerator*(m//v.value.denominator)))}{v.var}"
+    return sign + body
+
+def write_equation(equation: list[Term], multiplier:str, first_sign: bool = False):
+    res = ""
+    if len(equation) == 0:
+        return res
+    all_negative = all(v.value < 0 for v in equation)
+    if all_negative:
+        equation = [Term(v.var, -v.value) for v in equation]
+    common = lcm(*[v.value.denominator for v in equation])
+    sign = "-" if all_negative else ("+" if first_sign else "")
+    if common == 1:
+        if len(equation) == 1:
+            v = equation[0]
+            body = f"{write_equation_formater(v.value.numerator)}{multiplier.replace('1', '')}{v.var}"
+            res = sign + body
+        else:
+            right = ''.join(get_value(i, v) for i, v in enumerate(sorted(equation, key=sort_variable)))
+            body = f"{multiplier.replace('1', '')}({right})"
+            res = sign + body
+    else:
+        if len(equation) == 1:
+            v = equation[0]
+            uper = f"{write_equation_formater(v.value.numerator)}{multiplier.replace('1', '')}{v.var}"
+            lower = f"{v.value.denominator}"
+            body = f"\\frac{{{uper}}}{{{lower}}}"
+            res = sign + body
+        else:
+            uper = f"{multiplier}"
+            lower = f"{common}"
+            right = ''.join(get_value(i, v, common) for i, v in enumerate(sorted(equation, key=sort_variable)))
+            body = f"\\frac{{{uper}}}{{{lower}}}({right})"
+            res = sign + body
+    return res
+
+def write_system_solution(matrix:list[SparseRow], num_stats:int, solution_introduction:str = "") -> tuple[str, str]:
+    """
+    escreve a solução do sistema em LaTeX, uma equação por variavel dependente
+
+    Parâmetros:
+
+    - matrix (list[SparseRow]): a matrix reduzida esparsa
+    - num_stats (int): o numero de atributos
+    - solution_introduction (str): texto de apresentação colocado antes do codigo
+
+    Retorna:
+
+    - tuple[str, str]: o codigo LaTeX e o markdown com a apresentação
+    """
+    converted = convert_matrix(matrix, num_stats)
+    markdown = solution_introduction
+    if markdown:
+        markdown += "\n\n"
+    latex_code = "$$\\begin{cases}\n"
+    for i, row in enumerate(converted):
+        dependent, equations = row["dependent"], row["equations"]
+        latex_code += dependent.var + "="
+        latex_code += write_equation(equations["pure"], "p")
+        latex_code += write_equation(equations["mixed"], "m", True)
+        latex_code += write_equation(equations["stats"], "1", True)
+        latex_code += ("\\\\" if i < num_stats - 1 else "") + "\n"
+    latex_code += "\\end{cases}$$"
+    markdown += latex_code
+    return latex_code, markdown
+
+def get_multiplier(var):
+    if 't' in var and ',' in var:
+        return 'm'
+    elif 't' in var:
+        return 'p'
+    else:
+        return ''
+
+def write_verification_head(converted):
+    latex = "."
+    aux = [get_multiplier(var.var) + var.var for var in converted[0]['equations']['pure'] + converted[0]['equations']['mixed'] + converted[0]['equations']['stats']]
+    latex += '&' + '&'.join(aux)
+    return latex
+
+def write_value(val: Fraction):
+    sign = ''
+    value = ''
+    if val < 0:
+        val = -val
+        sign = '-'
+    if val.denominator == 1:
+        value = str(val.numerator)
+    else:
+        value = f"\\frac{{{val.numerator}}}{{{val.denominator}}}"
+    return sign + value
+
+def write_verification_body(row):
+    dependent, equations = row["dependent"], row["equations"]
+    latex_code = f"{dependent.var}&"
+    aux = [write_value(var.value) for var in equations['pure'] + equations['mixed'] + equations['stats']]
+    latex_code += '&'.join(aux)
+    latex_code += "\\\\\\hline\n"
+    return latex_code
+
+def write_system_verification(matrix:list[SparseRow], num_stats:int, verification_introduction:str = "") -> tuple[str, str]:
+    """
+    escreve a tabela de verificação em LaTeX, com o coeficiente de cada variavel livre e atributo por variavel dependente
+
+    Parâmetros:
+
+    - matrix (list[SparseRow]): a matrix reduzida esparsa
+    - num_stats (int): o numero de atributos
+    - verification_introduction (str): texto de apresentação colocado antes do codigo
+
+    Retorna:
+
+    - tuple[str, str]: o codigo LaTeX e o markdown com a apresentação
+    """
+    converted = convert_matrix(matrix, num_stats, True)
+    markdown = verification_introduction
+    if markdown:
+        markdown += "\n\n"
+    head = '|'.join(['c'] + ['c']*sum(len(eq) for eq in converted[0]['equations'].values()))
+    latex_code = f"\\begin{{array}}{{|{head}|}}\\hline\n"
+    latex_code += write_verification_head(converted) + "\\\\\\hline\n"
+    for i, row in enumerate(converted):
+        latex_code += write_verification_body(row)
+    latex_code += "\\end{array}"
+    markdown += f"$${latex_code}$$"
+    return latex_code, markdown
+
+
+def build_system_artifacts(num_stats:int, engine: str = "structured", reduced: tuple[list[SparseRow], list[Step]] | None = None) -> SystemArtifacts:
+    """
+    escalona o sistema e escreve todos os seus codigos, sem textos de apresentação
+
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos
+    - engine (str): o motor de escalonamento, uma das chaves de `REDUCTION_ENGINES`
+    - reduced (tuple ou None): a matrix reduzida e os passos já calculados, escalonados com engine caso não informados
+
+    Retorna:
+
+    - SystemArtifacts: os artefatos do sistema
+    """
+    reduced_matrix, steps = REDUCTION_ENGINES[engine](num_stats, False) if reduced is None else reduced
+    extended_matrix = generate_extended_matrix(num_stats)
+    return SystemArtifacts(
+        num_stats,
+        reduced_matrix,
+        steps,
+        write_extended_matrix_markdown(extended_matrix)[0],
+        write_sage_code(extended_matrix, num_stats, steps),
+        write_system_solution(reduced_matrix, num_stats)[0],
+        write_system_verification(reduced_matrix, num_stats)[0],
+    )
+
+def build_all_system_artifacts(max_stats:int) -> list[SystemArtifacts]:
+    """
+    gera de uma só vez os artefatos de todos os sistemas de 2 até max_stats atributos, estendendo cada sistema reduzido
+    a partir do anterior (`iter_reduced_systems`) em vez de escalonar cada um do zero
+
+    Parâmetros:
+
+    - max_stats (int): o maior numero de atributos
+
+    Retorna:
+
+    - list[SystemArtifacts]: os artefatos de cada sistema, em ordem crescente de atributos (motor structured)
+    """
+    return [build_system_artifacts(num_stats, reduced=(matrix, steps)) for num_stats, matrix, steps in iter_reduced_systems(max_stats, False)]
+
+def get_system_artifacts(num_stats:int, engine: str = "structured", runner: Callable[..., SystemArtifacts] | None = None) -> SystemArtifacts:
+    """
+    versão de `build_system_artifacts` servida pelo cache compartilhado `SYSTEM_CACHE`, indexado por (num_stats, engine)
+
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos
+    - engine (str): o motor de escalonamento, uma das chaves de `REDUCTION_ENGINES`
+    - runner (Callable ou None): função que executa a geração em caso de falha no cache, chamada como
+    runner(build_system_artifacts, num_stats, engine) (por exemplo `pool_util.run_job`); chamada diretamente caso não informada
+
+    Retorna:
+
+    - SystemArtifacts: os artefatos do sistema
+    """
+    def compute() -> SystemArtifacts:
+        if runner is None:
+            return build_system_artifacts(num_stats, engine)
+        return runner(build_system_artifacts, num_stats, engine)
+
+    return SYSTEM_CACHE.get_or_compute(("system", num_stats, engine), compute)
+
+def get_all_system_artifacts(max_stats:int, runner: Callable[..., list[SystemArtifacts]] | None = None) -> list[SystemArtifacts]:
+    """
+    versão de `build_all_system_artifacts` servida pelo cache compartilhado `SYSTEM_CACHE`: se algum sistema de 2 até max_stats
+    estiver fora do cache, todos são gerados numa unica passada e armazenados com o motor structured.
+    a presença dos sistemas é verificada com `in`, então a consulta não conta falhas no cache
+
+    Parâmetros:
+
+    - max_stats (int): o maior numero de atributos
+    - runner (Callable ou None): função que executa a geração, chamada como runner(build_all_system_artifacts, max_stats);
+    chamada diretamente caso não informada
+
+    Retorna:
+
+    - list[SystemArtifacts]: os artefatos de cada sistema, em ordem crescente de atributos
+    """
+    keys = [("system", num_stats, "structured") for num_stats in range(2, max_stats + 1)]
+    if all(key in SYSTEM_CACHE for key in keys):
+        missing = object()
+        cached = [SYSTEM_CACHE.get(key, missing) for key in keys]
+        if all(artifacts is not missing for artifacts in cached):
+            return cached
+    all_artifacts = build_all_system_artifacts(max_stats) if runner is None else runner(build_all_system_artifacts, max_stats)
+    for artifacts in all_artifacts:
+        SYSTEM_CACHE.put(("system", artifacts.num_stats, "structured"), artifacts)
+    return all_artifacts
+
+def add_introduction(introduction: str, code: str, separator: str) -> str:
+    """
+    aplica um texto de apresentação antes de um codigo, omitindo o separador quando o texto é vazio
+
+    Parâmetros:
+
+    - introduction (str): o texto de apresentação
+    - code (str): o codigo
+    - separator (str): o separador entre o texto e o codigo
+
+    Retorna:
+
+    - str: o markdown resultante
+    """
+    return f"{introduction}{separator}{code}" if introduction else code
+
+def render_system_sections(artifacts: SystemArtifacts, extended_matrix_introduction: str = "", sage_code_introduction: str | None = None, solution_introduction: str = "", verification_introduction: str = "") -> dict[str, str]:
+    """
+    aplica os textos de apresentação aos artefatos de um sistema, custando apenas a concatenação das strings
+
+    Parâmetros:
+
+    - artifacts (SystemArtifacts): os artefatos do sistema
+    - extended_matrix_introduction (str): texto de apresentação da matrix estendida
+    - sage_code_introduction (str ou None): texto de apresentação do codigo sage
+    - solution_introduction (str): texto de apresentação da solução
+    - verification_introduction (str): texto de apresentação da verificação
+
+    Retorna:
+
+    - dict[str, str]: o markdown de cada seção ("extended", "sage", "solution" e "verification") e o documento completo ("final")
+    """
+    sections = {
+        "extended": add_introduction(extended_matrix_introduction, artifacts.extended_code, "\n"),
+        "sage": artifacts.sage_code if sage_code_introduction is None else f"{sage_code_introduction}\n\n{artifacts.sage_code}",
+        "solution": add_introduction(solution_introduction, artifacts.solution_code, "\n\n"),
+        "verification": add_introduction(verification_introduction, f"$${artifacts.verification_code}$$", "\n\n"),
+    }
+    sections["final"] = sections["extended"] + "\n" + sections["sage"] + "\n\n" + sections["solution"] + "\n\n" + sections["verification"]
+    return sections
+
+def generate_all_documents(max_stats:int, extended_matrix_introduction: str = "", sage_code_introduction: str | None = None, solution_introduction: str = "", verification_introduction: str = "") -> dict[int, str]:
+    """
+    gera de uma só vez os documentos markdown de todos os sistemas de 2 até max_stats atributos (`build_all_system_artifacts`)
+
+    Parâmetros:
+
+    - max_stats (int): o maior numero de atributos
+    - extended_matrix_introduction (str): texto de apresentação da matrix estendida
+    - sage_code_introduction (str ou None): texto de apresentação do codigo sage
+    - solution_introduction (str): texto de apresentação da solução
+    - verification_introduction (str): texto de apresentação da verificação
+
+    Retorna:
+
+    - dict[int, str]: o markdown final de cada numero de atributos
+    """
+    return {
+        artifacts.num_stats: render_system_sections(artifacts, extended_matrix_introduction, sage_code_introduction, solution_introduction, verification_introduction)["final"]
+        for artifacts in build_all_system_artifacts(max_stats)
+    }
@@ -1,6 +1,8 @@
+from collections.abc import Iterator
+from fractions import Fraction
 from itertools import combinations
-from math import lcm
-from typing import Tuple, Literal, Union
+from math import gcd, lcm
+from typing import NamedTuple, Tuple, Literal, Union
 
 Step = Union[
     Tuple[Literal["swap"], int, int],
@@ -13,9 +15,80 @@ Step = Union[
 tipo customizado para anotar "step"
 """
 
-def generate_extended_matrix(num_stats: int) -> list[list[str]]:
+SparseRow = dict[int, int | str | Fraction]
+"""
+linha esparsa de uma matrix: mapeia o indice da coluna (0-indexado) para o valor, omitindo os zeros;
+os valores são simbolos (matrix estendida), inteiros (matrix auxiliar) ou racionais exatos (matrix reduzida)
+"""
+
+ZERO = Fraction(0)
+"""
+zero racional, usado nas posições omitidas da matrix reduzida esparsa
+"""
+
+class Term(NamedTuple):
     """
-    gera a matrix estendida do sistema de equações decorente do problem "n-{1,2}"
+    termo de uma equação da solução: o simbolo da variavel (ou atributo) e o seu coeficiente racional exato
+    """
+    var: str
+    value: Fraction
+
+def mixed_column(num_stats: int, i: int, j: int) -> int:
+    """
+    calcula o indice da coluna mista mt_{i+1,j+1} na ordem de `combinations(range(num_stats), 2)`
+
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos do sistema
+    - i (int): o menor atributo do par, 0-indexado
+    - j (int): o maior atributo do par, 0-indexado
+
+    Retorna:
+
+    - int: o indice da coluna, 0-indexado
+    """
+    return i*(2*num_stats - i - 1)//2 + j - i - 1
+
+def matrix_width(num_stats: int) -> int:
+    """
+    calcula a largura da matrix auxiliar (e da matrix reduzida): n*(n-1)/2 colunas mistas, n puras e n de atributos
+
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos do sistema
+
+    Retorna:
+
+    - int: o numero de colunas
+    """
+    return num_stats*(num_stats - 1)//2 + 2*num_stats
+
+def to_dense(matrix: list[SparseRow], width: int, zero: int | str = 0) -> list[list[int | str]]:
+    """
+    converte uma matrix esparsa numa lista de listas densa
+
+    Parâmetros:
+
+    - matrix (list[SparseRow]): a matrix esparsa
+    - width (int): o numero de colunas
+    - zero (int ou str): o valor usado nas posições omitidas
+
+    Retorna:
+
+    - list[list]: a matrix densa
+    """
+    dense = []
+    for row in matrix:
+        values = [zero]*width
+        for k, value in row.items():
+            values[k] = value
+        dense.append(values)
+    return dense
+
+def generate_sparse_extended_matrix(num_stats: int) -> list[SparseRow]:
+    """
+    gera a matrix estendida do sistema de equações decorente do problem "n-{1,2}" em forma esparsa,
+    com n+1 elementos não nulos por linha
     
     Parâmetros:
 
@@ -23,28 +96,59 @@ def generate_extended_matrix(num_stats: int) -> list[list[str]]:
 
     Retorna:
 
-    - list[list[str]]: uma matrix de n linhas e n + n*(n-1)/2 + 1 colunas que representa simbolicamente a matrix extendida
+    - list[SparseRow]: n linhas com os simbolos "m", "p" e "s{i}" nas colunas correspondentes
     """
+    num_mixed = num_stats * (num_stats - 1)//2
     matrix = []
+    for i in range(num_stats):
+        row = {}
+        for j in range(num_stats):
+            if j != i:
+                row[mixed_column(num_stats, min(i, j), max(i, j))] = "m"
+        row[num_mixed + i] = "p"
+        row[num_mixed + num_stats] = "s" + str(i + 1)
+        matrix.append(row)
+    return matrix
+
+def generate_sparse_auxiliar_matrix(num_stats: int) -> list[SparseRow]:
+    """
+    gera a matrix auxiliar do sistema de equações decorente do problem "n-{1,2}" em forma esparsa,
+    com n+1 elementos não nulos por linha
+    
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos do sistema
+
+    Retorna:
+
+    - list[SparseRow]: n linhas com 1 nas colunas mistas, pura e de atributo correspondentes
+    """
     num_mixed = num_stats * (num_stats - 1)//2
-    for i in range(1, num_stats + 1):
-        row = []
-        mixed_index = combinations(range(1, num_stats + 1), 2)
-        for j, combo in zip(range(1, num_mixed + 1), mixed_index):
-            j, k = combo
-            if i == j or i == k:
-                row.append("m")
-            else:
-                row.append("0")
-        for j in range(1, num_stats + 1):
-            if i == j:
-                row.append("p")
-            else:
-                row.append("0")
-        row.append("s" + str(i))
+    matrix = []
+    for i in range(num_stats):
+        row = {}
+        for j in range(num_stats):
+            if j != i:
+                row[mixed_column(num_stats, min(i, j), max(i, j))] = 1
+        row[num_mixed + i] = 1
+        row[num_mixed + num_stats + i] = 1
         matrix.append(row)
     return matrix
 
+def generate_extended_matrix(num_stats: int) -> list[list[str]]:
+    """
+    gera a matrix estendida do sistema de equações decorente do problem "n-{1,2}"
+    
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos do sistema
+
+    Retorna:
+
+    - list[list[str]]: uma matrix de n linhas e n + n*(n-1)/2 + 1 colunas que representa simbolicamente a matrix extendida
+    """
+    return to_dense(generate_sparse_extended_matrix(num_stats), num_stats*(num_stats - 1)//2 + num_stats + 1, "0")
+
 def generate_auxiliar_matrix(num_stats: int) -> list[list[int]]:
     """
     gera a matrix auxiliar do sistema de equações decorente do problem "n-{1,2}"
@@ -57,29 +161,7 @@ def generate_auxiliar_matrix(num_stats: int) -> list[list[int]]:
 
     - list[list[int]]: uma matrix de n linhas e n + n*(n-1)/2 + n colunas para auxilio da extração da logica de escalonamento do sistema
     """
-    matrix = []
-    num_mixed = num_stats * (num_stats - 1)//2
-    for i in range(1, num_stats + 1):
-        row = []
-        mixed_index = combinations(range(1, num_stats + 1), 2)
-        for j, combo in zip(range(1, num_mixed + 1), mixed_index):
-            j, k = combo
-            if i == j or i == k:
-                row.append(1)
-            else:
-                row.append(0)
-        for j in range(1, num_stats + 1):
-            if i == j:
-                row.append(1)
-            else:
-                row.append(0)
-        for j in range(1, num_stats + 1):
-            if i == j:
-                row.append(1)
-            else:
-                row.append(0)
-        matrix.append(row)
-    return matrix
+    return to_dense(generate_sparse_auxiliar_matrix(num_stats), matrix_width(num_stats))
 
 def value_format(value: int | str, extra: str = "") -> str:
     """
@@ -122,7 +204,7 @@ def decode_step(step: Step) -> str:
     """
     if step[0] == "swap":
         i, j = step[1], step[2]
-        return f"M[{i}], M[{j}] = M.row({j}), M.row({j})"
+        return f"M[{i}], M[{j}] = M.row({j}), M.row({i})"
     elif step[0] == "subtract":
         i, j, factor = step[1], step[2], step[3]
         return f"M[{j}] = M.row({j}){value_format(-factor, '*')}M.row({i})"
@@ -138,17 +220,16 @@ def decode_step(step: Step) -> str:
     else:
         raise NotImplementedError(f"Unknown step type: {step[0]}")
 
-def scale_by_a_factor(matrix: list[list[int]], i: int, j: int, steps: list[Step], matrix_width: int | None = None, pivot: int | None = None, ref: int | None = None) -> tuple[int, int]:
+def scale_by_a_factor(matrix: list[SparseRow], i: int, j: int, steps: list[Step], pivot: int | None = None, ref: int | None = None) -> tuple[int, int]:
     """
     efetua a sincronização da linha i com a linha j da matrix auxiliar a fim de evitar a divisão e eventuais problemas de precisão numerica
     
     Parâmetros:
 
-    - matrix (list[list[int]]): a matrix auxiliar
+    - matrix (list[SparseRow]): a matrix auxiliar, em forma esparsa
     - i (int): o indice da primeira linha, 0-indexado
     - j (int): o indice da segunda linha, 0-indexado
     - steps (list[tuple]): uma lista a qual sera populada com os passos equivalente gerado nessa operação
-    - matrix_width (int ou None): um inteiro representando a largura da linha, sendo calculada com base na primeira linha caso não informado
     - pivot (int ou None): o elemento pivo da linha i, sendo calculado como o elemento de indice i da linha i caso não informado
     - ref (int ou None): o elemento de referencia da linha j, sendo calculado como o elemento de indice i da linha j caso não informado
 
@@ -156,7 +237,6 @@ def scale_by_a_factor(matrix: list[list[int]], i: int, j: int, steps: list[Step]
 
     - tuple[int, int]: uma tupla de elementos iguais (o minimo multiplo comun do pivo e do elemento de referencia), com substituir ambos o pivo e a referencia simultaneamente)
     """
-    matrix_width = len(matrix[i]) if matrix_width is None else matrix_width
     pivot = matrix[i][i] if pivot is None else pivot
     ref = matrix[j][i] if ref is None else ref
     common_ground = lcm(ref, pivot)
@@ -164,64 +244,434 @@ def scale_by_a_factor(matrix: list[list[int]], i: int, j: int, steps: list[Step]
     scale_pivot = common_ground // pivot
     steps.append(("multiply", i, scale_pivot))
     steps.append(("multiply", j, scale_ref))
-    for k in range(matrix_width):
+    for k in matrix[i]:
         matrix[i][k] *= scale_pivot
+    for k in matrix[j]:
         matrix[j][k] *= scale_ref
     return common_ground, common_ground
 
-def apply_row_elimination(matrix: list[list[int]], i: int, j: int, steps: list[Step], matrix_width: int | None = None, pivot: int | None = None) -> None:
+def apply_row_elimination(matrix: list[SparseRow], i: int, j: int, steps: list[Step], pivot: int | None = None) -> None:
     """
-    aplica o processo de eliminação da linha j pela linha i, funciona tanto na subida quando na descida
+    aplica o processo de eliminação da linha j pela linha i, funciona tanto na subida quando na descida;
+    só os elementos não nulos da linha i são percorridos
     
     Parâmetros:
 
-    - matrix (list[list[int]]): a matrix auxiliar
+    - matrix (list[SparseRow]): a matrix auxiliar, em forma esparsa
     - i (int): o indice da primeira linha, 0-indexado
     - j (int): o indice da segunda linha, 0-indexado
     - steps (list[tuple]): uma lista a qual sera populada com os passos equivalente gerado nessa operação
-    - matrix_width (int ou None): um inteiro representando a largura da linha, sendo calculada com base na primeira linha caso não informado
     - pivot (int ou None): o elemento pivo da linha i, sendo calculado como o elemento de indice i da linha i caso não informado
 
     Retorna:
 
     - None: não há retorno, apenas a população da lista steps com os passos equivalentes
     """
-    matrix_width = len(matrix[i]) if matrix_width is None else matrix_width
     pivot = matrix[i][i] if pivot is None else pivot
-    ref = matrix[j][i]
+    ref = matrix[j].get(i, 0)
     if ref == 0:
         return
     if ref%pivot != 0:
-        ref, pivot = scale_by_a_factor(matrix, i, j, steps, matrix_width, pivot, ref)
+        ref, pivot = scale_by_a_factor(matrix, i, j, steps, pivot, ref)
     factor = matrix[j][i] // matrix[i][i]
-    for k in range(matrix_width):
-        matrix[j][k] -= factor * matrix[i][k]
+    subtract_row(matrix[j], matrix[i], factor)
     steps.append(("subtract", i, j, factor))
 
-def get_variable(value:str, var:str, remove_multiplier: bool = False) -> list[list, str]:
+def subtract_row(row: SparseRow, other: SparseRow, factor: int) -> None:
+    """
+    subtrai de uma linha esparsa outra linha multiplicada por um fator, removendo os elementos que se anulam
+
+    Parâmetros:
+
+    - row (SparseRow): a linha alterada no lugar
+    - other (SparseRow): a linha subtraida
+    - factor (int): o fator que multiplica other
+
+    Retorna:
+
+    - None: a linha row é alterada no lugar
+    """
+    for k, value in other.items():
+        result = row.get(k, 0) - factor*value
+        if result:
+            row[k] = result
+        else:
+            row.pop(k, None)
+
+def reduce_auxiliar_matrix(num_stats: int, ignore_comments: bool = True) -> tuple[list[SparseRow], list[Step]]:
+    """
+    escalona a matrix auxiliar do sistema (triangularização, substituição reversa e normalização), registrando os passos equivalentes
+    
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos do sistema
+    - ignore_comments (bool): se os passos de comentario separando as etapas devem ser omitidos
+
+    Retorna:
+
+    - tuple[list[SparseRow], list[Step]]: a matrix reduzida esparsa, com cada elemento não nulo como Fraction, e a lista de passos
+
+    Exceções:
+
+    - NotImplementedError: se algum pivo não puder ser obtido por troca de linhas
+    """
+    aux_matrix = generate_sparse_auxiliar_matrix(num_stats)
+    aux_steps = []
+    if not ignore_comments:
+        aux_steps.append(("comment", "fist step: upper triangularization"))
+    for i in range(num_stats):
+        if aux_matrix[i].get(i, 0) == 0:
+            for j in range(i, num_stats):
+                if aux_matrix[j].get(i, 0) != 0:
+                    aux_matrix[i], aux_matrix[j] = aux_matrix[j], aux_matrix[i]
+                    aux_steps.append(("swap", i, j))
+        pivot = aux_matrix[i].get(i, 0)
+        if pivot == 0:
+            raise NotImplementedError("the function can't handle this case yet")
+        for j in range(i + 1, num_stats):
+            apply_row_elimination(aux_matrix, i, j, aux_steps, pivot)
+    if not ignore_comments:
+        aux_steps.append(("comment", "second step: back substitution"))
+    for i in range(num_stats-1, -1, -1):
+        pivot = aux_matrix[i][i]
+        for j in range(i - 1, -1, -1):
+            apply_row_elimination(aux_matrix, i, j, aux_steps, pivot)
+    if not ignore_comments:
+        aux_steps.append(("comment", "third step: normalization"))
+    for i in range(num_stats):
+        factor = aux_matrix[i][i]
+        aux_matrix[i] = normalize_row(aux_matrix[i], factor)
+        if factor != 1:
+            aux_steps.append(("divide", i, factor))
+    return aux_matrix, aux_steps
+
+def normalize_row(row: SparseRow, factor: int) -> SparseRow:
+    """
+    divide uma linha esparsa da matrix auxiliar por um fator, convertendo cada elemento numa fração irredutivel
+
+    Parâmetros:
+
+    - row (SparseRow): a linha a ser normalizada
+    - factor (int): o fator de divisão, normalmente o pivo da linha
+
+    Retorna:
+
+    - SparseRow: a linha normalizada, em ordem de coluna, com cada elemento como Fraction
+    """
+    return {k: Fraction(row[k], factor) for k in sorted(row)}
+
+def bareiss_eliminate(matrix: list[SparseRow], i: int, j: int, steps: list[Step]) -> None:
+    """
+    elimina o elemento de indice i da linha j usando a linha i sem frações: a linha j vira pivo*linha_j - ref*linha_i
+    (ambos divididos pelo mdc entre pivo e ref) e em seguida é dividida pelo mdc dos seus elementos
+
+    como no metodo de Bareiss, o pivo anterior sempre divide a nova linha, então a normalização pelo mdc remove pelo menos
+    esse fator e os inteiros ficam limitados pelos menores da matrix original, em vez de crescerem a cada passo
+
+    Parâmetros:
+
+    - matrix (list[SparseRow]): a matrix auxiliar, em forma esparsa
+    - i (int): o indice da linha pivo, 0-indexado
+    - j (int): o indice da linha a ser eliminada, 0-indexado
+    - steps (list[tuple]): uma lista a qual sera populada com os passos equivalente gerado nessa operação
+
+    Retorna:
+
+    - None: não há retorno, a matrix é alterada no lugar e a lista steps é populada
+    """
+    pivot, ref = matrix[i][i], matrix[j].get(i, 0)
+    if ref == 0:
+        return
+    d = gcd(pivot, ref)
+    scale, factor = pivot//d, ref//d
+    if scale < 0:
+        scale, factor = -scale, -factor
+    if scale != 1:
+        steps.append(("multiply", j, scale))
+    steps.append(("subtract", i, j, factor))
+    row = matrix[j] if scale == 1 else {k: scale*value for k, value in matrix[j].items()}
+    subtract_row(row, matrix[i], factor)
+    content = gcd(*row.values())
+    if content > 1:
+        steps.append(("divide", j, content))
+        row = {k: value//content for k, value in row.items()}
+    matrix[j] = row
+
+def reduce_bareiss_matrix(num_stats: int, ignore_comments: bool = True) -> tuple[list[SparseRow], list[Step]]:
+    """
+    escalona a matrix auxiliar do sistema com eliminação livre de frações (estilo Bareiss, com normalização das linhas
+    pelo mdc), nas mesmas etapas de `reduce_auxiliar_matrix`; os passos diferem dos de `reduce_auxiliar_matrix`, mas são
+    equivalentes e a matrix reduzida é a mesma
+
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos do sistema
+    - ignore_comments (bool): se os passos de comentario separando as etapas devem ser omitidos
+
+    Retorna:
+
+    - tuple[list[SparseRow], list[Step]]: a matrix reduzida esparsa, com cada elemento não nulo como Fraction, e a lista de passos
+
+    Exceções:
+
+    - NotImplementedError: se algum pivo não puder ser obtido por troca de linhas
+    """
+    aux_matrix = generate_sparse_auxiliar_matrix(num_stats)
+    aux_steps = []
+    if not ignore_comments:
+        aux_steps.append(("comment", "fist step: upper triangularization"))
+    for i in range(num_stats):
+        if aux_matrix[i].get(i, 0) == 0:
+            j = next((j for j in range(i + 1, num_stats) if aux_matrix[j].get(i, 0) != 0), None)
+            if j is None:
+                raise NotImplementedError("the function can't handle this case yet")
+            aux_matrix[i], aux_matrix[j] = aux_matrix[j], aux_matrix[i]
+            aux_steps.append(("swap", i, j))
+        for j in range(i + 1, num_stats):
+            bareiss_eliminate(aux_matrix, i, j, aux_steps)
+    if not ignore_comments:
+        aux_steps.append(("comment", "second step: back substitution"))
+    for i in range(num_stats - 1, -1, -1):
+        for j in range(i - 1, -1, -1):
+            bareiss_eliminate(aux_matrix, i, j, aux_steps)
+    if not ignore_comments:
+        aux_steps.append(("comment", "third step: normalization"))
+    for i in range(num_stats):
+        factor = aux_matrix[i][i]
+        aux_matrix[i] = normalize_row(aux_matrix[i], factor)
+        if factor != 1:
+            aux_steps.append(("divide", i, factor))
+    return aux_matrix, aux_steps
+
+def structured_reduction_steps(num_stats: int, ignore_comments: bool = True) -> list[Step]:
+    """
+    gera diretamente a sequencia de passos que `reduce_auxiliar_matrix` produziria, aproveitando a estrutura fixa do sistema
+    (colunas puras identidade e colunas mistas formando a matrix de incidencia do grafo completo), sem escalonar nada
+
+    as variaveis dependentes são mt_{1,2}, ..., mt_{1,n} e mt_{2,3}; a eliminação da matrix 3x3 inicial e das demais linhas
+    segue sempre o mesmo padrão, de modo que a lista tem O(n²) passos e é gerada em O(n²)
+
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos do sistema, a partir de 4 (casos menores não seguem o padrão)
+    - ignore_comments (bool): se os passos de comentario separando as etapas devem ser omitidos
+
+    Retorna:
+
+    - list[Step]: a lista de passos, identica a de `reduce_auxiliar_matrix`
+
+    Exceções:
+
+    - ValueError: se num_stats for menor que 4
+    """
+    if num_stats < 4:
+        raise ValueError("o padrão estruturado só vale para 4 ou mais atributos")
+    last = num_stats - 1
+    steps = []
+    if not ignore_comments:
+        steps.append(("comment", "fist step: upper triangularization"))
+    steps.append(("subtract", 0, 1, 1))
+    for i in range(1, last):
+        steps.append(("subtract", i, i + 1, -1))
+    if not ignore_comments:
+        steps.append(("comment", "second step: back substitution"))
+    for j in range(last - 1, 1, -1):
+        steps.append(("subtract", last, j, 1))
+    steps.append(("multiply", last, 1))
+    steps.append(("multiply", 1, 2))
+    steps.append(("subtract", last, 1, 1))
+    for i in range(last - 1, 1, -1):
+        for j in range(i - 1, 1, -1):
+            steps.append(("subtract", i, j, 1))
+        steps.append(("subtract", i, 1, 2))
+        steps.append(("subtract", i, 0, -1))
+    steps.append(("multiply", 1, -1))
+    steps.append(("multiply", 0, 2))
+    steps.append(("subtract", 1, 0, 1))
+    if not ignore_comments:
+        steps.append(("comment", "third step: normalization"))
+    steps.append(("divide", 0, 2))
+    steps.append(("divide", 1, 2))
+    for i in range(2, last):
+        steps.append(("divide", i, -1))
+    steps.append(("divide", last, 2))
+    return steps
+
+def structured_inverse_entry(num_stats: int, i: int, k: int) -> int:
+    """
+    calcula em O(1) o dobro do elemento (i, k) da inversa da submatrix formada pelas colunas das variaveis dependentes,
+    ou seja, o dobro do coeficiente do atributo s_{k+1} na linha i da matrix reduzida (o dobro mantem tudo inteiro)
+
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos do sistema, a partir de 4
+    - i (int): o indice da linha, 0-indexado
+    - k (int): o indice do atributo, 0-indexado
+
+    Retorna:
+
+    - int: o dobro do coeficiente, sempre em {-1, 0, 1, 2}
+    """
+    if i == 0:
+        return 1 if k in (0, 1) else -1
+    if i == 1:
+        return 1 if k in (0, 2) else -1
+    if i == num_stats - 1:
+        return -1 if k == 0 else 1
+    return 2 if k == i + 1 else 0
+
+def structured_reduced_matrix(num_stats: int) -> list[SparseRow]:
+    """
+    monta diretamente a matrix reduzida do sistema a partir da forma fechada da inversa (`structured_inverse_entry`):
+    cada coluna mista livre mt_{a,b} vale a soma das colunas dos atributos a e b, e as colunas puras repetem as dos atributos
+
+    cada elemento custa O(1), então o custo é proporcional ao tamanho da matrix, em vez da eliminação generica
+
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos do sistema, a partir de 4
+
+    Retorna:
+
+    - list[SparseRow]: a matrix reduzida esparsa, identica a de `reduce_auxiliar_matrix`
+    """
+    halves = {value: Fraction(value, 2) for value in range(-2, 5)}
+    num_mixed = num_stats*(num_stats - 1)//2
+    free_pairs = list(enumerate(combinations(range(num_stats), 2)))[num_stats:]
+    matrix = []
+    for i in range(num_stats):
+        inverse = [structured_inverse_entry(num_stats, i, k) for k in range(num_stats)]
+        row = {i: Fraction(1)}
+        for j, (a, b) in free_pairs:
+            if inverse[a] + inverse[b]:
+                row[j] = halves[inverse[a] + inverse[b]]
+        for offset in (num_mixed, num_mixed + num_stats):
+            for k, value in enumerate(inverse):
+                if value:
+                    row[offset + k] = halves[value]
+        matrix.append(row)
+    return matrix
+
+def reduce_structured_matrix(num_stats: int, ignore_comments: bool = True) -> tuple[list[SparseRow], list[Step]]:
+    """
+    versão estruturada de `reduce_auxiliar_matrix`: mesma saida, mas obtida pelas formas fechadas de
+    `structured_reduced_matrix` e `structured_reduction_steps`, o que permite sistemas bem maiores;
+    para menos de 4 atributos a matrix é minuscula e o caminho generico é usado
+
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos do sistema
+    - ignore_comments (bool): se os passos de comentario separando as etapas devem ser omitidos
+
+    Retorna:
+
+    - tuple[list[SparseRow], list[Step]]: a matrix reduzida esparsa e a lista de passos
+    """
+    if num_stats < 4:
+        return reduce_auxiliar_matrix(num_stats, ignore_comments)
+    return structured_reduced_matrix(num_stats), structured_reduction_steps(num_stats, ignore_comments)
+
+def extend_structured_system(matrix: list[SparseRow], num_stats: int, ignore_comments: bool = True) -> tuple[list[SparseRow], list[Step]]:
+    """
+    estende a matrix reduzida de um sistema com num_stats atributos para num_stats + 1 atributos, sem escalonar de novo:
+    as linhas existentes são reaproveitadas (apenas com as colunas reindexadas para a nova ordem das colunas mistas),
+    a linha de mt_{1,n+1} é inserida antes da linha de mt_{2,3} e só as colunas novas (mt_{a,n+1}, pt_{n+1} e s_{n+1}) são
+    calculadas; a lista de passos tem forma fechada e é gerada em O(n²) por `structured_reduction_steps`
+
+    Parâmetros:
+
+    - matrix (list[SparseRow]): a matrix reduzida esparsa do sistema com num_stats atributos
+    - num_stats (int): o numero de atributos do sistema de matrix
+    - ignore_comments (bool): se os passos de comentario separando as etapas devem ser omitidos
+
+    Retorna:
+
+    - tuple[list[SparseRow], list[Step]]: a matrix reduzida e a lista de passos do sistema com num_stats + 1 atributos,
+    identicas as de `reduce_structured_matrix(num_stats + 1)`
+    """
+    new = num_stats
+    if new < 4:
+        return reduce_structured_matrix(new + 1, ignore_comments)
+    new_mixed = (new + 1)*new//2
+    remap = [mixed_column(new + 1, a, b) for a, b in combinations(range(num_stats), 2)]
+    remap += [new_mixed + k for k in range(num_stats)] + [new_mixed + new + 1 + k for k in range(num_stats)]
+    halves = {value: Fraction(value, 2) for value in range(-2, 5)}
+    extended = []
+    for i, row in enumerate(matrix[:-1] + [{}] + matrix[-1:]):
+        i = new if i == num_stats else i
+        new_row = {remap[k]: value for k, value in row.items()}
+        if i == new - 1:
+            new_row[mixed_column(new + 1, 0, new)] = Fraction(1)
+        inverse_new = structured_inverse_entry(new + 1, i, new)
+        for a in range(1, new):
+            value = structured_inverse_entry(new + 1, i, a) + inverse_new
+            if value:
+                new_row[mixed_column(new + 1, a, new)] = halves[value]
+        if inverse_new:
+            new_row[new_mixed + new] = new_row[new_mixed + 2*new + 1] = halves[inverse_new]
+        extended.append(dict(sorted(new_row.items())))
+    return extended, structured_reduction_steps(new + 1, ignore_comments)
+
+def iter_reduced_systems(max_stats: int, ignore_comments: bool = True) -> Iterator[tuple[int, list[SparseRow], list[Step]]]:
+    """
+    percorre os sistemas de 2 até max_stats atributos, obtendo cada um a partir do anterior com `extend_structured_system`
+
+    Parâmetros:
+
+    - max_stats (int): o maior numero de atributos
+    - ignore_comments (bool): se os passos de comentario separando as etapas devem ser omitidos
+
+    Retorna:
+
+    - Iterator[tuple[int, list[SparseRow], list[Step]]]: o numero de atributos, a matrix reduzida esparsa e a lista de passos de cada sistema
+    """
+    matrix, steps = reduce_structured_matrix(2, ignore_comments)
+    for num_stats in range(2, max_stats + 1):
+        if num_stats > 2:
+            matrix, steps = extend_structured_system(matrix, num_stats - 1, ignore_comments)
+        yield num_stats, matrix, steps
+
+def check_structured_reduction(num_stats: int) -> bool:
+    """
+    confere a versão estruturada contra a eliminação generica de `reduce_auxiliar_matrix` (matrix e passos, com comentarios)
+
+    Parâmetros:
+
+    - num_stats (int): o numero de atributos do sistema
+
+    Retorna:
+
+    - bool: se as duas saidas são identicas
+    """
+    return reduce_structured_matrix(num_stats, False) == reduce_auxiliar_matrix(num_stats, False)
+
+REDUCTION_ENGINES = {
+    "structured": reduce_structured_matrix,
+    "bareiss": reduce_bareiss_matrix,
+    "lcm": reduce_auxiliar_matrix,
+}
+"""
+motores de escalonamento disponiveis, todos com a mesma assinatura e a mesma matrix reduzida
+"""
+
+def get_variable(value:Fraction, var:str, remove_multiplier: bool = False) -> tuple[Term, str]:
     """
     obtem informações de uma variavel dados seu valor e simbolos e expressoes
 
     Parâmetros:
 
-    - value (str): o valor correspondente, como uma string
+    - value (Fraction): o valor correspondente
     - var (str): o nome simbolico da variavel
     - remove_multiplier (bool): se o nome simbolico de ou não conter o multiplicador correspondente (em caso de p e m)
 
     Retorna:
 
-    - list[list, str]: uma lista contendo o simbolo da viriavel e seu valor como uma lista onde o primeiro e segundo elementos são respectivamente numerador e denominador em formato de string
+    - tuple[Term, str]: o termo (simbolo da variavel e valor) e o tipo da variavel ("pure", "mixed" ou "stats")
     """
     kind = "pure" if "p" in var else ("mixed" if "m" in var else "stats")
     if remove_multiplier:
         var = var.replace("p", "").replace("m", "")
-    parts = list(value.split("/"))
-    num, den = 0, 0
-    if len(parts) == 2:
-        num, den = map(int, parts)
-    else:
-        num, den = int(parts[0]), 1  
-    return [var, [num, den]], kind
+    return Term(var, value), kind
 
 def get_matrix_head(num_stats:int) -> list[str]:
     """
@@ -239,33 +689,33 @@ def get_matrix_head(num_stats:int) -> list[str]:
         + [f"pt_{{{i + 1}}}" for i in range(num_stats)] \
         + [f"s_{{{i + 1}}}" for i in range(num_stats)]
 
-def convert_matrix(matrix:list[list[str]], num_stats:int, include_zero: bool = False) -> list[dict]:
+def convert_matrix(matrix:list[SparseRow], num_stats:int, include_zero: bool = False) -> list[dict]:
     """
     efetua a conversão de uma matrix em uma lista de dicionario numa fuma de variavel depedentes e variavels indepedents e atributos
     se include_zero for setado como verdadeiro a função tambem passara a exibir variaveis livres/atributos com valor nulo
 
     Parâmetros:
 
-    - matrix (list[list[str]]): a matrix a ser convertida
+    - matrix (list[SparseRow]): a matrix reduzida esparsa a ser convertida
     - num_stats (int): o numero de atributos
     - include_zero (bool): adiciona elementos mesmo que seus valores sejam 0
 
     Retorna:
 
-    - list[dict]: um dicionario contendo as variavel depedente e indepededentes de cada linha da matrix, bem como os atributos.
+    - list[dict]: um dicionario contendo as variavel depedente e indepededentes (como Term) de cada linha da matrix, bem como os atributos.
     """
     converted = []
-    total = len(matrix[0])
     head = get_matrix_head(num_stats)
     for i in range(num_stats):
         row = {}
         dependent, _ = get_variable(matrix[i][i], head[i])
         equations = {"pure":[], "mixed":[], "stats":[]}
-        for j in range(num_stats, total):
-            free, kind = get_variable(matrix[i][j], head[j], True)
+        columns = range(num_stats, len(head)) if include_zero else sorted(j for j in matrix[i] if j >= num_stats)
+        for j in columns:
+            free, kind = get_variable(matrix[i].get(j, ZERO), head[j], True)
             if kind in ["pure", "mixed"]:
-                free[1][0] *= -1
-            if free[1][0] != 0 or include_zero:
+                free = free._replace(value=-free.value)
+            if free.value != 0 or include_zero:
                 equations[kind].append(free)
         row["dependent"] = dependent
         row["equations"] = equations